@@ -1,11 +1,15 @@
 import socket
 import struct
+import time
 
 class ArtNetSender:
-    def __init__(self, ip="192.168.18.28", universe=0, port=6454):
+    def __init__(self, ip="192.168.18.28", universe=0, port=6454, keepalive=1.0):
         self.ip = ip
         self.port = port
         self.universe = universe
+        self.keepalive = keepalive  # Renvoi de l'univers sans changement (les nodes Art-Net coupent sans trame)
+        self._dmx = bytearray(512)  # Univers envoyé en dernier (mis à jour canal par canal)
+        self._last_send_time = None
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
@@ -57,6 +61,19 @@ class ArtNetSender:
         # Envoie le paquet Art-Net
         self._send_artnet_packet(dmx)
 
+    def send_channels(self, channels):
+        """
+        channels : canaux DMX modifiés (canal 1-512 -> valeur) depuis l'appel précédent.
+        Met à jour l'univers gardé en mémoire et ne l'envoie que s'il a changé, ou après keepalive secondes.
+        """
+        for channel, value in channels.items():
+            if 1 <= channel <= 512:
+                self._dmx[channel - 1] = max(0, min(255, int(value)))
+        now = time.perf_counter()
+        if channels or self._last_send_time is None or now - self._last_send_time >= self.keepalive:
+            self._send_artnet_packet(self._dmx)
+            self._last_send_time = now
+
     def _send_artnet_packet(self, dmx_data):
         # En-tête Art-Net standard
         packet = bytearray()
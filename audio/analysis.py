@@ -0,0 +1,81 @@
+"""
+Analyses pures (sans état, sans thread ni flux audio) : appelées telles quelles dans
+le processus principal ou dans le processus d'analyse (audio/analysisprocess.py).
+"""
+import numpy as np
+
+
+def librosa_tempo_from_onsets(onset_envelope, sample_rate, hop_length=512, start_bpm=120, first_frame_time=None):
+    """
+    Tempo par librosa.beat.beat_track sur une enveloppe d'onset déjà calculée
+    (OnsetEnvelopeCache), triplée pour stabiliser. Retourne (BPM, heure du dernier beat) ;
+    l'heure est None sans first_frame_time (heure de capture de la première trame) ou sans beat.
+    """
+    import librosa  # Import différé : lourd (numba), inutile pour le moteur streaming
+
+    tempo, beats = librosa.beat.beat_track(
+        onset_envelope=np.concatenate([onset_envelope, onset_envelope, onset_envelope]),
+        sr=sample_rate,
+        hop_length=hop_length,
+        start_bpm=start_bpm if start_bpm > 0 else 120,
+        tightness=100     # Contrainte sur la régularité du tempo
+    )
+    beats_in_seconds = librosa.frames_to_time(beats, sr=sample_rate, hop_length=hop_length)
+    original_duration = len(onset_envelope) * hop_length / sample_rate
+    return _tempo_from_beats(beats_in_seconds, original_duration, tempo, first_frame_time)
+
+
+def librosa_tempo_from_audio(audio, sample_rate, hop_length=512, start_bpm=120, start_time=None):
+    """
+    Analyse d'origine : librosa.beat.beat_track directement sur l'audio (triplé), sans cache
+    d'onsets. Sert de référence dans audio/tempobenchmark.py. Retourne (BPM, heure du dernier beat) ;
+    start_time : heure de capture du premier échantillon (None si inconnue).
+    """
+    import librosa  # Import différé : lourd (numba), inutile pour le moteur streaming
+
+    tempo, beats = librosa.beat.beat_track(
+        y=np.concatenate([audio, audio, audio]),
+        sr=sample_rate,
+        hop_length=hop_length,
+        start_bpm=start_bpm if start_bpm > 0 else 120,
+        tightness=100     # Contrainte sur la régularité du tempo
+    )
+    beats_in_seconds = librosa.frames_to_time(beats, sr=sample_rate, hop_length=hop_length)
+    return _tempo_from_beats(beats_in_seconds, len(audio) / sample_rate, tempo, start_time)
+
+
+def _tempo_from_beats(beats_in_seconds, original_duration, tempo, start_time):
+    """
+    Ramène les beats des 3 copies sur la copie d'origine et en déduit (BPM, heure du dernier beat).
+    start_time : heure de capture du début de la copie d'origine (None si inconnue)
+    """
+    all_valid_beats = sorted(
+        beat_time % original_duration for beat_time in beats_in_seconds
+        if beat_time < 3 * original_duration
+    )
+
+    # Supprimer les beats qui sont trop proches (moins de 0.1s d'écart)
+    # pour éviter les triplons dus à la concaténation
+    if len(all_valid_beats) > 1:
+        unique_beats = [all_valid_beats[0]]
+        for beat in all_valid_beats[1:]:
+            if beat - unique_beats[-1] > 0.1:  # Minimum 0.1s entre beats
+                unique_beats.append(beat)
+        valid_beats = np.array(unique_beats)
+    else:
+        valid_beats = np.array(all_valid_beats)
+
+    # Timestamp réel du dernier beat : le buffer est daté par l'horloge ADC
+    last_beat_timestamp = None
+    if len(valid_beats) > 0 and start_time is not None:
+        last_beat_timestamp = start_time + valid_beats[-1]
+
+    # Recalculer le BPM basé uniquement sur les beats de la section originale
+    if len(valid_beats) > 1:
+        # Utiliser la médiane des intervalles pour plus de robustesse
+        librosa_bpm = int(60 / np.median(np.diff(valid_beats)))
+    else:
+        print("Not enough valid beats for recalculation, using global tempo")
+        librosa_bpm = int(np.atleast_1d(tempo)[0])
+    return librosa_bpm, last_beat_timestamp
+
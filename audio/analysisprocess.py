@@ -0,0 +1,213 @@
+import multiprocessing as mp
+import queue
+import time
+from audio.ringbuffer import SharedRingBuffer
+from audio.analysis import librosa_tempo_from_onsets
+from audio.bandenergy import RollingBandEnergies
+from audio.onsetcache import OnsetEnvelopeCache
+from audio.tempotracker import StreamingTempoTracker
+
+
+class AnalysisProcess:
+    """
+    Processus d'analyse séparé (hors du GIL du callback kick et de la boucle de rendu) :
+    - l'audio arrive par un SharedRingBuffer écrit par le callback du processus principal
+    - les résultats reviennent par une multiprocessing.Queue, relevée par poll() ; wait()
+      permet à l'analyseur de dormir jusqu'au prochain résultat
+    - démarrage, redémarrage après crash (ensure_running) et arrêt gérés ici,
+      pilotés par l'analyseur propriétaire (BeatCalculator, EnergyDetector)
+    jobs : dict de tâches exécutées par le processus, ex.
+      {"tempo": {"engine": "streaming", "interval": 2}, "energy": {"filterbank": FilterBank, "interval": 1},
+       "loudness": {"weights": ..., "frames": 16, "interval": 0.05}}  (niveau à court terme, avec "energy")
+    """
+    def __init__(self, name, buffer, sample_rate, jobs, restart_delay=1.0):
+        self.name = name
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.jobs = jobs
+        self.restart_delay = restart_delay
+        self.restarts = 0
+
+        # "spawn" partout : pas de fork d'un processus qui a des threads et un flux PortAudio ouverts
+        self._context = mp.get_context("spawn")
+        self._results = None
+        self._commands = None
+        self._new_queues()
+        self._process = None
+        self._last_start = 0.0
+        self._stopping = False
+        self._last_commands = {}  # Dernière valeur de chaque commande, rejouée après un redémarrage
+        self._pending = []        # Résultats reçus par wait(), rendus par le prochain poll()
+
+    def _new_queues(self):
+        """
+        Files neuves : un processus tué peut laisser le verrou d'une file pris,
+        on ne réutilise donc pas celles de l'instance précédente
+        """
+        for old in (self._results, self._commands):
+            if old is not None:
+                old.cancel_join_thread()
+                old.close()
+        self._results = self._context.Queue()
+        self._commands = self._context.Queue()
+
+    def start(self):
+        if self.is_alive():
+            return
+        self._stopping = False
+        self._last_start = time.perf_counter()
+        self._process = self._context.Process(
+            target=_analysis_worker,
+            args=(self.buffer.name, self.buffer.capacity, self.sample_rate, self.jobs,
+                  self._commands, self._results),
+            name=f"{self.name}-analysis",
+            daemon=True,
+        )
+        self._process.start()
+        print(f"{self.name} analysis process started (pid {self._process.pid})")
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def ensure_running(self):
+        """Relance le processus s'il s'est arrêté sans qu'on le demande (au plus une fois par restart_delay)"""
+        if self._stopping or self._process is None or self._process.is_alive():
+            return
+        if time.perf_counter() - self._last_start < self.restart_delay:
+            return
+        print(f"{self.name} analysis process exited (code {self._process.exitcode}), restarting...")
+        self.restarts += 1
+        self._new_queues()
+        self.start()
+        for command, value in self._last_commands.items():
+            self._commands.put((command, value))
+
+    def send(self, command, value):
+        """Commande vers le processus d'analyse (ex. ("start_bpm", 128))"""
+        self._last_commands[command] = value
+        self._commands.put((command, value))
+
+    def wait(self, timeout):
+        """Attend un résultat (au plus timeout secondes, ou jusqu'à stop()) ; retourne True s'il y en a un"""
+        if self._pending:
+            return True
+        try:
+            result = self._results.get(timeout=max(timeout, 0.0))
+        except queue.Empty:
+            return False
+        if result[0] == "stopped":
+            return False
+        self._pending.append(result)
+        return True
+
+    def poll(self):
+        """Résultats disponibles, sans attendre"""
+        results, self._pending = self._pending, []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return results
+            if result[0] != "stopped":
+                results.append(result)
+
+    def stop(self, timeout=2.0):
+        self._stopping = True
+        # Arrêt demandé par la file de commandes (un Event partagé peut rester bloqué
+        # si un processus a été tué pendant qu'il l'attendait)
+        self._commands.put(("stop", None))
+        self._results.put(("stopped", None))  # Réveille un analyseur bloqué dans wait()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout)
+            self._process = None
+        self.buffer.close()
+
+
+def _analysis_worker(buffer_name, capacity, sample_rate, jobs, commands, results):
+    """Boucle du processus d'analyse : lit l'audio partagé et publie les résultats des tâches"""
+    buffer = SharedRingBuffer(capacity, name=buffer_name, create=False)
+    tempo = jobs.get("tempo")
+    energy = jobs.get("energy")
+    loudness = jobs.get("loudness")
+    start_bpm = tempo.get("start_bpm", 120) if tempo else 120
+    tracker = None
+    onset_cache = None
+    if tempo and tempo.get("engine", "streaming") == "streaming":
+        tracker = StreamingTempoTracker(sample_rate, start_bpm=start_bpm)
+    elif tempo:
+        onset_cache = OnsetEnvelopeCache(sample_rate, capacity / sample_rate)
+    band_energies = RollingBandEnergies(energy["filterbank"], capacity / sample_rate) if energy else None
+    # Après un redémarrage, le tracker repart de tout ce que le buffer contient encore
+    read_pos = max(0, buffer.total_written - buffer.capacity)
+    now = time.perf_counter()
+    next_tempo = now + tempo.get("interval", 2) if tempo else None
+    next_energy = now + energy.get("interval", 1) if energy else None
+    next_loudness = now + loudness.get("interval", 0.05) if loudness and energy else None
+
+    parent = mp.parent_process()
+    running = True
+    timeout = 0.0
+    try:
+        while running and parent.is_alive():
+            # Attente sur la file de commandes jusqu'à la prochaine échéance : un arrêt est pris en
+            # compte aussitôt. L'écrivain du buffer est dans l'autre processus, il ne peut pas nous
+            # réveiller : le tracker streaming relit l'audio au plus toutes les 50 ms.
+            pending = []
+            try:
+                pending.append(commands.get(timeout=timeout))
+                while True:
+                    pending.append(commands.get_nowait())
+            except queue.Empty:
+                pass
+            for command, value in pending:
+                if command == "stop":
+                    running = False
+                elif command == "start_bpm" and value > 0:
+                    start_bpm = value
+                    if tracker is not None:
+                        tracker.set_start_bpm(value)
+            if not running:
+                break
+
+            if tracker is not None:
+                samples, read_pos, end_time = buffer.read_since(read_pos)
+                if len(samples) and end_time is not None:
+                    tracker.process(samples, end_time)
+            if band_energies is not None:
+                band_energies.update(buffer)
+
+            now = time.perf_counter()
+            if tempo and now >= next_tempo:
+                next_tempo = now + tempo.get("interval", 2)
+                if len(buffer) > sample_rate * 2:  # Au moins 2 secondes d'audio
+                    if tracker is not None:
+                        if tracker.bpm > 0:
+                            results.put(("tempo", int(round(tracker.bpm)), tracker.last_beat_time))
+                    else:
+                        try:
+                            onset_envelope, first_frame_time = onset_cache.latest(buffer, capacity / sample_rate)
+                            results.put(("tempo",) + librosa_tempo_from_onsets(
+                                onset_envelope, sample_rate, onset_cache.hop_length, start_bpm, first_frame_time
+                            ))
+                        except Exception as e:
+                            print(f"Error in librosa analysis: {e}")
+
+            if energy and now >= next_energy:
+                next_energy = now + energy.get("interval", 1)
+                if len(buffer) >= sample_rate:  # Au moins 1 seconde d'audio
+                    results.put(("energy", band_energies.energies()))
+
+            if next_loudness is not None and now >= next_loudness:
+                next_loudness = now + loudness.get("interval", 0.05)
+                results.put(("loudness", band_energies.recent_loudness(loudness["weights"], loudness["frames"])))
+
+            now = time.perf_counter()
+            deadlines = [deadline for deadline in (next_tempo, next_energy, next_loudness) if deadline is not None]
+            timeout = max(min(deadlines, default=now + 1.0) - now, 0.0)
+            if tracker is not None:
+                timeout = min(timeout, 0.05)
+    finally:
+        buffer.close()
@@ -0,0 +1,91 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class RollingBandEnergies:
+    """
+    Énergies par bande calculées au fil de l'audio (STFT courte) et cumulées sur une fenêtre
+    glissante de window_seconds : chaque trame n'est transformée qu'une fois, toutes ses bandes
+    sortent d'un seul produit avec la matrice du FilterBank, et relever les énergies ne coûte
+    qu'une opération par bande au lieu d'une FFT de toute la fenêtre.
+    Échelle calée sur l'ancienne FFT unique de la fenêtre (fenêtre de Hann sur N échantillons) :
+    sur un signal stationnaire, somme des trames = énergie FFT longue * M² / (N * hop).
+    """
+    def __init__(self, filterbank, window_seconds=3.0, hop_length=512):
+        self.filterbank = filterbank
+        self.sample_rate = filterbank.sample_rate
+        self.frame_size = filterbank.frame_size
+        self.hop_length = hop_length
+        self.names = filterbank.names
+        self._window = np.hanning(self.frame_size).astype(np.float32)
+
+        self.capacity = max(int(window_seconds * self.sample_rate / hop_length), 1)  # Trames dans la fenêtre
+        self._frames = np.zeros((self.capacity, len(self.names)), dtype=np.float64)
+        self._sums = np.zeros(len(self.names), dtype=np.float64)
+        self._next_frame = 0   # Nombre total de trames calculées
+        self._count = 0        # Trames dans la fenêtre (<= capacity)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._read_pos = 0
+
+    def reset(self):
+        self._frames[:] = 0.0
+        self._sums[:] = 0.0
+        self._next_frame = 0
+        self._count = 0
+        self._pending = self._pending[:0]
+
+    def update(self, buffer):
+        """Calcule les trames de l'audio arrivé dans le RingBuffer depuis le dernier appel"""
+        samples, position, _ = buffer.read_since(self._read_pos)
+        if position - len(samples) != self._read_pos:
+            self._pending = self._pending[:0]  # Audio perdu : on repart de l'audio disponible
+        self._read_pos = position
+        if len(samples) == 0:
+            return
+
+        pending = np.concatenate([self._pending, samples])
+        count = (len(pending) - self.frame_size) // self.hop_length + 1
+        if count <= 0:
+            self._pending = pending
+            return
+        frames = sliding_window_view(pending, self.frame_size)[::self.hop_length][:count]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        energies = self.filterbank.apply(power).astype(np.float64)
+        self._pending = pending[count * self.hop_length:]
+
+        # Somme glissante : on retire les trames écrasées, on ajoute les nouvelles
+        if count >= self.capacity:
+            energies = energies[-self.capacity:]
+            self._next_frame += count - self.capacity
+            count = self.capacity
+        slots = np.arange(self._next_frame, self._next_frame + count) % self.capacity
+        self._sums -= self._frames[slots].sum(axis=0)  # Slots jamais écrits : zéros
+        self._frames[slots] = energies
+        self._sums += energies.sum(axis=0)
+        self._next_frame += count
+        self._count = min(self._count + count, self.capacity)
+        if self._next_frame % self.capacity < count:
+            # Un tour de fenêtre : on resomme pour ne pas accumuler d'erreurs d'arrondi
+            self._sums = self._frames.sum(axis=0)
+
+    @property
+    def position(self):
+        """Position (total_written du buffer) déjà lue"""
+        return self._read_pos
+
+    def recent_loudness(self, weights, n_frames):
+        """Niveau (dB relatifs) des n_frames dernières trames : énergie moyenne par trame @ weights"""
+        n = min(n_frames, self._count)
+        if n == 0:
+            return 0.0
+        slots = np.arange(self._next_frame - n, self._next_frame) % self.capacity
+        return float(10 * np.log10(self._frames[slots].mean(axis=0) @ weights + 1))
+
+    def levels(self):
+        """Énergie (dB relatifs, 10*log10(E+1)) de chaque bande sur la fenêtre, dans l'ordre du FilterBank"""
+        scale = self._count * self.hop_length ** 2 / self.frame_size ** 2
+        return 10 * np.log10(self._sums * scale + 1)
+
+    def energies(self):
+        """Comme levels(), en dict nom -> dB"""
+        return dict(zip(self.names, self.levels().tolist()))
@@ -1,35 +1,79 @@
 import numpy as np
 import threading
-import time
-import librosa
 import sounddevice as sd
 from collections import deque
+from audio.ringbuffer import RingBuffer, SharedRingBuffer
+from audio.analysisprocess import AnalysisProcess
+from audio.clock import ShowClock, StreamTimeMapper
+from audio.tempotracker import StreamingTempoTracker
+from audio.analysis import librosa_tempo_from_onsets
+from audio.onsetcache import OnsetEnvelopeCache
+from audio.beatclock import BeatClock
+from audio.kickevents import KickEventStore
 import io
 
 class BeatCalculator(threading.Thread):
-    def __init__(self, mainboard, input_device_index=None):
+    def __init__(self, mainboard, input_device_index=None, capture_hub=None, tempo_engine="streaming",
+                 use_process=False):
         super().__init__(daemon=True)  # Initialiser le thread parent
         self.mainboard = mainboard
         
          # Paramètres pour l'enregistrement audio
         self.input_device_index = input_device_index
+        self.capture_hub = capture_hub  # Capture partagée (AudioCaptureHub) au lieu d'un flux dédié
+        self.audio_stream = None
+        self.audio_consumer = None
+        # Horloge de la source (simulée en lecture hors-ligne)
+        self.clock = capture_hub.clock if capture_hub is not None else ShowClock()
         self.sample_rate = 22050  # Réduit pour librosa (plus rapide)
         self.record_duration = 5  # secondes d'enregistrement
-        self.audio_buffer = deque(maxlen=int(self.sample_rate * self.record_duration))
         self.librosa_update_interval = 2  # Analyse librosa toutes les 4 secondes
-        self.last_librosa_update = time.time()
+        self.last_librosa_update = self.clock.now()
+        self.last_librosa_beat_timestamp = None
         
-        self.kick_timestamps = []
+        # Moteur de tempo sur l'audio : "streaming" (suivi incrémental à chaque pas) ou "librosa" (beat_track périodique)
+        if tempo_engine not in ("streaming", "librosa"):
+            raise ValueError(f"Unknown tempo engine: {tempo_engine}")
+        self.tempo_engine = tempo_engine
+        self.tempo_tracker = StreamingTempoTracker(self.sample_rate)
+        self._tempo_read_pos = 0  # Position (total_written) déjà transmise au tracker
+        self.tempo_wake_samples = 4 * self.tempo_tracker.hop_length  # Réveil du thread pour le tracker (~93 ms d'audio)
+        # Moteur librosa : enveloppe d'onset calculée une seule fois par trame, réutilisée d'une analyse à l'autre
+        self.onset_cache = None
+        
+        # Analyse de tempo dans un processus séparé (audio en mémoire partagée) ;
+        # jamais en lecture hors-ligne, qui doit rester déterministe
+        self.use_process = use_process and (capture_hub is None or capture_hub.realtime)
+        if self.use_process:
+            self.audio_buffer = SharedRingBuffer(int(self.sample_rate * self.record_duration))
+            self.analysis_process = AnalysisProcess(
+                "BeatCalculator", self.audio_buffer, self.sample_rate,
+                {"tempo": {"engine": tempo_engine, "interval": self.librosa_update_interval}},
+            )
+        else:
+            self.audio_buffer = RingBuffer(int(self.sample_rate * self.record_duration))
+            self.analysis_process = None
+            if tempo_engine == "librosa":
+                self.onset_cache = OnsetEnvelopeCache(self.sample_rate, self.record_duration)
+        self._process_start_bpm = 0  # Dernier BPM retenu transmis au processus d'analyse
+        
+        self.keep_last_kick_time = 10  # secondes
+        # Kicks récents et médiane glissante de leurs intervalles (BPM kick recalculé à chaque kick)
+        self.kick_events = KickEventStore(self.keep_last_kick_time)
+        self._kick_lock = threading.Lock()  # Kicks (thread du détecteur) et faux kicks (tick)
         self.beat_per_minute_finale = 0
         self.beat_from_librosa = 0
         self.beat_from_kick = 0
         
-        self.kick_beat_history = deque(maxlen=4)
+        # Horloge de beat (PLL) partagée avec le rendu : kicks et tempo retenu la recalent
+        self.beat_clock = getattr(mainboard, "beat_clock", None) or BeatClock()
+        
+        self.kick_beat_history = deque(maxlen=4)  # Une entrée par update_interval, affinée à chaque kick
+        self._kick_history_time = None  # Heure du kick qui a ouvert la dernière entrée
         self.librosa_beat_history = deque(maxlen=3)
-        self._running = False
-        self.last_update_time = time.time()
+        self._stop_event = threading.Event()
+        self.last_update_time = self.clock.now()
         self.update_interval = 3  # secondes
-        self.keep_last_kick_time = 10  # secondes
         
         # Ajouter un historique des BPM finaux pour éviter les changements brusques
         self.final_bpm_history = deque(maxlen=3)
@@ -37,67 +81,124 @@ class BeatCalculator(threading.Thread):
         
     def run(self):
         """Méthode principale du thread"""
-        self._running = True
         print("BeatCalculator thread started...")
         
         # Démarrer l'enregistrement audio en arrière-plan si un device est fourni
-        if self.input_device_index is not None:
+        if self.input_device_index is not None or self.capture_hub is not None:
             self.start_audio_recording()
         
-        while self._running:
-            current_time = time.time()
-            
-            # Mise à jour BPM basée sur les kicks
-            if current_time - self.last_update_time > self.update_interval:
-                self.last_update_time = current_time
-                self.put_kick_timestamp_if_no_kick()
-                self.get_beat_per_minute_from_kicks(self.kick_timestamps)
-                self.send_beat_to_mainboard()
-            
-            # Analyse BPM avec librosa (moins fréquente car plus coûteuse)
-            if (current_time - self.last_librosa_update > self.librosa_update_interval and 
-                len(self.audio_buffer) > self.sample_rate * 2):  # Au moins 2 secondes d'audio
-                self.last_librosa_update = current_time
-                self.get_beat_per_minute_from_librosa()
-                
-            # Le thread reste en vie pour traiter les timestamps
-            time.sleep(0.1)
+        while not self._stop_event.is_set():
+            self.tick(self.clock.now())
+            # Dort jusqu'à la prochaine échéance, ou jusqu'à l'arrivée de l'audio / du résultat attendu
+            now = self.clock.now()
+            timeout = max(self._next_deadline(now) - now, 0.0)
+            process = self.analysis_process
+            if process is not None:
+                process.wait(min(timeout, process.restart_delay))
+            elif self.tempo_engine == "streaming":
+                self.audio_buffer.wait_for_samples(self._tempo_read_pos, self.tempo_wake_samples, timeout)
+            elif len(self.audio_buffer) <= self.sample_rate * 2:
+                # L'analyse librosa attend 2 s d'audio : réveil dès qu'elles sont là
+                missing = self.sample_rate * 2 + 1 - len(self.audio_buffer)
+                self.audio_buffer.wait_for_samples(self.audio_buffer.total_written, missing, timeout)
+            else:
+                self._stop_event.wait(timeout)
         print("BeatCalculator thread stopped.")
     
+    def _next_deadline(self, now):
+        """Prochaine échéance de tick() : choix du BPM, analyse de tempo sur l'audio"""
+        deadline = self.last_update_time + self.update_interval
+        if self.analysis_process is None:
+            analysis = self.last_librosa_update + self.librosa_update_interval
+            if analysis > now:  # Déjà passée : l'analyse attend l'audio, pas l'heure
+                deadline = min(deadline, analysis)
+        return deadline
+    
+    def tick(self, current_time):
+        """Traitements périodiques (boucle du thread, ou source audio hors-ligne)"""
+        # Choix du BPM (le BPM kick, lui, est recalculé à chaque kick)
+        if current_time - self.last_update_time > self.update_interval:
+            self.last_update_time = current_time
+            self.put_kick_timestamp_if_no_kick()
+            self.send_beat_to_mainboard()
+        
+        if self.analysis_process is not None:
+            # Analyse faite dans le processus séparé : on relève ses résultats
+            self.poll_analysis_process()
+            return
+        
+        # Suivi de tempo incrémental : traite l'audio arrivé depuis le dernier tick
+        if self.tempo_engine == "streaming":
+            self.update_streaming_tempo()
+        
+        # Analyse BPM sur l'audio (librosa : moins fréquente car plus coûteuse)
+        if (current_time - self.last_librosa_update > self.librosa_update_interval and 
+            len(self.audio_buffer) > self.sample_rate * 2):  # Au moins 2 secondes d'audio
+            self.last_librosa_update = current_time
+            if self.tempo_engine == "streaming":
+                self.get_beat_per_minute_from_tracker()
+            else:
+                self.get_beat_per_minute_from_librosa()
+    
     def stop(self):
         """Arrête le thread proprement"""
-        if hasattr(self, 'audio_stream') and self.audio_stream:
+        self._stop_event.set()
+        self.audio_buffer.wake()
+        if self.audio_consumer is not None:
+            self.capture_hub.unregister(self.audio_consumer)
+            self.audio_consumer = None
+        if self.audio_stream:
             self.audio_stream.stop()
             self.audio_stream.close()
-        self._running = False
+        if self.analysis_process is not None:
+            self.analysis_process.stop()
+            self.analysis_process = None
+        
+    def poll_analysis_process(self):
+        """Relance le processus d'analyse s'il a planté et applique ses résultats"""
+        process = self.analysis_process
+        process.ensure_running()
+        # A priori du tracker recentré sur le BPM retenu, comme dans le processus principal
+        if self.beat_per_minute_finale > 0 and self.beat_per_minute_finale != self._process_start_bpm:
+            self._process_start_bpm = self.beat_per_minute_finale
+            process.send("start_bpm", self.beat_per_minute_finale)
+        for result in process.poll():
+            if result[0] == "tempo":
+                _, audio_bpm, last_beat_timestamp = result
+                self._apply_audio_tempo(audio_bpm, last_beat_timestamp)
         
     def send_beat_to_mainboard(self):
         """Choisit le BPM le plus stable entre kick et librosa"""
         
+        # Estimation kick mise à jour par le thread du détecteur : copie cohérente
+        with self._kick_lock:
+            kick_beat_history = list(self.kick_beat_history)
+            beat_from_kick = self.beat_from_kick
+        
         # Calculer la stabilité de chaque méthode
-        kick_stability = self._calculate_stability(self.kick_beat_history)
+        kick_stability = self._calculate_stability(kick_beat_history)
         librosa_stability = self._calculate_stability(self.librosa_beat_history)
         
         # Calculer la confiance basée sur la quantité de données
-        kick_confidence = min(len(self.kick_beat_history) / 5.0, 1.0)  # Max confiance à 5 échantillons
+        kick_confidence = min(len(kick_beat_history) / 5.0, 1.0)  # Max confiance à 5 échantillons
         librosa_confidence = min(len(self.librosa_beat_history) / 3.0, 1.0)  # Max confiance à 3 échantillons
         
         # Score combiné (stabilité * confiance)
-        kick_score = kick_stability * kick_confidence if self.beat_from_kick > 0 else 0
+        kick_score = kick_stability * kick_confidence if beat_from_kick > 0 else 0
         librosa_score = librosa_stability * librosa_confidence if self.beat_from_librosa > 0 else 0
         
-        #print(f"Kick: BPM={self.beat_from_kick}, stability={kick_stability:.2f}, confidence={kick_confidence:.2f}, score={kick_score:.2f}")
+        #print(f"Kick: BPM={beat_from_kick}, stability={kick_stability:.2f}, confidence={kick_confidence:.2f}, score={kick_score:.2f}")
         #print(f"Librosa: BPM={self.beat_from_librosa}, stability={librosa_stability:.2f}, confidence={librosa_confidence:.2f}, score={librosa_score:.2f}")
         
         # Choisir la meilleure méthode
         if kick_score > librosa_score and kick_score > 0.3:  # Seuil minimum de confiance
-            self.beat_per_minute_finale = self.beat_from_kick
+            self.beat_per_minute_finale = beat_from_kick
             source = "kick"
         elif librosa_score > 0.3:
             self.beat_per_minute_finale = self.beat_from_librosa
             source = "librosa"
-        elif self.beat_from_kick > 0:
-            self.beat_per_minute_finale = self.beat_from_kick
+        elif beat_from_kick > 0:
+            self.beat_per_minute_finale = beat_from_kick
             source = "kick (fallback)"
         elif self.beat_from_librosa > 0:
             self.beat_per_minute_finale = self.beat_from_librosa
@@ -120,6 +221,7 @@ class BeatCalculator(threading.Thread):
                     print(f"Smoothed BPM transition: {previous_bpm} -> {self.beat_per_minute_finale}")
 
         self.final_bpm_history.append(self.beat_per_minute_finale)
+        self.beat_clock.update_tempo(self.beat_per_minute_finale, self.last_librosa_beat_timestamp, self.clock.now())
         self.mainboard.update_sequence_duration_and_fade_from_bpm(self.beat_per_minute_finale, self.last_librosa_beat_timestamp)
         
     def _calculate_stability(self, history):
@@ -144,55 +246,49 @@ class BeatCalculator(threading.Thread):
         
         return min(stability_score, 1.0)
 
-    def put_kick_timestamp(self):
-        #ajoute le timestamp actuel à la liste des kicks
-        self.kick_timestamps.append(time.time())
-        #si le plus vieux timestamp a plus de 5 secondes, on le supprime
-        if len(self.kick_timestamps) > 0 and (time.time() - self.kick_timestamps[0]) > self.keep_last_kick_time:
-            self.kick_timestamps.pop(0)
+    def put_kick_timestamp(self, timestamp=None):
+        #ajoute le timestamp du kick (heure de capture de l'onset, à défaut l'heure actuelle)
+        now = self.clock.now() if timestamp is None else timestamp
+        self._add_kick(now)
+        self.beat_clock.on_kick(now)
             
     def put_kick_timestamp_if_no_kick(self):
         
         #si le plus récent timestamp a plus de self.update_interval, on ajoute un faux kick
-        if len(self.kick_timestamps) > 0 and (time.time()-0.001 - self.kick_timestamps[-1]) > self.update_interval:
+        now = self.clock.now()
+        if len(self.kick_events) > 0 and (now-0.001 - self.kick_events[-1]) > self.update_interval:
             print("No kick detected recently, adding fake kick for BPM calculation.")
-            self.kick_timestamps.append(time.time())
+            self._add_kick(now)
 
-    def get_beat_per_minute_from_kicks(self, kick_timestamps):
-        if len(kick_timestamps) < 3:
-            return 0
-        # Convertir en array numpy pour éviter les erreurs de type
-        timestamps = np.array(kick_timestamps)
-
-        # Calculer les intervalles entre les kicks
-        intervals = np.diff(timestamps)
-        
-        valid_intervals = intervals[
-            (intervals > 0.2) &    # Min 0.2s = 300 BPM max
-            (intervals < 2.0) &    # Max 2.0s = 30 BPM min  
-            np.isfinite(intervals)
-        ]
+    def _add_kick(self, timestamp):
+        #les kicks de plus de keep_last_kick_time secondes expirent à l'ajout
+        with self._kick_lock:
+            if self.kick_events.append(timestamp):
+                self.get_beat_per_minute_from_kicks(timestamp)
 
-        if len(valid_intervals) < 2:
+    def get_beat_per_minute_from_kicks(self, timestamp):
+        """
+        BPM kick : médiane glissante des intervalles valides (0.2 s à 2 s, soit 300 à 30 BPM).
+        Appelé à chaque kick, sous _kick_lock ; une nouvelle entrée de kick_beat_history est
+        ouverte au plus une fois par update_interval, sinon la dernière est remplacée.
+        """
+        if len(self.kick_events) < 3 or len(self.kick_events.intervals) < 2:
             return 0
-            
-        median_interval = np.median(valid_intervals)
+        median_interval = self.kick_events.median_interval()
         
         if median_interval <= 0:
             return 0
 
-        bpm = 60 / median_interval
+        bpm = int(np.clip(60 / median_interval, 30, 300))
         
-        self.kick_beat_history.append(int(np.clip(bpm, 30, 300)))
-        if len(self.kick_beat_history) == 0:
-            return_bpm = 0
-        if len(self.kick_beat_history) < 3:
-            return_bpm = int(np.mean(self.kick_beat_history))
-
-        #print(f"combien d'historique: {len(self.kick_beat_history)}, bpm calculé: {int(bpm)} recalculé(moy): {int(np.mean(self.kick_beat_history))} recalculé(med): {int(np.median(self.kick_beat_history))}")
-        # Sinon, utiliser la médiane pour plus de robustesse
-        return_bpm = int(np.median(self.kick_beat_history))
-        self.beat_from_kick = return_bpm
+        if self.kick_beat_history and timestamp - self._kick_history_time < self.update_interval:
+            self.kick_beat_history[-1] = bpm
+        else:
+            self.kick_beat_history.append(bpm)
+            self._kick_history_time = timestamp
+        # Médiane des dernières estimations pour plus de robustesse
+        self.beat_from_kick = int(np.median(self.kick_beat_history))
+        return self.beat_from_kick
 
 
     def start_audio_recording(self):
@@ -200,9 +296,20 @@ class BeatCalculator(threading.Thread):
         def audio_callback(indata, frames, time, status):
             if status:
                 print(f"Audio recording status: {status}")
-            # Ajouter les nouvelles données au buffer circulaire
+            # Ajouter les nouvelles données au buffer circulaire, datées à la fin du bloc (horloge ADC)
             audio_data = indata[:, 0] if indata.ndim > 1 else indata  # Mono
-            self.audio_buffer.extend(audio_data)
+            self.audio_buffer.write(audio_data, time.inputBufferAdcTime + frames / self.sample_rate)
+        
+        if self.analysis_process is not None:
+            self.analysis_process.start()
+        
+        if self.capture_hub is not None:
+            # Flux partagé : le hub décime et redécoupe pour nous
+            self.audio_consumer = self.capture_hub.register(
+                audio_callback, sample_rate=self.sample_rate, block_size=1024
+            )
+            print(f"Audio recording attached to shared capture ({self.sample_rate} Hz)")
+            return
         
         try:
             self.audio_stream = sd.InputStream(
@@ -210,7 +317,7 @@ class BeatCalculator(threading.Thread):
                 channels=1,
                 samplerate=self.sample_rate,
                 blocksize=1024,
-                callback=audio_callback
+                callback=StreamTimeMapper(self.clock, self.sample_rate).wrap(audio_callback)
             )
             self.audio_stream.start()
             print(f"Audio recording started on device {self.input_device_index}")
@@ -218,6 +325,39 @@ class BeatCalculator(threading.Thread):
             print(f"Failed to start audio recording: {e}")
             self.audio_stream = None
 
+    def update_streaming_tempo(self):
+        """Transmet au tracker les échantillons écrits dans le buffer depuis le dernier appel"""
+        samples, self._tempo_read_pos, end_time = self.audio_buffer.read_since(self._tempo_read_pos)
+        if len(samples) and end_time is not None:
+            self.tempo_tracker.process(samples, end_time)
+
+    def get_beat_per_minute_from_tracker(self):
+        """Relève le BPM et le dernier beat du suivi incrémental (remplace l'analyse librosa)"""
+        tracker = self.tempo_tracker
+        if tracker.bpm <= 0:
+            return
+        # A priori recentré sur le BPM retenu, comme start_bpm pour librosa
+        if self.beat_per_minute_finale > 0:
+            tracker.set_start_bpm(self.beat_per_minute_finale)
+        self._apply_audio_tempo(int(round(tracker.bpm)), tracker.last_beat_time)
+
+    def _apply_audio_tempo(self, audio_bpm, last_beat_timestamp):
+        """Prend en compte un résultat de l'analyse audio : dernier beat et BPM (si valide)"""
+        if last_beat_timestamp is not None:
+            #stocker ce timestamp pour utilisation ultérieure
+            self.last_librosa_beat_timestamp = last_beat_timestamp
+        if 30 <= audio_bpm <= 300:
+            self.librosa_beat_history.append(audio_bpm)
+            
+            # Recalculer le BPM final avec l'historique
+            if len(self.librosa_beat_history) < 3:
+                self.beat_from_librosa = int(np.mean(self.librosa_beat_history))
+            else:
+                self.beat_from_librosa = int(np.median(self.librosa_beat_history))
+            
+        else:
+            print(f"Audio BPM {audio_bpm} out of range (30-300), ignoring")
+
     def get_beat_per_minute_from_librosa(self):
         """Analyse le BPM avec librosa sur le buffer audio"""
         try:
@@ -225,106 +365,14 @@ class BeatCalculator(threading.Thread):
                 print("Not enough audio data for librosa analysis")
                 return
             
-            # Convertir le buffer en array numpy
-            audio_array = np.array(list(self.audio_buffer), dtype=np.float32)
-            
-            concatenated_audio = np.concatenate([audio_array, audio_array, audio_array])
+            # Onsets du nouvel audio seulement ; le reste de la fenêtre vient du cache
+            onset_envelope, first_frame_time = self.onset_cache.latest(self.audio_buffer, self.record_duration)
             
-            librosaTime = time.time()
-            # Détecter le tempo avec librosa
-            tempo, beats = librosa.beat.beat_track(
-                y=concatenated_audio,
-                sr=self.sample_rate,
-                hop_length=512,
-                start_bpm=self.beat_per_minute_finale if self.beat_per_minute_finale > 0 else 120,
-                tightness=100     # Contrainte sur la régularité du tempo
+            librosa_bpm, last_beat_timestamp = librosa_tempo_from_onsets(
+                onset_envelope, self.sample_rate, self.onset_cache.hop_length,
+                self.beat_per_minute_finale, first_frame_time
             )
-            
-            # MAINTENANT on prend le temps de fin d'analyse
-            analysis_end_time = time.time()
-            analysis_duration = analysis_end_time - librosaTime
-            #print(f"Librosa analysis took {analysis_duration:.2f}s, detected tempo: {tempo}, beats count: {len(beats)}")
-
-            # Convertir les beats de frames en secondes
-            beats_in_seconds = librosa.frames_to_time(beats, sr=self.sample_rate, hop_length=512)
-            
-            original_duration = len(audio_array) / self.sample_rate
-            
-            # Filtrer pour garder tous les beats valides des 3 copies
-            all_valid_beats = []
-            
-            for beat_time in beats_in_seconds:
-                if beat_time < original_duration:
-                    all_valid_beats.append(beat_time)
-                elif beat_time < 2 * original_duration:
-                    equivalent_time = beat_time - original_duration
-                    all_valid_beats.append(equivalent_time)
-                elif beat_time < 3 * original_duration:
-                    equivalent_time = beat_time - 2 * original_duration
-                    all_valid_beats.append(equivalent_time)
-            
-            # Convertir en numpy array et trier
-            valid_beats = np.array(sorted(all_valid_beats))
-            
-            # Supprimer les beats qui sont trop proches (moins de 0.1s d'écart)
-            # pour éviter les triplons dus à la concaténation
-            if len(all_valid_beats) > 1:
-                unique_beats = [all_valid_beats[0]]
-                for beat in all_valid_beats[1:]:
-                    if beat - unique_beats[-1] > 0.1:  # Minimum 0.1s entre beats
-                        unique_beats.append(beat)
-                valid_beats = np.array(unique_beats)
-            else:
-                valid_beats = all_valid_beats
-            
-            #print(f"Valid beats after deduplication: {len(valid_beats)} from {len(all_valid_beats)} total")
-            
-            
-            # Calculer les timestamps réels des beats
-            if len(valid_beats) > 0:
-                # Le dernier beat détecté dans l'audio buffer
-                last_beat_offset = valid_beats[-1]  # En secondes depuis le début du buffer
-                
-                # Calculer le timestamp réel du dernier beat
-                # Le buffer a été enregistré avant l'analyse, donc on recule de analysis_duration
-                buffer_start_time = analysis_end_time - analysis_duration - original_duration
-                last_beat_timestamp = buffer_start_time + last_beat_offset
-                
-                #print(f"Last beat occurred at timestamp: {last_beat_timestamp}, offset: {last_beat_offset:.2f}s in buffer")
-                
-                #stocker ce timestamp pour utilisation ultérieure
-                self.last_librosa_beat_timestamp = last_beat_timestamp
-            
-            # Recalculer le BPM basé uniquement sur les beats de la section originale
-            if len(valid_beats) > 1:
-                # Calculer les intervalles entre les beats valides
-                beat_intervals = np.diff(valid_beats)
-                if len(beat_intervals) > 0:
-                    # Utiliser la médiane des intervalles pour plus de robustesse
-                    median_beat_interval = np.median(beat_intervals)
-                    recalculated_bpm = 60 / median_beat_interval
-                    
-                    # Utiliser le BPM recalculé plutôt que le global
-                    librosa_bpm = int(recalculated_bpm)
-                else:
-                    librosa_bpm = int(tempo)
-            else:
-                print("Not enough valid beats for recalculation, using global tempo")
-                librosa_bpm = int(tempo)
-            
-            # Ajouter à l'historique si valide
-            if 30 <= librosa_bpm <= 300:
-                self.librosa_beat_history.append(librosa_bpm)
-                
-                # Recalculer le BPM final avec l'historique
-                old_bpm = self.beat_from_librosa
-                if len(self.librosa_beat_history) < 3:
-                    self.beat_from_librosa = int(np.mean(self.librosa_beat_history))
-                else:
-                    self.beat_from_librosa = int(np.median(self.librosa_beat_history))
-                
-            else:
-                print(f"Librosa BPM {librosa_bpm} out of range (30-300), ignoring")
+            self._apply_audio_tempo(librosa_bpm, last_beat_timestamp)
 
         except Exception as e:
             print(f"Error in librosa analysis: {e}")
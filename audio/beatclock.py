@@ -0,0 +1,139 @@
+import math
+import threading
+
+
+class BeatClock:
+    """
+    Horloge de beat à verrouillage de phase (PLL logicielle) :
+    - chaque kick horodaté corrige la phase (gain phase_gain) et la période (gain period_gain)
+      s'il tombe près d'un beat prédit ; les kicks hors fenêtre (contretemps, faux kicks) sont ignorés
+    - les estimations de tempo (BPM retenu, dernier beat librosa/streaming) recalent la période
+      lors d'un vrai changement de tempo, et la phase quand aucun kick ne la tient
+    Les requêtes (phase, prochain beat, position dans la mesure) sont en temps constant et
+    lisent un seul tuple publié en bloc : le rendu ne prend pas de verrou. Les écritures
+    (kicks du thread de détection, tempo du thread d'analyse) lisent puis remplacent ce tuple :
+    elles passent par un verrou pour qu'aucune correction ne se perde.
+    La mesure est comptée depuis le premier beat verrouillé (pas de détection du temps fort).
+    """
+    def __init__(self, beats_per_bar=4, phase_gain=0.3, period_gain=0.05, capture_window=0.25,
+                 tempo_change=0.04, max_misses=4):
+        self.beats_per_bar = beats_per_bar
+        self.phase_gain = phase_gain
+        self.period_gain = period_gain
+        self.capture_window = capture_window  # Écart toléré, en fraction de période
+        self.tempo_change = tempo_change      # Écart relatif de tempo au-delà duquel on recale la période
+        self.max_misses = max_misses          # Kicks hors fenêtre consécutifs avant de reverrouiller
+        # (heure d'un beat de référence, période en s, numéro de ce beat)
+        self._state = (None, 0.0, 0)
+        self._misses = 0
+        self.last_kick_time = None
+        self._lock = threading.Lock()  # Écrivains seulement (on_kick, update_tempo, reset)
+
+    def reset(self):
+        with self._lock:
+            self._state = (None, 0.0, 0)
+            self._misses = 0
+            self.last_kick_time = None
+
+    @property
+    def locked(self):
+        anchor, period, _ = self._state
+        return anchor is not None and period > 0
+
+    @property
+    def bpm(self):
+        period = self._state[1]
+        return 60.0 / period if period > 0 else 0.0
+
+    def on_kick(self, timestamp):
+        """Kick horodaté (heure de l'attaque) : corrige phase et période"""
+        with self._lock:
+            self._on_kick(timestamp)
+
+    def _on_kick(self, timestamp):
+        anchor, period, index = self._state
+        if period <= 0:
+            return  # Pas encore de tempo : un kick seul ne donne pas de période
+        if anchor is None:
+            self._state = (timestamp, period, index)
+            self.last_kick_time = timestamp
+            return
+
+        beats = round((timestamp - anchor) / period)
+        error = timestamp - (anchor + beats * period)
+        if abs(error) > self.capture_window * period:
+            self._misses += 1
+            if self._misses >= self.max_misses:
+                # Décrochage durable (break, changement de morceau) : on se recale sur ce kick
+                self._state = (timestamp, period, index + beats)
+                self._misses = 0
+                self.last_kick_time = timestamp
+            return
+        self._misses = 0
+        if beats > 0:
+            period += self.period_gain * error / beats  # Correction de fréquence répartie sur les beats écoulés
+        self._state = (anchor + beats * period + self.phase_gain * error, period, index + beats)
+        self.last_kick_time = timestamp
+
+    def update_tempo(self, bpm, beat_timestamp=None, now=None):
+        """
+        Estimation de tempo (et éventuellement heure d'un beat) venant de l'analyse ;
+        now : heure de l'estimation, pour savoir si des kicks tiennent encore la phase
+        (à défaut beat_timestamp)
+        """
+        if bpm <= 0:
+            return
+        target = 60.0 / bpm
+        with self._lock:
+            anchor, period, index = self._state
+            reference = now if now is not None else beat_timestamp
+            kicks_recent = (self.last_kick_time is not None and reference is not None
+                            and reference - self.last_kick_time < 4 * period)
+            if period <= 0 or abs(target - period) > self.tempo_change * period:
+                period = target  # Nouveau tempo
+            elif not kicks_recent:
+                period += 0.2 * (target - period)  # Sans kicks, le BPM estimé guide la période
+            if beat_timestamp is not None:
+                if anchor is None:
+                    anchor = beat_timestamp
+                elif not kicks_recent:
+                    beats = round((beat_timestamp - anchor) / period)
+                    error = beat_timestamp - (anchor + beats * period)
+                    anchor = anchor + beats * period + self.phase_gain * error
+                    index += beats
+            self._state = (anchor, period, index)
+
+    def position(self, now):
+        """(numéro du beat en cours, phase 0-1 dans ce beat), ou None sans verrouillage"""
+        anchor, period, index = self._state
+        if anchor is None or period <= 0:
+            return None
+        beats = (now - anchor) / period
+        whole = math.floor(beats)
+        return index + whole, beats - whole
+
+    def phase(self, now):
+        """Position dans le beat courant (0 au beat, 1 au suivant) ; 0 sans verrouillage"""
+        position = self.position(now)
+        return position[1] if position is not None else 0.0
+
+    def next_beat_time(self, now):
+        anchor, period, _ = self._state
+        if anchor is None or period <= 0:
+            return None
+        return anchor + (math.floor((now - anchor) / period) + 1) * period
+
+    def beat_time(self, beat_index):
+        """Heure prédite d'un beat donné par son numéro"""
+        anchor, period, index = self._state
+        if anchor is None or period <= 0:
+            return None
+        return anchor + (beat_index - index) * period
+
+    def bar_position(self, now):
+        """Position dans la mesure en beats (0 à beats_per_bar), ou None sans verrouillage"""
+        position = self.position(now)
+        if position is None:
+            return None
+        beat_index, phase = position
+        return beat_index % self.beats_per_bar + phase
@@ -0,0 +1,185 @@
+import threading
+import numpy as np
+import scipy.signal
+import sounddevice as sd
+from audio.clock import ShowClock, CaptureTimeInfo, StreamTimeMapper
+
+
+class CaptureConsumer:
+    """
+    Consommateur enregistré auprès du hub :
+    - décimation entière (avec filtre anti-repliement) vers sa fréquence d'échantillonnage
+    - redécoupage en blocs de taille fixe
+    - appel du callback avec la même signature qu'un callback sounddevice
+    """
+    def __init__(self, callback, hub_sample_rate, sample_rate, block_size):
+        if hub_sample_rate % sample_rate != 0:
+            raise ValueError(
+                f"Sample rate {sample_rate} is not an integer divisor of the capture rate {hub_sample_rate}"
+            )
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.decimation = hub_sample_rate // sample_rate
+
+        # Filtre anti-repliement avant décimation (état conservé entre les blocs)
+        if self.decimation > 1:
+            self._sos = scipy.signal.butter(8, 0.8 / self.decimation, btype='low', output='sos')
+            self._zi = scipy.signal.sosfilt_zi(self._sos) * 0.0
+        else:
+            self._sos = None
+        self._phase = 0  # Décalage de décimation reporté d'un bloc à l'autre
+
+        # Bloc en cours de remplissage (réutilisé, comme le buffer de PortAudio)
+        self._pending = np.zeros((block_size, 1), dtype=np.float32)
+        self._fill = 0
+        self._block_start_time = 0.0
+        self._status = None
+        self._time_info = CaptureTimeInfo()
+
+    def feed(self, mono, adc_time, current_time, status):
+        """Reçoit un bloc du hub (fréquence du hub) et émet les blocs complets"""
+        if self._sos is not None:
+            filtered, self._zi = scipy.signal.sosfilt(self._sos, mono, zi=self._zi)
+            samples = filtered[self._phase::self.decimation]
+            # Position du premier échantillon retenu dans le bloc, en secondes
+            first_offset = self._phase / (self.sample_rate * self.decimation)
+            self._phase = (self._phase - len(mono)) % self.decimation
+        else:
+            samples = mono
+            first_offset = 0.0
+
+        if status:
+            self._status = status
+
+        pos = 0
+        count = len(samples)
+        while pos < count:
+            if self._fill == 0:
+                # Horodatage ADC du premier échantillon du bloc consommateur
+                self._block_start_time = adc_time + first_offset + pos / self.sample_rate
+            take = min(self.block_size - self._fill, count - pos)
+            self._pending[self._fill:self._fill + take, 0] = samples[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.block_size:
+                self._time_info.inputBufferAdcTime = self._block_start_time
+                self._time_info.currentTime = current_time
+                status, self._status = self._status, None
+                try:
+                    self.callback(self._pending, self.block_size, self._time_info, status)
+                except Exception as e:
+                    print(f"AudioCaptureHub consumer error: {e}")
+                self._fill = 0
+
+
+class AudioCaptureHub:
+    """
+    Capture audio partagée : ouvre le périphérique d'entrée une seule fois et
+    distribue chaque bloc aux consommateurs enregistrés (BeatCalculator,
+    EnergyDetector, KickDetector...). Chaque consommateur déclare sa fréquence
+    d'échantillonnage (diviseur entier de celle du hub) et sa taille de bloc.
+    Si un périphérique de sortie est fourni, le flux est ouvert en duplex et
+    assure aussi le monitoring (remplace AudioPassthrough).
+    """
+    def __init__(
+        self,
+        input_device_index,
+        sample_rate=44100,
+        block_size=256,
+        output_device_index=None,
+        monitor_gain=1.0,
+    ):
+        self.input_device_index = input_device_index
+        self.output_device_index = output_device_index
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.monitor_gain = monitor_gain
+        self.clock = ShowClock()    # Horloge partagée par les analyseurs branchés sur ce hub
+        self.realtime = True        # False pour les sources hors-ligne (FileAudioSource)
+
+        # Tuple remplacé en bloc (copy-on-write) : le callback audio le lit sans verrou
+        self._consumers = ()
+        self._lock = threading.Lock()
+        self._stream = None
+        self._running = False
+        # Temps PortAudio -> horloge de spectacle (les consommateurs reçoivent des temps ADC convertis)
+        self._time_mapper = StreamTimeMapper(self.clock, sample_rate)
+
+    def register(self, callback, sample_rate=None, block_size=None):
+        """Enregistre un consommateur et retourne son handle (pour unregister)"""
+        consumer = CaptureConsumer(
+            callback,
+            self.sample_rate,
+            sample_rate or self.sample_rate,
+            block_size or self.block_size,
+        )
+        with self._lock:
+            self._consumers = self._consumers + (consumer,)
+        return consumer
+
+    def unregister(self, consumer):
+        with self._lock:
+            self._consumers = tuple(c for c in self._consumers if c is not consumer)
+
+    def start(self):
+        """Ouvre le flux (une seule fois, même si plusieurs analyseurs appellent start)"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        try:
+            if self.output_device_index is not None:
+                self._stream = sd.Stream(
+                    device=(self.input_device_index, self.output_device_index),
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    blocksize=self.block_size,
+                    dtype='float32',
+                    callback=self._duplex_callback,
+                )
+            else:
+                self._stream = sd.InputStream(
+                    device=self.input_device_index,
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    blocksize=self.block_size,
+                    dtype='float32',
+                    callback=self._input_callback,
+                )
+            self._stream.start()
+            print(f"AudioCaptureHub started on device {self.input_device_index} "
+                  f"({self.sample_rate} Hz, block {self.block_size})")
+        except Exception as e:
+            print(f"Failed to start AudioCaptureHub: {e}")
+            self._stream = None
+            self._running = False
+
+    def stop(self):
+        self._running = False
+        if self._stream:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    def _input_callback(self, indata, frames, time_info, status):
+        if not self._running:
+            return
+        adc_time = self._time_mapper.adc_time(time_info, frames)
+        self._dispatch(indata[:, 0], adc_time, self.clock.now(), status)
+
+    def _duplex_callback(self, indata, outdata, frames, time_info, status):
+        if not self._running:
+            outdata.fill(0)
+            return
+        outdata[:] = indata * self.monitor_gain
+        adc_time = self._time_mapper.adc_time(time_info, frames)
+        self._dispatch(indata[:, 0], adc_time, self.clock.now(), status)
+
+    def _dispatch(self, mono, adc_time, current_time, status):
+        """Distribue un bloc mono à tous les consommateurs"""
+        for consumer in self._consumers:
+            consumer.feed(mono, adc_time, current_time, status)
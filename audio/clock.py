@@ -0,0 +1,77 @@
+import time
+
+
+class ShowClock:
+    """
+    Horloge de spectacle unique : monotone et haute résolution, partagée par la
+    capture audio, les analyseurs et le rendu (insensible aux réglages de l'heure système)
+    """
+    def now(self):
+        return time.perf_counter()
+
+
+class SimulatedClock:
+    """Horloge pilotée par la position dans le flux audio (lecture hors-ligne)"""
+    def __init__(self, start_time=0.0):
+        self._now = float(start_time)
+
+    def now(self):
+        return self._now
+
+    def set(self, timestamp):
+        self._now = float(timestamp)
+
+    def advance(self, seconds):
+        self._now += seconds
+
+
+class CaptureTimeInfo:
+    """Équivalent minimal du time_info PortAudio, avec des temps exprimés sur l'horloge de spectacle"""
+    __slots__ = ("inputBufferAdcTime", "currentTime", "outputBufferDacTime")
+
+    def __init__(self, input_adc_time=0.0, current_time=0.0):
+        self.inputBufferAdcTime = input_adc_time
+        self.currentTime = current_time
+        self.outputBufferDacTime = 0.0
+
+
+class StreamTimeMapper:
+    """
+    Convertit les temps d'un flux PortAudio (inputBufferAdcTime, currentTime) vers
+    l'horloge de spectacle. L'écart entre les deux horloges est estimé à chaque
+    callback ; un callback en retard ne fait qu'augmenter cet écart, on garde donc
+    le minimum observé. Pour suivre la dérive des horloges, l'estimation peut remonter,
+    mais jamais plus vite que max_drift (secondes par seconde écoulée) : les retards
+    d'ordonnancement ne s'y moyennent pas.
+    """
+    def __init__(self, clock, sample_rate, max_drift=1e-4):
+        self.clock = clock
+        self.sample_rate = sample_rate
+        self.max_drift = max_drift   # 100 ppm : bien au-delà de la dérive d'un quartz de carte son
+        self._offset = None
+        self._last_now = None
+        self._time_info = CaptureTimeInfo()
+
+    def adc_time(self, time_info, frames):
+        """Heure (horloge de spectacle) du premier échantillon du bloc"""
+        now = self.clock.now()
+        stream_now = time_info.currentTime
+        adc = time_info.inputBufferAdcTime
+        if not stream_now or not adc:
+            # Backend sans horodatage (certains pilotes Windows) : on estime depuis l'arrivée
+            return now - frames / self.sample_rate
+        offset = now - stream_now
+        if self._offset is None or offset < self._offset:
+            self._offset = offset
+        else:
+            self._offset = min(offset, self._offset + self.max_drift * (now - self._last_now))
+        self._last_now = now
+        return adc + self._offset
+
+    def wrap(self, callback):
+        """Enveloppe un callback d'InputStream pour qu'il reçoive des temps sur l'horloge de spectacle"""
+        def mapped_callback(indata, frames, time_info, status):
+            self._time_info.inputBufferAdcTime = self.adc_time(time_info, frames)
+            self._time_info.currentTime = self.clock.now()
+            callback(indata, frames, self._time_info, status)
+        return mapped_callback
@@ -1,22 +1,30 @@
 import numpy as np
 import threading
-import time
-import librosa
 import sounddevice as sd
-from collections import deque
+from audio.ringbuffer import RingBuffer, SharedRingBuffer
+from audio.analysisprocess import AnalysisProcess
+from audio.clock import ShowClock, StreamTimeMapper
+from audio.bandenergy import RollingBandEnergies
+from audio.filterbank import FilterBank, load_band_layout
+from audio.levels import VERY_LOW, LOW, MEDIUM, HIGH, VERY_HIGH, level_from_intensity
+from audio.intensity import IntensityEnvelope
+from audio.windowstats import SortedWindow
 
 class EnergyDetector(threading.Thread):
-    def __init__(self, mainboard, input_device_index=None):
+    def __init__(self, mainboard, input_device_index=None, capture_hub=None, use_process=False, band_layout=None):
         super().__init__(daemon=True)
         self.mainboard = mainboard
         
         # Paramètres audio
         self.input_device_index = input_device_index
+        self.capture_hub = capture_hub  # Capture partagée (AudioCaptureHub) au lieu d'un flux dédié
+        self.audio_consumer = None
+        # Horloge de la source (simulée en lecture hors-ligne)
+        self.clock = capture_hub.clock if capture_hub is not None else ShowClock()
         self.sample_rate = 22050
         self.record_duration = 3  # Buffer de 3 secondes
-        self.audio_buffer = deque(maxlen=int(self.sample_rate * self.record_duration))
         self.analysis_interval = 1  # Analyse toutes les 1 seconde
-        self.last_analysis_time = time.time()
+        self.last_analysis_time = self.clock.now()
         
          # Paramètres des bandes de fréquences (plus précises)
         self.sub_bass_range = (20, 60)       # Sub-bass: 20-60 Hz (très profond)
@@ -26,18 +34,67 @@ class EnergyDetector(threading.Thread):
         self.high_range = (4000, 8000)       # High: 4000-8000 Hz (cymbales, détails)
         self.presence_range = (8000, 16000)  # Presence: 8000-16000 Hz (air, brillance)
         
-       # Historique plus long pour meilleure adaptation
+       # Historique plus long pour meilleure adaptation (fenêtres triées : percentiles sans tri)
         self.energy_history = {
-            'sub_bass': deque(maxlen=20),
-            'bass': deque(maxlen=20),
-            'low_mid': deque(maxlen=20),
-            'mid': deque(maxlen=20),
-            'high': deque(maxlen=20),
-            'presence': deque(maxlen=20)
+            'sub_bass': SortedWindow(20),
+            'bass': SortedWindow(20),
+            'low_mid': SortedWindow(20),
+            'mid': SortedWindow(20),
+            'high': SortedWindow(20),
+            'presence': SortedWindow(20)
         }
         
+        # Banc de filtres : les six bandes de classification, plus le découpage band_layout (nom dans
+        # audio/bands.json ou dict) pour des fixtures par bande ; toutes les bandes en un seul produit matriciel
+        self.frame_size = 2048
+        self.analysis_filterbank = FilterBank.from_ranges(self.sample_rate, self.frame_size, self.get_bands())
+        self.layout_filterbank = None
+        if band_layout is not None:
+            if isinstance(band_layout, str):
+                self.layout_filterbank = FilterBank.from_config(
+                    self.sample_rate, self.frame_size, load_band_layout(band_layout), prefix=band_layout
+                )
+            else:
+                self.layout_filterbank = FilterBank.from_config(self.sample_rate, self.frame_size, band_layout)
+            self.filterbank = FilterBank.concat(self.analysis_filterbank, self.layout_filterbank)
+        else:
+            self.filterbank = self.analysis_filterbank
+        self.latest_energies = {}  # Dernières énergies (dB) de toutes les bandes du banc
+        
+        # Intensité continue : niveau à court terme (~370 ms) des six bandes, pondéré comme l'énergie
+        # totale, relevé à chaque bloc d'audio et lissé par l'enveloppe attaque/relâchement lue au rendu
+        self.intensity_envelope = getattr(mainboard, "intensity_envelope", None) or IntensityEnvelope()
+        self.intensity_interval = 0.05   # Relevé du niveau à court terme (secondes)
+        self.intensity_frames = 16       # Trames (hop 512) du niveau à court terme
+        self.intensity_wake_samples = 1024
+        self.last_intensity_time = self.clock.now()
+        self.loudness = 0.0
+        self.loudness_history = SortedWindow(30)  # Niveaux relevés à chaque analyse : bornes de normalisation
+        self._intensity_sum = 0.0  # Somme et nombre des intensités relevées depuis la dernière analyse
+        self._intensity_count = 0
+        self.loudness_weights = np.zeros(len(self.filterbank), dtype=np.float32)
+        self.loudness_weights[:6] = [1.5, 2.0, 1.2, 1.0, 0.8, 0.6]
+        self.loudness_weights /= self.loudness_weights.sum()
+        
+        # Calcul des énergies par bande dans un processus séparé (audio en mémoire partagée) ;
+        # jamais en lecture hors-ligne, qui doit rester déterministe
+        self.use_process = use_process and (capture_hub is None or capture_hub.realtime)
+        if self.use_process:
+            self.audio_buffer = SharedRingBuffer(int(self.sample_rate * self.record_duration))
+            self.analysis_process = AnalysisProcess(
+                "EnergyDetector", self.audio_buffer, self.sample_rate,
+                {"energy": {"filterbank": self.filterbank, "interval": self.analysis_interval},
+                 "loudness": {"weights": self.loudness_weights, "frames": self.intensity_frames,
+                              "interval": self.intensity_interval}},
+            )
+        else:
+            self.audio_buffer = RingBuffer(int(self.sample_rate * self.record_duration))
+            self.analysis_process = None
+        # Énergies par bande calculées trame par trame et cumulées sur la durée du buffer
+        self.band_energies = RollingBandEnergies(self.filterbank, self.record_duration)
+        
         # Historique pour détecter les changements d'énergie globale
-        self.total_energy_history = deque(maxlen=10)
+        self.total_energy_history = SortedWindow(10)
         
         # Seuils pour classification (plus de niveaux)
         self.very_low_threshold = 20     # très faible
@@ -46,60 +103,104 @@ class EnergyDetector(threading.Thread):
         self.high_threshold = 80         # haute
         # Au-dessus = très haute
         
-        self._running = False
+        self._stop_event = threading.Event()
         self.audio_stream = None
         
-        # Dernières valeurs détectées (avec plus de niveaux)
+        # Dernières valeurs détectées (codes de niveau, voir audio/levels.py)
         self.current_levels = {
-            'sub_bass': 'très_faible',
-            'bass': 'très_faible',
-            'low_mid': 'très_faible',
-            'mid': 'très_faible', 
-            'high': 'très_faible',
-            'presence': 'très_faible',
-            'global_intensity': 'très_faible'
+            'sub_bass': VERY_LOW,
+            'bass': VERY_LOW,
+            'low_mid': VERY_LOW,
+            'mid': VERY_LOW, 
+            'high': VERY_LOW,
+            'presence': VERY_LOW,
+            'global_intensity': VERY_LOW
         }
         
         print("EnergyDetector initialized")
     
     def run(self):
         """Méthode principale du thread"""
-        self._running = True
         print("EnergyDetector thread started...")
         
         # Démarrer l'enregistrement audio
-        if self.input_device_index is not None:
+        if self.input_device_index is not None or self.capture_hub is not None:
             self.start_audio_recording()
         
-        while self._running:
-            current_time = time.time()
-            
-            # Analyse plus fréquente
-            if (current_time - self.last_analysis_time > self.analysis_interval and 
-                len(self.audio_buffer) > self.sample_rate * 1.0):  # Au moins 1 seconde d'audio
-                
-                self.last_analysis_time = current_time
-                self.analyze_frequency_bands()
-                
-            time.sleep(0.05)  # Plus réactif
+        while not self._stop_event.is_set():
+            self.tick(self.clock.now())
+            # Dort jusqu'au prochain bloc d'audio (intensité), à défaut jusqu'à la prochaine analyse
+            process = self.analysis_process
+            if process is not None:
+                process.wait(process.restart_delay)
+            else:
+                timeout = self.last_analysis_time + self.analysis_interval - self.clock.now()
+                if timeout <= 0:  # Analyse en attente de 1 s d'audio
+                    timeout = self.analysis_interval
+                self.audio_buffer.wait_for_samples(self.band_energies.position, self.intensity_wake_samples, timeout)
         
         print("EnergyDetector thread stopped.")
     
+    def tick(self, current_time):
+        """Traitements périodiques (boucle du thread, ou source audio hors-ligne)"""
+        if self.analysis_process is not None:
+            # Énergies calculées dans le processus séparé : on relève ses résultats
+            self.analysis_process.ensure_running()
+            for result in self.analysis_process.poll():
+                if result[0] == "energy":
+                    self.update_energy_levels(result[1])
+                elif result[0] == "loudness":
+                    self.update_intensity(result[1], current_time)
+            return
+        
+        # Trames de l'audio arrivé depuis le dernier tick (le relevé ne coûte alors qu'une opération par bande)
+        self.band_energies.update(self.audio_buffer)
+        if current_time - self.last_intensity_time >= self.intensity_interval:
+            self.last_intensity_time = current_time
+            self.update_intensity(
+                self.band_energies.recent_loudness(self.loudness_weights, self.intensity_frames), current_time
+            )
+        
+        # Analyse plus fréquente
+        if (current_time - self.last_analysis_time > self.analysis_interval and 
+            len(self.audio_buffer) > self.sample_rate * 1.0):  # Au moins 1 seconde d'audio
+            
+            self.last_analysis_time = current_time
+            self.analyze_frequency_bands()
+    
     def stop(self):
         """Arrête le thread proprement"""
+        self._stop_event.set()
+        self.audio_buffer.wake()
+        if self.audio_consumer is not None:
+            self.capture_hub.unregister(self.audio_consumer)
+            self.audio_consumer = None
         if self.audio_stream:
             self.audio_stream.stop()
             self.audio_stream.close()
-        self._running = False
+        if self.analysis_process is not None:
+            self.analysis_process.stop()
+            self.analysis_process = None
     
     def start_audio_recording(self):
         """Démarre l'enregistrement audio en arrière-plan"""
         def audio_callback(indata, frames, time, status):
             if status:
                 print(f"EnergyDetector audio status: {status}")
-            # Ajouter les nouvelles données au buffer circulaire
+            # Ajouter les nouvelles données au buffer circulaire, datées à la fin du bloc (horloge ADC)
             audio_data = indata[:, 0] if indata.ndim > 1 else indata  # Mono
-            self.audio_buffer.extend(audio_data)
+            self.audio_buffer.write(audio_data, time.inputBufferAdcTime + frames / self.sample_rate)
+        
+        if self.analysis_process is not None:
+            self.analysis_process.start()
+        
+        if self.capture_hub is not None:
+            # Flux partagé : le hub décime et redécoupe pour nous
+            self.audio_consumer = self.capture_hub.register(
+                audio_callback, sample_rate=self.sample_rate, block_size=512
+            )
+            print(f"EnergyDetector attached to shared capture ({self.sample_rate} Hz)")
+            return
         
         try:
             self.audio_stream = sd.InputStream(
@@ -107,7 +208,7 @@ class EnergyDetector(threading.Thread):
                 channels=1,
                 samplerate=self.sample_rate,
                 blocksize=512,  # Plus petit pour plus de réactivité
-                callback=audio_callback
+                callback=StreamTimeMapper(self.clock, self.sample_rate).wrap(audio_callback)
             )
             self.audio_stream.start()
             print(f"EnergyDetector audio recording started on device {self.input_device_index}")
@@ -116,90 +217,109 @@ class EnergyDetector(threading.Thread):
             self.audio_stream = None
     
     def analyze_frequency_bands(self):
-        """Analyse l'énergie dans les 3 bandes de fréquences"""
+        """Analyse l'énergie dans les bandes de fréquences"""
         try:
             if len(self.audio_buffer) < self.sample_rate:
                 return
             
-            # Convertir le buffer en array numpy
-            audio_array = np.array(list(self.audio_buffer), dtype=np.float32)
-            
-            # Calculer la FFT
-            fft = np.fft.rfft(audio_array * np.hanning(len(audio_array)))
-            magnitude = np.abs(fft)
-            freqs = np.fft.rfftfreq(len(audio_array), 1 / self.sample_rate)
-            
-            # Calculer l'énergie pour chaque bande
-            sub_bass_energy = self._calculate_band_energy(magnitude, freqs, *self.sub_bass_range)
-            bass_energy = self._calculate_band_energy(magnitude, freqs, *self.bass_range)
-            low_mid_energy = self._calculate_band_energy(magnitude, freqs, *self.low_mid_range)
-            mid_energy = self._calculate_band_energy(magnitude, freqs, *self.mid_range)
-            high_energy = self._calculate_band_energy(magnitude, freqs, *self.high_range)
-            presence_energy = self._calculate_band_energy(magnitude, freqs, *self.presence_range)
-            
-            # Calculer l'énergie totale pondérée (refrain vs couplet)
-            total_energy = (sub_bass_energy * 1.5 + bass_energy * 2.0 + 
-                          low_mid_energy * 1.2 + mid_energy * 1.0 + 
-                          high_energy * 0.8 + presence_energy * 0.6)
-            
-            # Ajouter à l'historique
-            self.energy_history['sub_bass'].append(sub_bass_energy)
-            self.energy_history['bass'].append(bass_energy)
-            self.energy_history['low_mid'].append(low_mid_energy)
-            self.energy_history['mid'].append(mid_energy)
-            self.energy_history['high'].append(high_energy)
-            self.energy_history['presence'].append(presence_energy)
-            self.total_energy_history.append(total_energy)
-            
-            # Classifier les niveaux avec 5 niveaux
-            sub_bass_level = self._classify_energy_level_detailed('sub_bass', sub_bass_energy)
-            bass_level = self._classify_energy_level_detailed('bass', bass_energy)
-            low_mid_level = self._classify_energy_level_detailed('low_mid', low_mid_energy)
-            mid_level = self._classify_energy_level_detailed('mid', mid_energy)
-            high_level = self._classify_energy_level_detailed('high', high_energy)
-            presence_level = self._classify_energy_level_detailed('presence', presence_energy)
-            
-            # Classifier l'intensité globale (refrain vs couplet)
-            global_intensity = self._classify_global_intensity(total_energy)
-            
-            # Stocker les niveaux actuels
-            self.current_levels = {
-                'sub_bass': sub_bass_level,
-                'bass': bass_level,
-                'low_mid': low_mid_level,
-                'mid': mid_level,
-                'high': high_level,
-                'presence': presence_level,
-                'global_intensity': global_intensity
-            }
-            
-            #print(f"Energy: Sub={sub_bass_level[:1]}, Bass={bass_level[:1]}, LMid={low_mid_level[:1]}, "
-            #      f"Mid={mid_level[:1]}, High={high_level[:1]}, Pres={presence_level[:1]}, "
-            #      f"Global={global_intensity}")
-            
-            # Envoyer au mainboard
-            self.send_energy_levels_to_mainboard()
+            self.band_energies.update(self.audio_buffer)
+            self.update_energy_levels(self.band_energies.energies())
             
         except Exception as e:
             print(f"Error in frequency band analysis: {e}")
     
-    def _calculate_band_energy(self, magnitude, freqs, low_freq, high_freq):
-        """Calcule l'énergie dans une bande de fréquences donnée"""
-        band_mask = (freqs >= low_freq) & (freqs <= high_freq)
-        band_energy = np.sum(magnitude[band_mask] ** 2)
-        
-        # Normalisation logarithmique pour une meilleure plage dynamique
-        if band_energy > 0:
-            return np.log10(band_energy + 1) * 10
-        return 0
+    def get_bands(self):
+        """Bandes analysées : nom -> (fréquence basse, fréquence haute)"""
+        return {
+            'sub_bass': self.sub_bass_range,
+            'bass': self.bass_range,
+            'low_mid': self.low_mid_range,
+            'mid': self.mid_range,
+            'high': self.high_range,
+            'presence': self.presence_range,
+        }
+    
+    def update_energy_levels(self, energies):
+        """Classe les énergies par bande (calculées ici ou dans le processus d'analyse) et les envoie"""
+        self.latest_energies = energies
+        sub_bass_energy = energies['sub_bass']
+        bass_energy = energies['bass']
+        low_mid_energy = energies['low_mid']
+        mid_energy = energies['mid']
+        high_energy = energies['high']
+        presence_energy = energies['presence']
+        
+        # Calculer l'énergie totale pondérée (refrain vs couplet)
+        total_energy = (sub_bass_energy * 1.5 + bass_energy * 2.0 + 
+                      low_mid_energy * 1.2 + mid_energy * 1.0 + 
+                      high_energy * 0.8 + presence_energy * 0.6)
+        
+        # Ajouter à l'historique
+        self.energy_history['sub_bass'].push(sub_bass_energy)
+        self.energy_history['bass'].push(bass_energy)
+        self.energy_history['low_mid'].push(low_mid_energy)
+        self.energy_history['mid'].push(mid_energy)
+        self.energy_history['high'].push(high_energy)
+        self.energy_history['presence'].push(presence_energy)
+        self.total_energy_history.push(total_energy)
+        
+        # Classifier les niveaux avec 5 niveaux
+        sub_bass_level = self._classify_energy_level_detailed('sub_bass', sub_bass_energy)
+        bass_level = self._classify_energy_level_detailed('bass', bass_energy)
+        low_mid_level = self._classify_energy_level_detailed('low_mid', low_mid_energy)
+        mid_level = self._classify_energy_level_detailed('mid', mid_energy)
+        high_level = self._classify_energy_level_detailed('high', high_energy)
+        presence_level = self._classify_energy_level_detailed('presence', presence_energy)
+        
+        # Classifier l'intensité globale (refrain vs couplet) : hors silence, niveau tiré de l'intensité continue
+        global_intensity = self._classify_global_intensity(total_energy)
+        self.loudness_history.push(self.loudness)
+        if global_intensity != VERY_LOW and self._intensity_count:
+            # Moyenne sur l'intervalle d'analyse : pas de bascule de thème sur un seul kick
+            global_intensity = level_from_intensity(self._intensity_sum / self._intensity_count)
+        self._intensity_sum = 0.0
+        self._intensity_count = 0
+        
+        # Stocker les niveaux actuels
+        self.current_levels = {
+            'sub_bass': sub_bass_level,
+            'bass': bass_level,
+            'low_mid': low_mid_level,
+            'mid': mid_level,
+            'high': high_level,
+            'presence': presence_level,
+            'global_intensity': global_intensity
+        }
+        
+        #print(f"Energy: Sub={sub_bass_level}, Bass={bass_level}, LMid={low_mid_level}, "
+        #      f"Mid={mid_level}, High={high_level}, Pres={presence_level}, "
+        #      f"Global={global_intensity}")
+        
+        # Envoyer au mainboard
+        self.send_energy_levels_to_mainboard()
+    
+    def update_intensity(self, loudness, now):
+        """
+        Nouveau niveau à court terme : la cible de l'enveloppe est sa position entre les
+        percentiles 10 et 90 des niveaux récents (pleine intensité tant que l'historique est court)
+        """
+        self.loudness = loudness
+        history = self.loudness_history
+        if len(history) < 8:
+            return
+        low = history.percentile(10)
+        high = max(history.percentile(90), low + 3.0)  # Au moins 3 dB de dynamique
+        self.intensity_envelope.set_target((loudness - low) / (high - low), now)
+        self._intensity_sum += self.intensity_envelope.value(now)
+        self._intensity_count += 1
     
     def _classify_energy_level_detailed(self, band_name, current_energy):
-        """Classifie le niveau d'énergie avec 5 niveaux"""
-        history = list(self.energy_history[band_name])
+        """Classifie le niveau d'énergie avec 5 niveaux (code VERY_LOW à VERY_HIGH)"""
+        history = self.energy_history[band_name]
         
-        # Seuils fixes absolus BEAUCOUP plus stricts pour "très_faible"
+        # Seuils fixes absolus BEAUCOUP plus stricts pour "très faible"
         absolute_thresholds = {
-            'sub_bass': [2, 8, 20, 40],      # très_faible (quasi silence), faible, moyenne, haute
+            'sub_bass': [2, 8, 20, 40],      # très faible (quasi silence), faible, moyenne, haute
             'bass': [3, 12, 25, 50],
             'low_mid': [4, 15, 30, 60],
             'mid': [5, 18, 35, 70],
@@ -212,70 +332,68 @@ class EnergyDetector(threading.Thread):
         if len(history) < 8:  
             # Utiliser les seuils fixes absolus
             if current_energy <= thresholds[0]:  # Changé < en <= pour inclure exactement le seuil
-                return 'très_faible'
+                return VERY_LOW
             elif current_energy <= thresholds[1]:
-                return 'faible'
+                return LOW
             elif current_energy <= thresholds[2]:
-                return 'moyenne'
+                return MEDIUM
             elif current_energy <= thresholds[3]:
-                return 'haute'
+                return HIGH
             else:
-                return 'très_haute'
+                return VERY_HIGH
         
         # Avec assez d'historique, utiliser des seuils adaptatifs MAIS avec des minimums STRICTS
-        very_low_p = max(np.percentile(history, self.very_low_threshold), thresholds[0])
-        low_p = max(np.percentile(history, self.low_threshold), thresholds[1])
-        medium_p = max(np.percentile(history, self.medium_threshold), thresholds[2])
-        high_p = max(np.percentile(history, self.high_threshold), thresholds[3])
-        
-        # Forcer "très_faible" uniquement pour de vraies valeurs très basses
-        if current_energy <= thresholds[0]:  # Force "très_faible" si en dessous du seuil absolu
-            return 'très_faible'
+        low_p = max(history.percentile(self.low_threshold), thresholds[1])
+        medium_p = max(history.percentile(self.medium_threshold), thresholds[2])
+        high_p = max(history.percentile(self.high_threshold), thresholds[3])
+        
+        # Forcer "très faible" uniquement pour de vraies valeurs très basses
+        if current_energy <= thresholds[0]:  # Force "très faible" si en dessous du seuil absolu
+            return VERY_LOW
         elif current_energy <= low_p:
-            return 'faible'
+            return LOW
         elif current_energy <= medium_p:
-            return 'moyenne'
+            return MEDIUM
         elif current_energy <= high_p:
-            return 'haute'
+            return HIGH
         else:
-            return 'très_haute'
+            return VERY_HIGH
     
     def _classify_global_intensity(self, total_energy):
-        """Classifie l'intensité globale pour détecter refrain vs couplet"""
-        history = list(self.total_energy_history)
+        """Classifie l'intensité globale pour détecter refrain vs couplet (code VERY_LOW à VERY_HIGH)"""
+        history = self.total_energy_history
         
-        # Seuils fixes absolus BEAUCOUP plus stricts pour "très_faible"
-        absolute_thresholds = [15, 60, 150, 350]  # très_faible (quasi silence), faible, moyenne, haute
+        # Seuils fixes absolus BEAUCOUP plus stricts pour "très faible"
+        absolute_thresholds = [15, 60, 150, 350]  # très faible (quasi silence), faible, moyenne, haute
         
         if len(history) < 8:  
             if total_energy <= absolute_thresholds[0]:  # Vraiment très faible
-                return 'très_faible'
+                return VERY_LOW
             elif total_energy <= absolute_thresholds[1]:
-                return 'faible'
+                return LOW
             elif total_energy <= absolute_thresholds[2]:
-                return 'moyenne'
+                return MEDIUM
             elif total_energy <= absolute_thresholds[3]:
-                return 'haute'
+                return HIGH
             else:
-                return 'très_haute'
+                return VERY_HIGH
         
         # Seuils adaptatifs avec des minimums de sécurité STRICTS
-        very_low_p = max(np.percentile(history, 10), absolute_thresholds[0])  # Percentile plus bas (10 au lieu de 15)
-        low_p = max(np.percentile(history, 30), absolute_thresholds[1])       # Percentile plus bas (30 au lieu de 35)
-        medium_p = max(np.percentile(history, 50), absolute_thresholds[2])    # Percentile plus bas (50 au lieu de 55)
-        high_p = max(np.percentile(history, 70), absolute_thresholds[3])      # Percentile plus bas (70 au lieu de 75)
-        
-        # Forcer "très_faible" uniquement pour de vraies valeurs très basses
-        if total_energy <= absolute_thresholds[0]:  # Force "très_faible" si vraiment très bas
-            return 'très_faible'
+        low_p = max(history.percentile(30), absolute_thresholds[1])       # Percentile plus bas (30 au lieu de 35)
+        medium_p = max(history.percentile(50), absolute_thresholds[2])    # Percentile plus bas (50 au lieu de 55)
+        high_p = max(history.percentile(70), absolute_thresholds[3])      # Percentile plus bas (70 au lieu de 75)
+        
+        # Forcer "très faible" uniquement pour de vraies valeurs très basses
+        if total_energy <= absolute_thresholds[0]:  # Force "très faible" si vraiment très bas
+            return VERY_LOW
         elif total_energy <= low_p:
-            return 'faible'
+            return LOW
         elif total_energy <= medium_p:
-            return 'moyenne'
+            return MEDIUM
         elif total_energy <= high_p:
-            return 'haute'
+            return HIGH
         else:
-            return 'très_haute'
+            return VERY_HIGH
     
     def send_energy_levels_to_mainboard(self):
         """Envoie les niveaux d'énergie au mainboard"""
@@ -288,6 +406,11 @@ class EnergyDetector(threading.Thread):
         except Exception as e:
             print(f"Error sending energy levels to mainboard: {e}")
     
+    def get_band_energies(self):
+        """Énergies (dB) des bandes de band_layout (à défaut, des six bandes) à la dernière analyse"""
+        bank = self.layout_filterbank if self.layout_filterbank is not None else self.analysis_filterbank
+        return {name: self.latest_energies.get(name, 0) for name in bank.names}
+    
     def get_current_levels(self):
         """Retourne les niveaux d'énergie actuels"""
         return self.current_levels.copy()
@@ -295,5 +418,5 @@ class EnergyDetector(threading.Thread):
     def get_energy_history(self):
         """Retourne l'historique des énergies pour debug/monitoring"""
         return {
-            band: list(history) for band, history in self.energy_history.items()
+            band: history.values() for band, history in self.energy_history.items()
         }
\ No newline at end of file
@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+import wave
+import numpy as np
+import scipy.signal
+from audio.capture import AudioCaptureHub
+from audio.clock import SimulatedClock
+
+
+class StreamResampler:
+    """
+    Rééchantillonnage polyphase (facteur up/down rationnel) bloc par bloc, avec le même filtre
+    que scipy.signal.resample_poly (FIR Kaiser, retard compensé) ; l'historique du filtre est
+    conservé d'un bloc à l'autre, donc aucune discontinuité aux frontières de blocs.
+    """
+    def __init__(self, up, down, half_taps=10):
+        divisor = math.gcd(up, down)
+        self.up = up // divisor
+        self.down = down // divisor
+        max_rate = max(self.up, self.down)
+        taps = scipy.signal.firwin(2 * half_taps * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * self.up
+        self._delay = (len(taps) - 1) // 2   # Retard du filtre, en échantillons suréchantillonnés
+        # Filtre polyphase : ligne p = coefficients appliqués aux entrées pour la phase p
+        self._taps_per_phase = -(-len(taps) // self.up)
+        padded = np.zeros(self._taps_per_phase * self.up)
+        padded[:len(taps)] = taps
+        self._polyphase = padded.reshape(self._taps_per_phase, self.up).T.astype(np.float32)
+        self._history = np.zeros(self._taps_per_phase - 1, dtype=np.float32)
+        self._inputs = 0    # Échantillons d'entrée reçus
+        self._outputs = 0   # Échantillons de sortie produits
+
+    def process(self, samples):
+        """Échantillons d'entrée -> échantillons de sortie disponibles (le filtre attend un peu d'avance)"""
+        buffer = np.concatenate([self._history, samples])
+        first_input = self._inputs - len(self._history)   # Indice d'entrée de buffer[0]
+        total = self._inputs + len(samples)
+        # Sortie n : position n*down + delay sur la grille suréchantillonnée, entrée de base // up
+        end = (total * self.up - 1 - self._delay) // self.down + 1
+        positions = np.arange(self._outputs, max(end, self._outputs)) * self.down + self._delay
+        base = positions // self.up - first_input
+        indices = base[:, None] - np.arange(self._taps_per_phase)[None, :]
+        output = np.einsum('ij,ij->i', self._polyphase[positions % self.up], buffer[indices])
+        self._history = buffer[len(buffer) - len(self._history):]
+        self._inputs = total
+        self._outputs += len(positions)
+        return output.astype(np.float32)
+
+
+class FileAudioSource(AudioCaptureHub):
+    """
+    Source audio hors-ligne (WAV ou PCM brut) qui remplace la carte son :
+    - lit le fichier bloc par bloc (pas de chargement complet en mémoire)
+    - pousse chaque bloc dans les mêmes callbacks que la capture live
+    - fait avancer une horloge simulée à partir de la position dans le fichier
+    - appelle les "tickers" (tâches périodiques des analyseurs) après chaque bloc
+    - speed=None : aussi vite que le CPU le permet ; speed=N : N fois le temps réel
+    - rééchantillonne à pipeline_rate si le fichier a une autre fréquence (48 kHz...) : les
+      analyseurs (22050 / 44100 Hz) exigent un diviseur entier de la fréquence du hub
+    """
+    RAW_FORMATS = {
+        'int16': (np.int16, 32768.0),
+        'int32': (np.int32, 2147483648.0),
+        'float32': (np.float32, 1.0),
+    }
+
+    def __init__(
+        self,
+        path,
+        block_size=256,
+        speed=None,
+        start_time=0.0,
+        sample_rate=44100,       # Utilisé uniquement pour le PCM brut
+        channels=1,              # Utilisé uniquement pour le PCM brut
+        sample_format='int16',   # Utilisé uniquement pour le PCM brut
+        pipeline_rate=44100,     # Fréquence du hub (celle de la capture live)
+    ):
+        super().__init__(input_device_index=None, sample_rate=pipeline_rate, block_size=block_size)
+        self.path = path
+        self.speed = speed
+        self.start_time = start_time
+        self.channels = channels
+        self.sample_format = sample_format
+        self.file_sample_rate = sample_rate
+        self.is_wav = path.lower().endswith('.wav')
+        if self.is_wav:
+            with wave.open(path, 'rb') as wav:
+                self.file_sample_rate = wav.getframerate()
+                self.channels = wav.getnchannels()
+        elif sample_format not in self.RAW_FORMATS:
+            raise ValueError(f"Unsupported raw sample format: {sample_format}")
+        self._resampler_factors = None
+        if self.file_sample_rate != pipeline_rate:
+            self._resampler_factors = (pipeline_rate, self.file_sample_rate)
+
+        self.clock = SimulatedClock(start_time)
+        self.realtime = False
+        self.frames_read = 0
+        self._tickers = ()
+        self._thread = None
+
+    def add_ticker(self, tick):
+        """Ajoute une tâche périodique appelée après chaque bloc avec l'heure simulée"""
+        self._tickers = self._tickers + (tick,)
+
+    def start(self):
+        """Lance la lecture dans un thread (voir run() pour une lecture bloquante)"""
+        if self._running:
+            return
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        """Lit tout le fichier et retourne quand il est terminé (ou stop())"""
+        self._running = True
+        self.frames_read = 0
+        wall_start = time.perf_counter()
+        print(f"FileAudioSource playing {self.path} ({self.file_sample_rate} Hz"
+              f"{f' -> {self.sample_rate} Hz' if self._resampler_factors else ''}, speed={self.speed or 'max'})")
+        try:
+            for block in self._pipeline_blocks():
+                if not self._running:
+                    break
+                adc_time = self.start_time + self.frames_read / self.sample_rate
+                self.frames_read += len(block)
+                # Le callback live est appelé quand le bloc est complet : l'horloge est à la fin du bloc
+                self.clock.set(self.start_time + self.frames_read / self.sample_rate)
+                self._dispatch(block, adc_time, self.clock.now(), None)
+                for tick in self._tickers:
+                    tick(self.clock.now())
+
+                if self.speed:
+                    target = wall_start + (self.frames_read / self.sample_rate) / self.speed
+                    delay = target - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            self._running = False
+        elapsed = time.perf_counter() - wall_start
+        duration = self.frames_read / self.sample_rate
+        print(f"FileAudioSource done: {duration:.1f}s of audio in {elapsed:.1f}s "
+              f"({duration / max(elapsed, 1e-9):.1f}x real time)")
+
+    def read_all(self):
+        """Fichier entier en mono float32 à la fréquence du pipeline (self.sample_rate), sans lecture simulée"""
+        blocks = list(self._pipeline_blocks())
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+    def _pipeline_blocks(self):
+        """Blocs mono float32 rééchantillonnés à la fréquence du pipeline (blocs vides sautés)"""
+        resampler = StreamResampler(*self._resampler_factors) if self._resampler_factors else None
+        for block in self._read_blocks():
+            if resampler is not None:
+                block = resampler.process(block)
+                if len(block) == 0:
+                    continue
+            yield block
+
+    def _read_blocks(self):
+        """Générateur de blocs mono float32 à la fréquence du fichier"""
+        if self.is_wav:
+            with wave.open(self.path, 'rb') as wav:
+                width = wav.getsampwidth()
+                while True:
+                    raw = wav.readframes(self.block_size)
+                    if not raw:
+                        return
+                    yield self._to_mono(self._decode_wav(raw, width))
+        else:
+            dtype, scale = self.RAW_FORMATS[self.sample_format]
+            frame_bytes = np.dtype(dtype).itemsize * self.channels
+            with open(self.path, 'rb') as f:
+                while True:
+                    raw = f.read(self.block_size * frame_bytes)
+                    if len(raw) < frame_bytes:
+                        return
+                    raw = raw[:len(raw) - len(raw) % frame_bytes]
+                    samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / scale
+                    yield self._to_mono(samples)
+
+    def _decode_wav(self, raw, width):
+        if width == 1:
+            return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        if width == 2:
+            return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        if width == 3:
+            b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+            ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+            return ints.astype(np.float32) / 8388608.0
+        if width == 4:
+            return np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+
+    def _to_mono(self, samples):
+        if self.channels > 1:
+            return samples.reshape(-1, self.channels).mean(axis=1).astype(np.float32)
+        return samples
@@ -0,0 +1,132 @@
+import json
+import os
+import numpy as np
+
+BAND_LAYOUTS_PATH = os.path.join(os.path.dirname(__file__), "bands.json")
+
+
+def _hz_to_mel(freq):
+    return 2595.0 * np.log10(1.0 + np.asarray(freq, dtype=np.float64) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel, dtype=np.float64) / 2595.0) - 1.0)
+
+
+def band_edges(n_points, min_freq, max_freq, scale="log"):
+    """n_points fréquences de min_freq à max_freq, espacées en linéaire, log ou mel"""
+    if scale == "linear":
+        return np.linspace(min_freq, max_freq, n_points)
+    if scale == "log":
+        return np.geomspace(min_freq, max_freq, n_points)
+    if scale == "mel":
+        return _mel_to_hz(np.linspace(_hz_to_mel(min_freq), _hz_to_mel(max_freq), n_points))
+    raise ValueError(f"Unknown band scale: {scale}")
+
+
+def load_band_layout(name, path=BAND_LAYOUTS_PATH):
+    """Découpage en bandes nommé, lu dans audio/bands.json"""
+    with open(path, 'r') as f:
+        layouts = json.load(f)
+    if name not in layouts:
+        raise ValueError(f"Unknown band layout: {name}")
+    return layouts[name]
+
+
+class FilterBank:
+    """
+    Banc de filtres précalculé pour une FFT de frame_size points : matrice de poids
+    (bins x bandes), toutes les énergies de bande sortent d'un seul produit puissance @ weights.
+    - bandes rectangulaires : poids corrigés de la largeur réelle des bins, l'énergie d'une bande
+      ne dépend donc pas de la résolution de la FFT
+    - bandes triangulaires : poids de 0 à 1 au centre, les triangles voisins se recouvrent
+      et leur somme vaut 1 (toute l'énergie entre la première et la dernière bande est comptée)
+    """
+    def __init__(self, sample_rate, frame_size, names, weights):
+        if len(set(names)) != len(names):
+            raise ValueError("Band names must be unique")
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.names = list(names)
+        self.weights = np.asarray(weights, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def apply(self, power):
+        """Énergies de bande d'un spectre de puissance (ou d'un lot de trames : trames x bins)"""
+        return power @ self.weights
+
+    @classmethod
+    def from_ranges(cls, sample_rate, frame_size, ranges, shape="rectangular"):
+        """ranges : dict nom -> (fréquence basse, fréquence haute)"""
+        freqs = np.fft.rfftfreq(frame_size, 1 / sample_rate)
+        weights = np.zeros((len(freqs), len(ranges)), dtype=np.float32)
+        for column, (low_freq, high_freq) in enumerate(ranges.values()):
+            weights[:, column] = cls._band_weights(freqs, sample_rate, frame_size, low_freq, high_freq, shape)
+        return cls(sample_rate, frame_size, list(ranges), weights)
+
+    @classmethod
+    def spaced(cls, sample_rate, frame_size, n_bands, scale="log", min_freq=40.0, max_freq=None,
+               shape="triangular", prefix="band"):
+        """n_bands bandes contiguës de min_freq à max_freq (Nyquist par défaut), noms prefix_0, prefix_1..."""
+        max_freq = min(max_freq or sample_rate / 2, sample_rate / 2)
+        freqs = np.fft.rfftfreq(frame_size, 1 / sample_rate)
+        weights = np.zeros((len(freqs), n_bands), dtype=np.float32)
+        if shape == "triangular":
+            # Bande i : de edges[i] à edges[i + 2], sommet en edges[i + 1]
+            edges = band_edges(n_bands + 2, min_freq, max_freq, scale)
+            for band in range(n_bands):
+                low, center, high = edges[band:band + 3]
+                rising = (freqs - low) / (center - low)
+                falling = (high - freqs) / (high - center)
+                weights[:, band] = np.maximum(0.0, np.minimum(rising, falling))
+                if not weights[:, band].any():
+                    # Bande plus étroite qu'un bin : on prend le bin le plus proche du centre
+                    weights[np.argmin(np.abs(freqs - center)), band] = 1.0
+        else:
+            edges = band_edges(n_bands + 1, min_freq, max_freq, scale)
+            for band in range(n_bands):
+                weights[:, band] = cls._band_weights(freqs, sample_rate, frame_size, edges[band], edges[band + 1], shape)
+        return cls(sample_rate, frame_size, [f"{prefix}_{band}" for band in range(n_bands)], weights)
+
+    @classmethod
+    def from_config(cls, sample_rate, frame_size, config, prefix="band"):
+        """
+        Banc décrit par un dict (entrée de audio/bands.json), soit des plages explicites :
+          {"ranges": {"bass": [60, 250], ...}, "shape": "rectangular"}
+        soit des bandes régulières :
+          {"n_bands": 16, "scale": "log", "min_freq": 40, "max_freq": 11000, "shape": "triangular"}
+        """
+        if "ranges" in config:
+            return cls.from_ranges(sample_rate, frame_size, config["ranges"], config.get("shape", "rectangular"))
+        return cls.spaced(
+            sample_rate, frame_size, config["n_bands"], config.get("scale", "log"),
+            config.get("min_freq", 40.0), config.get("max_freq"), config.get("shape", "triangular"), prefix,
+        )
+
+    @classmethod
+    def concat(cls, *banks):
+        """Un seul banc (un seul produit matriciel) à partir de plusieurs bancs sur la même FFT"""
+        first = banks[0]
+        for bank in banks[1:]:
+            if (bank.sample_rate, bank.frame_size) != (first.sample_rate, first.frame_size):
+                raise ValueError("Filter banks must share sample rate and frame size")
+        names = [name for bank in banks for name in bank.names]
+        return cls(first.sample_rate, first.frame_size, names, np.hstack([bank.weights for bank in banks]))
+
+    @staticmethod
+    def _band_weights(freqs, sample_rate, frame_size, low_freq, high_freq, shape):
+        """Poids d'une bande de low_freq à high_freq sur les bins freqs"""
+        if shape == "triangular":
+            center = (low_freq + high_freq) / 2
+            return np.maximum(0.0, 1.0 - np.abs(freqs - center) / ((high_freq - low_freq) / 2))
+        if shape != "rectangular":
+            raise ValueError(f"Unknown band shape: {shape}")
+        in_band = (freqs >= low_freq) & (freqs <= high_freq)
+        weights = np.zeros(len(freqs), dtype=np.float32)
+        if in_band.any():
+            # Largeur réelle (bornée à Nyquist) / largeur couverte par les bins
+            width = min(high_freq, sample_rate / 2) - low_freq
+            weights[in_band] = width / (in_band.sum() * sample_rate / frame_size)
+        return weights
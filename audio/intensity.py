@@ -0,0 +1,31 @@
+import math
+
+
+class IntensityEnvelope:
+    """
+    Intensité lumineuse continue (0-1) à attaque rapide et relâchement lent :
+    - l'analyse fixe une cible (set_target) à chaque nouveau bloc d'audio
+    - le rendu lit value(now) à chaque image : la valeur rejoint la cible de façon
+      exponentielle (constante attack en montée, release en descente), sans marche
+    État publié en un seul tuple : lecture sans verrou depuis le thread de rendu.
+    """
+    def __init__(self, attack=0.05, release=0.8, initial=1.0):
+        self.attack = attack
+        self.release = release
+        # (valeur à l'instant t, cible, t)
+        self._state = (initial, initial, None)
+
+    def value(self, now):
+        value, target, time = self._state
+        if time is None or now <= time:
+            return value
+        tau = self.attack if target > value else self.release
+        return target + (value - target) * math.exp(-(now - time) / tau)
+
+    def set_target(self, target, now):
+        """Nouvelle cible à partir de now (la valeur courante est conservée : pas de saut)"""
+        self._state = (self.value(now), min(max(target, 0.0), 1.0), now)
+
+    @property
+    def target(self):
+        return self._state[1]
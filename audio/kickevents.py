@@ -0,0 +1,73 @@
+import numpy as np
+from audio.windowstats import StreamingMedian
+
+
+class KickEventStore:
+    """
+    Kicks des keep_seconds dernières secondes dans un tableau circulaire préalloué :
+    - ajout et expiration en O(1) (on avance l'indice du plus ancien, pas de pop(0) sur une liste)
+    - médiane glissante des intervalles entre kicks consécutifs valides (min_interval à max_interval),
+      mise à jour à chaque kick ; un intervalle sort de la fenêtre avec le kick qui l'ouvre
+    """
+    def __init__(self, keep_seconds=10.0, capacity=256, min_interval=0.2, max_interval=2.0):
+        self.keep_seconds = keep_seconds
+        self.capacity = int(capacity)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._times = np.zeros(self.capacity, dtype=np.float64)
+        # Vrai si l'intervalle qui commence à ce kick est valide (donc présent dans la médiane)
+        self._opens_interval = np.zeros(self.capacity, dtype=bool)
+        self._head = 0   # Indice du plus ancien kick
+        self._count = 0
+        self.intervals = StreamingMedian()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """Accès par position chronologique (index négatif depuis le plus récent)"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("kick index out of range")
+        return float(self._times[(self._head + index) % self.capacity])
+
+    def append(self, timestamp):
+        """Ajoute un kick, expire ceux de plus de keep_seconds ; retourne True si un intervalle valide a été ajouté"""
+        while self._count and (timestamp - self._times[self._head] > self.keep_seconds
+                               or self._count == self.capacity):
+            self._expire_oldest()
+
+        added = False
+        if self._count:
+            last = (self._head + self._count - 1) % self.capacity
+            interval = timestamp - self._times[last]
+            if self.min_interval < interval < self.max_interval:
+                self.intervals.push(interval)
+                self._opens_interval[last] = True
+                added = True
+        slot = (self._head + self._count) % self.capacity
+        self._times[slot] = timestamp
+        self._opens_interval[slot] = False
+        self._count += 1
+        return added
+
+    def _expire_oldest(self):
+        if self._opens_interval[self._head]:
+            self.intervals.pop_oldest()
+        self._head = (self._head + 1) % self.capacity
+        self._count -= 1
+
+    def median_interval(self):
+        """Médiane des intervalles valides de la fenêtre (0 sans intervalle)"""
+        return self.intervals.median()
+
+    def timestamps(self):
+        """Copie chronologique des kicks (affichage, tests hors-ligne)"""
+        index = (self._head + np.arange(self._count)) % self.capacity
+        return self._times[index]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self.intervals.clear()
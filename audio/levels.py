@@ -0,0 +1,33 @@
+"""
+Niveaux d'énergie de l'EnergyDetector, en codes entiers (du plus calme au plus fort) :
+le MainBoard s'en sert directement comme scores, sans table de correspondance.
+"""
+VERY_LOW = 1
+LOW = 2
+MEDIUM = 3
+HIGH = 4
+VERY_HIGH = 5
+
+LEVEL_NAMES = {
+    VERY_LOW: "très_faible",
+    LOW: "faible",
+    MEDIUM: "moyenne",
+    HIGH: "haute",
+    VERY_HIGH: "très_haute",
+}
+
+
+def level_name(level):
+    """Nom lisible d'un code de niveau (affichage, logs)"""
+    return LEVEL_NAMES.get(level, str(level))
+
+
+def level_from_intensity(intensity):
+    """Niveau (LOW à VERY_HIGH) d'une intensité continue 0-1 ; VERY_LOW reste réservé au silence"""
+    if intensity < 0.25:
+        return LOW
+    elif intensity < 0.5:
+        return MEDIUM
+    elif intensity < 0.75:
+        return HIGH
+    return VERY_HIGH
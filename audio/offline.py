@@ -0,0 +1,63 @@
+import argparse
+import random
+from audio.filesource import FileAudioSource
+from audio.beatcalculator import BeatCalculator
+from audio.energydetector import EnergyDetector
+from audio.levels import level_name
+from kickdetector.kickdetector import KickDetector
+from mainboard.mainboard import MainBoard
+
+
+def replay(path, speed=None, seed=0, kick_params=None, **source_params):
+    """
+    Rejoue un enregistrement dans toute la chaîne d'analyse (kick, BPM, énergie)
+    sous une horloge simulée. Avec la même graine et le même fichier, le résultat
+    est identique d'une exécution à l'autre.
+    """
+    random.seed(seed)  # Les choix de thème/style aléatoires deviennent reproductibles
+    source = FileAudioSource(path, speed=speed, **source_params)
+    mainboard = MainBoard(p_theme="random", p_style="random", clock=source.clock)
+
+    beatCalculator = BeatCalculator(mainboard, capture_hub=source)
+    energyDetector = EnergyDetector(mainboard, capture_hub=source)
+    kd = KickDetector(
+        mainboard=mainboard,
+        beatCalculator=beatCalculator,
+        input_device_index=None,
+        capture_hub=source,
+        **{"debug": False, **(kick_params or {})}
+    )
+
+    # Pas de threads d'analyse : la source appelle directement les callbacks et les ticks
+    beatCalculator.start_audio_recording()
+    energyDetector.start_audio_recording()
+    kd.start_audio_recording()
+    source.add_ticker(beatCalculator.tick)
+    source.add_ticker(energyDetector.tick)
+    source.add_ticker(lambda now: mainboard.update_board())
+
+    source.run()
+    return mainboard, beatCalculator, energyDetector, kd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue un fichier audio dans la chaîne d'analyse")
+    parser.add_argument("path", help="Fichier WAV ou PCM brut")
+    parser.add_argument("--speed", type=float, default=None, help="Multiplicateur de vitesse (défaut : max)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate", type=int, default=44100, help="Fréquence du PCM brut")
+    parser.add_argument("--channels", type=int, default=1, help="Canaux du PCM brut")
+    parser.add_argument("--format", default="int16", help="Format du PCM brut (int16, int32, float32)")
+    args = parser.parse_args()
+
+    _, beatCalculator, energyDetector, _ = replay(
+        args.path,
+        speed=args.speed,
+        seed=args.seed,
+        sample_rate=args.rate,
+        channels=args.channels,
+        sample_format=args.format,
+    )
+    print(f"Final BPM: {beatCalculator.beat_per_minute_finale}")
+    levels = {band: level_name(level) for band, level in energyDetector.get_current_levels().items()}
+    print(f"Final energy levels: {levels}")
@@ -0,0 +1,120 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class OnsetEnvelopeCache:
+    """
+    Cache glissant de l'enveloppe d'onset, identique à librosa.onset.onset_strength
+    (réglages par défaut) sur la même fenêtre d'audio. Les spectres mel (dB, avant
+    plancher) sont indexés par position absolue dans le flux : la trame k est centrée
+    sur l'échantillon k * hop_length du compteur total_written du RingBuffer, et n'est
+    calculée qu'une fois, à l'arrivée de son audio.
+
+    La fenêtre analysée commence et finit sur cette grille (jusqu'à un hop de l'audio le
+    plus récent attend l'analyse suivante). À la lecture, seules les 2 trames de chaque
+    bord, que onset_strength complète par des zéros (center=True), sont recalculées ; le
+    plancher top_db, le flux (lag 1, moyenne sur les bandes) et les 3 trames nulles de
+    tête sont appliqués comme dans librosa. Voir audio.onsetcheck pour la vérification.
+    """
+    def __init__(self, sample_rate=22050, capacity_seconds=5.0, hop_length=512, n_fft=2048, n_mels=128,
+                 mel_basis=None, top_db=80.0):
+        self.sample_rate = sample_rate
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        if mel_basis is None:
+            import librosa  # Import différé : seul le moteur librosa utilise ce cache
+            mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels)
+        self._mel_basis = np.asarray(mel_basis, dtype=np.float32)
+        self._window = np.hanning(n_fft + 1)[:-1].astype(np.float32)  # Hann périodique (comme librosa)
+        self.top_db = top_db
+
+        # Spectres mel (dB) des trames intérieures d'une fenêtre de capacity_seconds
+        self.capacity = int(np.ceil(capacity_seconds * sample_rate / hop_length)) + 2
+        self._mel_db = np.zeros((self.capacity, self._mel_basis.shape[0]), dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)  # Échantillons à partir du début de la prochaine trame
+        self.frames_computed = 0  # Compteur (mesure du travail évité)
+        self.reset()
+
+    def reset(self):
+        self._pending = self._pending[:0]
+        self._next_frame = self._first_complete_frame(0)  # Index absolu de la prochaine trame à calculer
+        self._first_frame = self._next_frame               # Plus ancienne trame valide du cache
+        self._read_pos = 0        # Position (total_written) déjà lue dans le buffer
+        self.window = None        # (début, fin) en positions absolues de la dernière fenêtre lue
+
+    def update(self, buffer):
+        """Lit l'audio arrivé dans le RingBuffer depuis le dernier appel et calcule ses trames"""
+        samples, position, _ = buffer.read_since(self._read_pos)
+        start = position - len(samples)
+        if start != self._read_pos:
+            # Audio perdu (buffer écrasé) ou premier appel : première trame entièrement disponible
+            self._pending = self._pending[:0]
+            self._next_frame = self._first_complete_frame(start)
+            self._first_frame = self._next_frame
+            samples = samples[self._frame_start(self._next_frame) - start:]
+        self._read_pos = position
+        if len(samples) == 0:
+            return
+
+        pending = np.concatenate([self._pending, samples])
+        count = (len(pending) - self.n_fft) // self.hop_length + 1
+        if count <= 0:
+            self._pending = pending
+            return
+
+        # Toutes les nouvelles trames en un seul lot (le plancher et le flux sont appliqués à la lecture)
+        frames = sliding_window_view(pending, self.n_fft)[::self.hop_length][:count]
+        slots = np.arange(self._next_frame, self._next_frame + count) % self.capacity
+        self._mel_db[slots] = self._frames_mel_db(frames)
+        self._next_frame += count
+        self._first_frame = max(self._first_frame, self._next_frame - self.capacity)
+        self._pending = pending[count * self.hop_length:]
+        self.frames_computed += count
+
+    def latest(self, buffer, duration):
+        """
+        Met à jour le cache puis calcule l'enveloppe des duration dernières secondes.
+        Retourne (enveloppe, heure de capture du début de la fenêtre), comme
+        onset_strength(y=fenêtre) dont la trame m est datée m * hop_length après ce début.
+        """
+        self.update(buffer)
+        hop = self.hop_length
+        edge = self.n_fft // (2 * hop)  # Trames complétées par des zéros à chaque bord
+        # Fin de fenêtre : dernier multiple du hop dont toutes les trames intérieures sont calculées
+        end = (self._next_frame + edge - 1) * hop
+        begin = max(end - int(duration * self.sample_rate) // hop * hop, (self._first_frame - edge) * hop)
+        samples, position, end_time = buffer.read_since(begin)
+        available = position - len(samples)
+        if available > begin:
+            # Début de fenêtre écrasé entre-temps : on la raccourcit au hop suivant
+            begin = -(-available // hop) * hop
+        if end - begin < 2 * edge * hop or end_time is None or position < end:
+            return np.zeros(0, dtype=np.float32), None
+        y = samples[begin - available:end - available]
+        self.window = (begin, end)
+
+        # Trames de bord centrées comme librosa (zéros hors de la fenêtre), trames intérieures du cache
+        reach = self.n_fft // 2 + (edge - 1) * hop
+        head = np.concatenate([np.zeros(self.n_fft // 2, dtype=np.float32), y[:reach]])
+        tail = np.concatenate([y[len(y) - reach:], np.zeros(self.n_fft // 2, dtype=np.float32)])
+        edges = sliding_window_view(np.concatenate([head, tail]), self.n_fft)[::hop]
+        edges = self._frames_mel_db(np.concatenate([edges[:edge], edges[-edge:]]))
+        inner = np.arange(begin // hop + edge, end // hop - edge + 1) % self.capacity
+        mel_db = np.concatenate([edges[:edge], self._mel_db[inner], edges[edge:]])
+
+        # Plancher top_db sous le maximum de la fenêtre, comme librosa.power_to_db
+        mel_db = np.maximum(mel_db, mel_db.max() - self.top_db)
+        # Flux : moyenne des augmentations par rapport à la trame précédente, 3 trames nulles en tête
+        flux = np.maximum(mel_db[1:] - mel_db[:-1], 0.0).mean(axis=1)
+        envelope = np.concatenate([np.zeros(3, dtype=np.float32), flux[:len(mel_db) - 3]])
+        return envelope, end_time - (position - begin) / self.sample_rate
+
+    def _first_complete_frame(self, position):
+        return -(-(position + self.n_fft // 2) // self.hop_length)
+
+    def _frame_start(self, frame):
+        return frame * self.hop_length - self.n_fft // 2
+
+    def _frames_mel_db(self, frames):
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        return 10.0 * np.log10(np.maximum(power @ self._mel_basis.T, 1e-10))
@@ -0,0 +1,72 @@
+"""
+Vérification d'OnsetEnvelopeCache contre librosa.onset.onset_strength : l'audio est
+écrit par blocs dans un RingBuffer comme en direct, et à chaque relevé l'enveloppe du
+cache est comparée à onset_strength(y=fenêtre) sur exactement la même fenêtre.
+Les deux doivent être égales à la précision float32 près.
+"""
+import argparse
+import sys
+import numpy as np
+from audio.filesource import FileAudioSource, StreamResampler
+from audio.onsetcache import OnsetEnvelopeCache
+from audio.ringbuffer import RingBuffer
+from kickdetector.benchmark import synth_kick_track
+
+RTOL = 1e-4
+ATOL = 1e-4  # Enveloppe en dB moyens : ~1e-6 d'écart attendu (ordre des sommes FFT/mel)
+
+
+def compare(audio, sample_rate=22050, duration=5.0, interval=2.0, block_size=1024):
+    """Rejoue audio et retourne l'écart absolu maximal entre le cache et onset_strength à chaque relevé"""
+    import librosa
+
+    buffer = RingBuffer(int(sample_rate * duration))
+    cache = OnsetEnvelopeCache(sample_rate, duration)
+    errors = []
+    next_update = interval
+    for start in range(0, len(audio) - block_size + 1, block_size):
+        end_time = (start + block_size) / sample_rate
+        buffer.write(audio[start:start + block_size], end_time)
+        if end_time < next_update:
+            continue
+        next_update += interval
+        envelope, _ = cache.latest(buffer, duration)
+        begin, end = cache.window
+        reference = librosa.onset.onset_strength(y=audio[begin:end], sr=sample_rate, hop_length=cache.hop_length)
+        if envelope.shape != reference.shape or not np.allclose(envelope, reference, rtol=RTOL, atol=ATOL):
+            print(f"  mismatch at {end_time:.1f}s: window {begin}-{end}, "
+                  f"{len(envelope)} vs {len(reference)} frames")
+            errors.append(np.inf)
+        else:
+            errors.append(float(np.max(np.abs(envelope - reference))))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OnsetEnvelopeCache contre librosa.onset.onset_strength")
+    parser.add_argument("--file", help="Enregistrement à utiliser (défaut : pistes synthétiques)")
+    parser.add_argument("--bpms", type=int, nargs="+", default=[80, 126, 174])
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    sample_rate = 22050
+    if args.file:
+        source = FileAudioSource(args.file)
+        tracks = {args.file: StreamResampler(1, source.sample_rate // sample_rate).process(source.read_all())}
+    else:
+        tracks = {
+            f"{bpm} BPM": StreamResampler(1, 2).process(synth_kick_track(args.duration, bpm, 44100, seed=1)[0])
+            for bpm in args.bpms
+        }
+
+    ok = True
+    for name, audio in tracks.items():
+        errors = compare(audio.astype(np.float32), sample_rate)
+        ok &= bool(errors) and all(np.isfinite(errors))
+        print(f"{name}: {len(errors)} windows, max abs error {max(errors, default=0.0):.2e}")
+    print("Cache matches onset_strength" if ok else "MISMATCH")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,17 +11,20 @@ class AudioPassthrough:
         self.gain = gain
         self._stream = None
         self._running = False
+        self._stop_event = threading.Event()
         self._thread = None
 
     def start(self):
         if self._running:
             return
         self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
     def stop(self):
         self._running = False
+        self._stop_event.set()
         if self._stream:
             try:
                 self._stream.close()
@@ -49,8 +52,7 @@ class AudioPassthrough:
                 callback=callback,
             )
             self._stream.start()
-            while self._running:
-                sd.sleep(150)
+            self._stop_event.wait()  # Le flux tourne dans le thread PortAudio : on attend seulement l'arrêt
         except Exception as e:
             print(f"AudioPassthrough error: {e}")
             self._running = False
\ No newline at end of file
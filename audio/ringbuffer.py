@@ -0,0 +1,230 @@
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Buffer circulaire float32 préalloué pour l'audio :
+    - écriture vectorisée d'un bloc entier (pas de conversion échantillon par échantillon)
+    - stockage en miroir (chaque échantillon écrit deux fois) pour que les N derniers
+      échantillons soient toujours contigus : un snapshot = une seule copie mémoire
+    - verrou court partagé entre le callback audio (écrivain) et l'analyse (lecteur)
+    - condition sur ce verrou : un lecteur peut dormir jusqu'à l'arrivée de n échantillons
+      (wait_for_samples) au lieu de se réveiller périodiquement
+    """
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=dtype)
+        self._write_pos = 0     # Prochaine position d'écriture dans [0, capacity)
+        self._count = 0         # Nombre d'échantillons valides (<= capacity)
+        self.total_written = 0  # Nombre total d'échantillons reçus depuis le début
+        self.end_time = None    # Heure (horloge de spectacle) juste après le dernier échantillon écrit
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        self._wakeups = 0       # Incrémenté par wake() pour libérer les lecteurs en attente
+
+    def __len__(self):
+        return self._count
+
+    def write(self, block, end_time=None):
+        """
+        Ajoute un bloc d'échantillons (les plus anciens sont écrasés).
+        end_time : heure de capture de la fin du bloc (ADC), pour dater les analyses
+        """
+        block = np.asarray(block).reshape(-1)
+        received = len(block)
+        if received == 0:
+            return
+        if received > self.capacity:
+            block = block[-self.capacity:]
+        n = len(block)
+        cap = self.capacity
+        data = self._data
+
+        with self._lock:
+            pos = self._write_pos
+            first = min(n, cap - pos)
+            data[pos:pos + first] = block[:first]
+            data[pos + cap:pos + cap + first] = block[:first]
+            rest = n - first
+            if rest:
+                data[:rest] = block[first:]
+                data[cap:cap + rest] = block[first:]
+            self._write_pos = (pos + n) % cap
+            self._count = min(self._count + n, cap)
+            self.total_written += received
+            if end_time is not None:
+                self.end_time = end_time
+            self._data_ready.notify_all()
+
+    def latest(self, n=None):
+        """Retourne une copie des n derniers échantillons (tous si n est None)"""
+        with self._lock:
+            n = self._count if n is None else min(int(n), self._count)
+            end = self._write_pos + self.capacity
+            return self._data[end - n:end].copy()
+
+    def latest_with_time(self, n=None):
+        """Comme latest(), avec l'heure de capture de la fin du snapshot (lus sous le même verrou)"""
+        with self._lock:
+            n = self._count if n is None else min(int(n), self._count)
+            end = self._write_pos + self.capacity
+            return self._data[end - n:end].copy(), self.end_time
+
+    def read_since(self, position):
+        """
+        Échantillons écrits depuis la position absolue position (compteur total_written).
+        Retourne (données, nouvelle position, heure de capture de la fin) ; si des
+        échantillons ont déjà été écrasés, la lecture reprend au plus ancien disponible.
+        """
+        with self._lock:
+            n = min(self.total_written - int(position), self._count)
+            if n <= 0:
+                return self._data[:0].copy(), self.total_written, self.end_time
+            end = self._write_pos + self.capacity
+            return self._data[end - n:end].copy(), self.total_written, self.end_time
+
+    def wait_for_samples(self, position, count=1, timeout=None):
+        """
+        Attend que count échantillons aient été écrits après la position absolue position,
+        au plus timeout secondes (ou jusqu'à wake()). Retourne True s'ils sont disponibles.
+        """
+        with self._data_ready:
+            wakeups = self._wakeups
+            return self._data_ready.wait_for(
+                lambda: self.total_written - position >= count or self._wakeups != wakeups, timeout
+            ) and self.total_written - position >= count
+
+    def wake(self):
+        """Libère les lecteurs en attente (arrêt de l'analyseur)"""
+        with self._data_ready:
+            self._wakeups += 1
+            self._data_ready.notify_all()
+
+    def clear(self):
+        with self._lock:
+            self._write_pos = 0
+            self._count = 0
+            self.end_time = None
+
+
+class SharedRingBuffer(RingBuffer):
+    """
+    RingBuffer placé en mémoire partagée (multiprocessing.shared_memory) pour qu'un
+    processus d'analyse lise l'audio sans copie par le pipe. Un seul écrivain (le
+    callback audio) ; les lecteurs de l'autre processus ne peuvent pas prendre le
+    verrou, ils relisent donc tant qu'un compteur de séquence (seqlock) a bougé.
+    Le processus d'analyse s'attache avec SharedRingBuffer(capacity, name=..., create=False).
+    wait_for_samples n'est réveillé que par les écritures du même processus.
+    """
+    # En-tête float64 : séquence, position d'écriture, nombre d'échantillons, total écrit, heure de fin
+    _HEADER_SLOTS = 5
+    _HEADER_BYTES = 64
+
+    def __init__(self, capacity, name=None, create=True):
+        self.capacity = int(capacity)
+        size = self._HEADER_BYTES + 2 * self.capacity * np.dtype(np.float32).itemsize
+        if create or sys.version_info >= (3, 13):
+            # track=False (3.13+) : seul le créateur confie le segment au resource_tracker
+            kwargs = {} if create else {"track": False}
+            self._shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0, **kwargs)
+        else:
+            # Avant 3.13, s'attacher enregistre aussi le segment. Un processus lancé par spawn partage
+            # le tracker du créateur (_pid None) : rien à faire. Un processus qui a son propre tracker
+            # détruirait le segment à sa sortie, sous les pieds du créateur : on le désenregistre.
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+            if resource_tracker._resource_tracker._pid is not None:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.name = self._shm.name
+        self._owner = create
+        self._header = np.ndarray((self._HEADER_SLOTS,), dtype=np.float64, buffer=self._shm.buf)
+        self._data = np.ndarray((2 * self.capacity,), dtype=np.float32, buffer=self._shm.buf,
+                                offset=self._HEADER_BYTES)
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        self._wakeups = 0
+        if create:
+            self._header[:] = 0.0
+            self._header[4] = np.nan
+            self._data[:] = 0.0
+
+    # État stocké dans l'en-tête partagé (mêmes noms que RingBuffer)
+    @property
+    def _write_pos(self):
+        return int(self._header[1])
+
+    @_write_pos.setter
+    def _write_pos(self, value):
+        self._header[1] = value
+
+    @property
+    def _count(self):
+        return int(self._header[2])
+
+    @_count.setter
+    def _count(self, value):
+        self._header[2] = value
+
+    @property
+    def total_written(self):
+        return int(self._header[3])
+
+    @total_written.setter
+    def total_written(self, value):
+        self._header[3] = value
+
+    @property
+    def end_time(self):
+        value = self._header[4]
+        return None if np.isnan(value) else float(value)
+
+    @end_time.setter
+    def end_time(self, value):
+        self._header[4] = np.nan if value is None else value
+
+    def write(self, block, end_time=None):
+        self._header[0] += 1  # Séquence impaire : écriture en cours
+        try:
+            super().write(block, end_time)
+        finally:
+            self._header[0] += 1
+
+    def _consistent(self, read):
+        """Relance la lecture jusqu'à obtenir un état cohérent (aucune écriture pendant la copie)"""
+        while True:
+            sequence = self._header[0]
+            if sequence % 2 == 0:
+                result = read()
+                if self._header[0] == sequence:
+                    return result
+            time.sleep(0)
+
+    def latest(self, n=None):
+        return self._consistent(lambda: super(SharedRingBuffer, self).latest(n))
+
+    def latest_with_time(self, n=None):
+        return self._consistent(lambda: super(SharedRingBuffer, self).latest_with_time(n))
+
+    def read_since(self, position):
+        return self._consistent(lambda: super(SharedRingBuffer, self).read_since(position))
+
+    def clear(self):
+        self._header[0] += 1
+        try:
+            super().clear()
+        finally:
+            self._header[0] += 1
+
+    def close(self):
+        """Détache la mémoire partagée (et la libère côté créateur)"""
+        self._header = None
+        self._data = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
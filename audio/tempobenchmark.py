@@ -0,0 +1,142 @@
+"""
+Comparaison des moteurs de tempo de BeatCalculator sur des pistes synthétiques
+(bruit + basse + kicks d'amplitude variable à BPM connu), analysées comme en direct :
+blocs de 1024 échantillons à 22050 Hz, relevé du BPM toutes les 2 s après 8 s de chauffe.
+
+Mesures par piste :
+- bpm : médiane des BPM relevés ; ok : part des relevés à ±2 % du BPM réel
+- octave : part des relevés à la moitié ou au double du BPM réel
+- phase : écart médian entre le dernier beat annoncé et le kick réel le plus proche
+- cpu : secondes de CPU par seconde d'audio
+
+Moteurs :
+- streaming : StreamingTempoTracker, suivi à chaque bloc
+- librosa : beat_track sur l'enveloppe d'onset des 5 dernières secondes (triplée), tirée
+  d'OnsetEnvelopeCache (égale à onset_strength sur la même fenêtre, voir audio.onsetcheck)
+- baseline : analyse d'origine, beat_track sur les 5 dernières secondes d'audio brut triplées
+  (15 s), enveloppe d'onset recalculée en entier à chaque relevé
+
+Résultats : tableau imprimé en fin d'exécution par python -m audio.tempobenchmark
+(réglages par défaut : 30 s par piste, graine 1 ; librosa 0.11, compilation numba exclue) :
+  BPM réel          80      95      110     126     140     174
+  streaming  bpm    80      95      110     126     140     175
+             ok     100 %   100 %   100 %   100 %   100 %   100 %
+             octave 0 %     0 %     0 %     0 %     0 %     0 %
+             phase  7 ms    7 ms    5 ms    4 ms    5 ms    6 ms
+             cpu    0.42 %  0.45 %  0.61 %  0.59 %  0.57 %  0.59 %
+  librosa    bpm    123     151     112     129     143     172
+             ok     0 %     0 %     45 %    0 %     0 %     18 %
+             octave 0 %     0 %     0 %     0 %     0 %     0 %
+             phase  263 ms  123 ms  39 ms   34 ms   22 ms   36 ms
+             cpu    0.40 %  0.43 %  0.55 %  0.92 %  0.52 %  0.53 %
+  baseline   bpm    215     138     119     135     143     180
+             ok     0 %     9 %     9 %     0 %     18 %    18 %
+             octave 0 %     0 %     0 %     18 %    0 %     18 %
+             phase  185 ms  38 ms   112 ms  42 ms   71 ms   99 ms
+             cpu    1.00 %  1.19 %  1.36 %  1.35 %  1.33 %  1.33 %
+Ici l'a priori reste centré sur 120 BPM (pas de BPM retenu). Sur 5 s, beat_track n'a qu'une
+grille de tempo grossière et se trompe souvent, sur l'enveloppe du cache comme sur l'audio
+brut ; le cache divise le coût par ~2,5 (pas d'onset_strength sur 15 s d'audio à chaque relevé).
+"""
+import argparse
+import time
+import numpy as np
+from audio.analysis import librosa_tempo_from_audio
+from audio.beatcalculator import BeatCalculator
+from audio.clock import SimulatedClock
+from kickdetector.benchmark import synth_kick_track
+
+
+def run_engine(engine, audio, sample_rate, onsets, warmup=8.0, interval=2.0, block_size=1024):
+    """Rejoue la piste dans un BeatCalculator ; retourne (BPM relevés, écarts de phase, CPU en s)"""
+    bc = BeatCalculator(None, tempo_engine="streaming" if engine == "streaming" else "librosa")
+    bc.clock = SimulatedClock()
+    bpms, phase_errors = [], []
+    cpu = 0.0
+    next_update = warmup
+    for start in range(0, len(audio) - block_size + 1, block_size):
+        end_time = (start + block_size) / sample_rate
+        bc.clock.set(end_time)
+        bc.audio_buffer.write(audio[start:start + block_size], end_time)
+
+        cpu_start = time.process_time()
+        if engine == "streaming":
+            bc.update_streaming_tempo()
+        if end_time >= next_update:
+            next_update += interval
+            if engine == "streaming":
+                bc.get_beat_per_minute_from_tracker()
+            elif engine == "librosa":
+                bc.get_beat_per_minute_from_librosa()
+            else:
+                # Analyse d'origine : beat_track sur les 5 s d'audio brut (triplées)
+                samples, capture_time = bc.audio_buffer.latest_with_time()
+                bc._apply_audio_tempo(*librosa_tempo_from_audio(
+                    samples, sample_rate, 512, bc.beat_per_minute_finale,
+                    capture_time - len(samples) / sample_rate
+                ))
+            cpu += time.process_time() - cpu_start
+            if bc.librosa_beat_history:
+                bpms.append(bc.librosa_beat_history[-1])
+            if bc.last_librosa_beat_timestamp is not None:
+                offsets = bc.last_librosa_beat_timestamp - onsets
+                phase_errors.append(offsets[np.argmin(np.abs(offsets))])
+            continue
+        cpu += time.process_time() - cpu_start
+    return np.array(bpms, dtype=float), np.array(phase_errors), cpu
+
+
+ENGINES = ["streaming", "librosa", "baseline"]
+
+
+def format_table(results, true_bpms):
+    """Tableau récapitulatif (recopié tel quel dans la docstring du module) : results[engine][bpm] = mesures"""
+    lines = [f"  {'BPM réel':<17} " + "".join(f"{bpm:<8.0f}" for bpm in true_bpms).rstrip()]
+    rows = [("bpm", "{:.0f}"), ("ok", "{:.0f} %"), ("octave", "{:.0f} %"), ("phase", "{:.0f} ms"), ("cpu", "{:.2f} %")]
+    for engine, by_bpm in results.items():
+        for i, (name, fmt) in enumerate(rows):
+            cells = "".join(
+                f"{fmt.format(by_bpm[bpm][name]) if bpm in by_bpm else '-':<8}" for bpm in true_bpms
+            )
+            lines.append(f"  {engine if i == 0 else '':<10} {name:<6} {cells}".rstrip())
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précision et coût des moteurs de tempo (streaming / librosa / baseline)")
+    parser.add_argument("--bpms", type=float, nargs="+", default=[80, 95, 110, 126, 140, 174])
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sample_rate = 22050
+    for engine in {"librosa", "baseline"} & set(args.engines):
+        # Premier appel de librosa : compilation numba, exclue des mesures
+        audio, onsets = synth_kick_track(12.0, 120, sample_rate, args.seed)
+        run_engine(engine, audio, sample_rate, onsets)
+    results = {engine: {} for engine in args.engines}
+    print(f"{'engine':>10} {'true':>6} {'bpm':>7} {'ok':>5} {'octave':>7} {'phase':>9} {'cpu/s audio':>12}")
+    for true_bpm in args.bpms:
+        audio, onsets = synth_kick_track(args.duration, true_bpm, sample_rate, args.seed)
+        for engine in args.engines:
+            bpms, phase_errors, cpu = run_engine(engine, audio, sample_rate, onsets)
+            if len(bpms) == 0:
+                print(f"{engine:>10} {true_bpm:>6.0f}  no estimate")
+                continue
+            ratio = bpms / true_bpm
+            ok = np.mean(np.abs(ratio - 1) <= 0.02)
+            octave = np.mean((np.abs(ratio - 0.5) <= 0.02) | (np.abs(ratio - 2) <= 0.04))
+            phase = np.median(np.abs(phase_errors)) * 1000 if len(phase_errors) else float("nan")
+            results[engine][true_bpm] = {
+                "bpm": np.median(bpms), "ok": ok * 100, "octave": octave * 100,
+                "phase": phase, "cpu": cpu / args.duration * 100,
+            }
+            print(f"{engine:>10} {true_bpm:>6.0f} {np.median(bpms):>7.1f} {ok * 100:>4.0f}% {octave * 100:>6.0f}%"
+                  f" {phase:>6.1f} ms {cpu / args.duration * 100:>11.2f}%")
+    print()
+    print(format_table(results, args.bpms))
+
+
+if __name__ == "__main__":
+    main()
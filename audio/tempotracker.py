@@ -0,0 +1,199 @@
+import numpy as np
+
+
+class StreamingTempoTracker:
+    """
+    Suivi de tempo incrémental (remplace l'appel périodique à librosa.beat.beat_track) :
+    - enveloppe de force d'onset mise à jour à chaque pas (flux spectral log-compressé)
+    - autocorrélation glissante à oubli exponentiel sur la plage de lags des BPM utiles
+    - BPM (pic pondéré par un a priori log-normal, barycentre sous le pas), tempo double
+      retenu si, dans les basses (kicks), la demi-période porte presque autant d'autocorrélation :
+      l'a priori seul ne départage pas 87 et 174 BPM, et des charleys entre les temps
+      (large bande) ne doivent pas doubler le tempo
+    - phase du beat par filtre en peigne sur les dernières périodes de l'enveloppe
+    Le coût est constant par pas (une FFT de n_fft points + quelques dizaines de lags).
+    """
+    def __init__(
+        self,
+        sample_rate=22050,
+        hop_length=512,
+        n_fft=1024,
+        min_bpm=60,
+        max_bpm=200,
+        start_bpm=120,
+        window_seconds=8.0,
+        n_bands=40,
+        octave_ratio=0.8,
+        kick_band_hz=150.0,
+    ):
+        self.sample_rate = sample_rate
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.fps = sample_rate / hop_length  # Pas d'enveloppe par seconde
+
+        self._window = np.hanning(n_fft).astype(np.float32)
+        # Regroupement des bins en bandes log-espacées (basses résolues comme une échelle mel)
+        freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        edges = np.searchsorted(freqs, np.geomspace(30.0, min(8000.0, sample_rate / 2), n_bands + 1))
+        self._band_starts = np.unique(edges[:-1])
+        self._kick_bands = int(np.count_nonzero(freqs[self._band_starts] < kick_band_hz))
+        self._frame = np.zeros(n_fft, dtype=np.float32)
+        self._frame_fill = 0
+        self._hop_fill = 0
+        self._prev_spectrum = None
+
+        # Lags candidats (en pas) et a priori log-normal autour de start_bpm (comme librosa)
+        lag_min = max(1, int(np.floor(self.fps * 60.0 / max_bpm)))
+        lag_max = int(np.ceil(self.fps * 60.0 / min_bpm))
+        self.lags = np.arange(lag_min, lag_max + 1)
+        self.octave_ratio = octave_ratio  # Pic relatif à la demi-période au-delà duquel on double le tempo
+        self._prior = None
+        self.set_start_bpm(start_bpm)
+        self._acf = np.zeros(len(self.lags))
+        self._kick_acf = np.zeros(len(self.lags))  # Même autocorrélation sur les bandes basses
+        self._energy = 0.0  # Autocorrélation au lag 0 (normalisation de la confiance)
+        self._decay = np.exp(-1.0 / (window_seconds * self.fps))
+
+        # Historique de l'enveloppe : lags de l'autocorrélation + 4 périodes pour la phase
+        self._comb_periods = 4
+        self._onsets = np.zeros(max(lag_max * (self._comb_periods + 1), int(window_seconds * self.fps)))
+        self._onset_mean = 0.0
+        self._kick_onsets = np.zeros(lag_max + 1)
+        self._kick_onset_mean = 0.0
+        self._mean_decay = np.exp(-1.0 / self.fps)  # Moyenne glissante ~1 s (retrait de la tendance)
+        self.frames = 0
+
+        self.bpm = 0.0
+        self.period = 0.0           # Période du beat en secondes
+        self.confidence = 0.0       # Pic d'autocorrélation normalisé (0-1)
+        self.last_beat_time = None  # Heure (horloge de spectacle) du dernier beat estimé
+        self._frame_time = None
+
+    def reset(self):
+        self._frame[:] = 0
+        self._frame_fill = 0
+        self._hop_fill = 0
+        self._prev_spectrum = None
+        self._acf[:] = 0
+        self._kick_acf[:] = 0
+        self._energy = 0.0
+        self._onsets[:] = 0
+        self._onset_mean = 0.0
+        self._kick_onsets[:] = 0
+        self._kick_onset_mean = 0.0
+        self.frames = 0
+        self.bpm = 0.0
+        self.period = 0.0
+        self.confidence = 0.0
+        self.last_beat_time = None
+
+    def process(self, samples, end_time):
+        """
+        Ajoute des échantillons mono ; end_time est l'heure de capture juste après le
+        dernier échantillon. Met à jour BPM et phase à chaque pas complet.
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        count = len(samples)
+        hop = self.hop_length
+        frame = self._frame
+        pos = 0
+        while pos < count:
+            take = min(hop - self._hop_fill, count - pos)
+            frame[self.n_fft - hop + self._hop_fill:self.n_fft - hop + self._hop_fill + take] = samples[pos:pos + take]
+            self._hop_fill += take
+            pos += take
+            if self._hop_fill < hop:
+                break
+            self._hop_fill = 0
+            self._frame_fill = min(self._frame_fill + hop, self.n_fft)
+            # Centre de la trame, compté depuis la fin des échantillons reçus
+            hop_end_time = end_time - (count - pos) / self.sample_rate
+            if self._frame_fill == self.n_fft:
+                self._update(hop_end_time - self.n_fft / (2 * self.sample_rate))
+            frame[:-hop] = frame[hop:]
+
+    def _update(self, frame_time):
+        """Un pas d'enveloppe : flux spectral, autocorrélation, tempo et phase"""
+        power = np.abs(np.fft.rfft(self._frame * self._window)) ** 2
+        spectrum = np.log1p(1000.0 * np.add.reduceat(power, self._band_starts))
+        if self._prev_spectrum is None:
+            self._prev_spectrum = spectrum
+            return
+        rise = np.maximum(spectrum - self._prev_spectrum, 0.0)
+        flux = float(np.mean(rise))
+        kick_flux = float(np.mean(rise[:self._kick_bands]))
+        self._prev_spectrum = spectrum
+
+        # Retrait de la tendance : seule la partie au-dessus de la moyenne locale compte
+        self._onset_mean = self._mean_decay * self._onset_mean + (1 - self._mean_decay) * flux
+        onset = max(flux - self._onset_mean, 0.0)
+        self._kick_onset_mean = self._mean_decay * self._kick_onset_mean + (1 - self._mean_decay) * kick_flux
+        kick_onset = max(kick_flux - self._kick_onset_mean, 0.0)
+
+        onsets = self._onsets
+        onsets[:-1] = onsets[1:]
+        onsets[-1] = onset
+        self.frames += 1
+        self._frame_time = frame_time
+
+        # Autocorrélation glissante : chaque nouveau pas ajoute o[t] * o[t - lag]
+        self._acf *= self._decay
+        self._acf += onset * onsets[-1 - self.lags]
+        self._energy = self._decay * self._energy + onset * onset
+        kick_onsets = self._kick_onsets
+        kick_onsets[:-1] = kick_onsets[1:]
+        kick_onsets[-1] = kick_onset
+        self._kick_acf *= self._decay
+        self._kick_acf += kick_onset * kick_onsets[-1 - self.lags]
+
+        if self.frames < len(onsets) // 2 or self._energy <= 0.0:
+            return  # Pas assez d'historique pour une estimation fiable
+        self._estimate_tempo()
+        self._estimate_phase()
+
+    def _estimate_tempo(self):
+        acf = self._acf
+        # Un tempo dont la période tombe entre deux lags se répartit sur les deux : on somme
+        # les voisins avant de choisir le pic pour ne pas favoriser les multiples de période entiers
+        smoothed = np.convolve(acf, (1.0, 1.0, 1.0), mode="same")
+        best = int(np.argmax(smoothed * self._prior))
+        # Octave : des kicks presque aussi corrélés à la demi-période tombent aussi entre les beats retenus
+        half = int(round(self.lags[best] / 2)) - self.lags[0]
+        if half >= 0:
+            kick = np.convolve(self._kick_acf, (1.0, 1.0, 1.0), mode="same")
+            if kick[best] > 0 and kick[half] >= self.octave_ratio * kick[best]:
+                best = half
+        # Barycentre du pic (résolution inférieure au pas)
+        around = slice(max(best - 1, 0), best + 2)
+        mass = np.maximum(acf[around], 0.0)
+        lag = float(self.lags[best])
+        if mass.sum() > 0:
+            lag = float(np.dot(self.lags[around], mass) / mass.sum())
+        self.period = lag / self.fps
+        self.bpm = 60.0 / self.period
+        self.confidence = float(min(mass.sum(), self._energy) / self._energy)
+
+    def set_start_bpm(self, bpm):
+        """Recentre l'a priori de tempo (ex. sur le BPM retenu), comme start_bpm de librosa"""
+        if bpm > 0:
+            self._prior = np.exp(-0.5 * np.log2(60.0 * self.fps / self.lags / bpm) ** 2)
+
+    def _estimate_phase(self):
+        """Filtre en peigne : décalage dont les multiples de la période portent le plus d'onsets"""
+        period = self.period * self.fps
+        offsets = np.arange(int(round(period)))
+        steps = np.round(np.arange(self._comb_periods) * period).astype(int)
+        weights = 0.8 ** np.arange(self._comb_periods)  # Les périodes récentes comptent plus
+        scores = self._onsets[-1 - (offsets[:, None] + steps[None, :])] @ weights
+        self.last_beat_time = self._frame_time - int(np.argmax(scores)) / self.fps
+
+    def phase(self, now):
+        """Position dans le beat courant (0 au beat, 1 au suivant)"""
+        if self.last_beat_time is None or self.period <= 0:
+            return 0.0
+        return ((now - self.last_beat_time) / self.period) % 1.0
+
+    def next_beat_time(self, now):
+        if self.last_beat_time is None or self.period <= 0:
+            return None
+        return now + (1.0 - self.phase(now)) * self.period
@@ -0,0 +1,210 @@
+import bisect
+from collections import deque
+import heapq
+import math
+
+
+class SlidingWindowStats:
+    """
+    Statistiques sur une fenêtre glissante de taille fixe, en temps constant :
+    - moyenne et écart-type (Welford fenêtré : ajout/retrait sans re-parcourir la fenêtre)
+    - maximum via une deque monotone décroissante
+    Remplace les deque + np.array(list(...)) recalculés à chaque bloc.
+    """
+    def __init__(self, maxlen):
+        self.maxlen = int(maxlen)
+        self._values = [0.0] * self.maxlen  # Fenêtre circulaire préallouée
+        self._pos = 0
+        self._count = 0
+        self._index = 0            # Nombre total de valeurs reçues
+        self._mean = 0.0
+        self._m2 = 0.0             # Somme des carrés des écarts à la moyenne
+        self._max_candidates = deque()  # (index, valeur), valeurs décroissantes
+
+    def __len__(self):
+        return self._count
+
+    def push(self, value):
+        """Ajoute une valeur (la plus ancienne sort si la fenêtre est pleine)"""
+        value = float(value)
+        if self._count < self.maxlen:
+            self._count += 1
+            delta = value - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (value - self._mean)
+        else:
+            old = self._values[self._pos]
+            old_mean = self._mean
+            self._mean += (value - old) / self._count
+            self._m2 += (value - old) * (value - self._mean + old - old_mean)
+            if self._m2 < 0.0:
+                self._m2 = 0.0
+        self._values[self._pos] = value
+        self._pos = (self._pos + 1) % self.maxlen
+
+        candidates = self._max_candidates
+        while candidates and candidates[-1][1] <= value:
+            candidates.pop()
+        candidates.append((self._index, value))
+        if candidates[0][0] <= self._index - self.maxlen:
+            candidates.popleft()
+        self._index += 1
+
+    def mean(self):
+        return self._mean if self._count else 0.0
+
+    def std(self):
+        """Écart-type de population (comme np.std)"""
+        if self._count == 0:
+            return 0.0
+        return math.sqrt(self._m2 / self._count)
+
+    def max(self):
+        return self._max_candidates[0][1] if self._max_candidates else 0.0
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._max_candidates.clear()
+
+
+class StreamingMedian:
+    """
+    Médiane d'une fenêtre dont les valeurs sortent dans l'ordre d'arrivée (FIFO), par deux tas :
+    - moitié basse dans un max-tas, moitié haute dans un min-tas (ajout/retrait en O(log n))
+    - retrait paresseux : une valeur sortie reste dans son tas jusqu'à arriver au sommet,
+      elle est reconnue à son numéro d'arrivée (inférieur à celui de la plus ancienne valeur vivante)
+    """
+    def __init__(self):
+        self._low = []      # (-valeur, numéro) : max-tas de la moitié basse
+        self._high = []     # (valeur, numéro) : min-tas de la moitié haute
+        self._in_low = {}   # numéro -> True si la valeur est dans la moitié basse
+        self._order = deque()  # Numéros des valeurs vivantes, dans l'ordre d'arrivée
+        self._next = 0      # Numéro de la prochaine valeur
+        self._oldest = 0    # Les numéros inférieurs sont sortis
+        self._low_count = 0
+        self._high_count = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def push(self, value):
+        value = float(value)
+        number = self._next
+        self._next += 1
+        self._order.append(number)
+        self._prune(self._low)
+        if self._low_count == 0 or value <= -self._low[0][0]:
+            heapq.heappush(self._low, (-value, number))
+            self._in_low[number] = True
+            self._low_count += 1
+        else:
+            heapq.heappush(self._high, (value, number))
+            self._in_low[number] = False
+            self._high_count += 1
+        self._rebalance()
+
+    def pop_oldest(self):
+        """Sort la plus ancienne valeur de la fenêtre"""
+        if not self._order:
+            return
+        number = self._order.popleft()
+        self._oldest = number + 1
+        if self._in_low.pop(number):
+            self._low_count -= 1
+        else:
+            self._high_count -= 1
+        self._rebalance()
+        self._compact()
+
+    def median(self):
+        """Médiane des valeurs vivantes (moyenne des deux centrales si leur nombre est pair), 0 si vide"""
+        if not self._order:
+            return 0.0
+        self._prune(self._low)
+        if self._low_count > self._high_count:
+            return -self._low[0][0]
+        self._prune(self._high)
+        return (-self._low[0][0] + self._high[0][0]) / 2
+
+    def clear(self):
+        self._low.clear()
+        self._high.clear()
+        self._in_low.clear()
+        self._order.clear()
+        self._oldest = self._next
+        self._low_count = 0
+        self._high_count = 0
+
+    def _prune(self, heap):
+        """Retire du sommet les valeurs déjà sorties de la fenêtre"""
+        while heap and heap[0][1] < self._oldest:
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        """Moitié basse égale à la moitié haute, ou plus grande d'une valeur"""
+        if self._low_count > self._high_count + 1:
+            self._prune(self._low)
+            value, number = heapq.heappop(self._low)
+            heapq.heappush(self._high, (-value, number))
+            self._in_low[number] = False
+            self._low_count -= 1
+            self._high_count += 1
+        elif self._high_count > self._low_count:
+            self._prune(self._high)
+            value, number = heapq.heappop(self._high)
+            heapq.heappush(self._low, (-value, number))
+            self._in_low[number] = True
+            self._high_count -= 1
+            self._low_count += 1
+
+    def _compact(self):
+        """Reconstruit un tas encombré de valeurs sorties (coût amorti constant)"""
+        for heap, count in ((self._low, self._low_count), (self._high, self._high_count)):
+            if len(heap) > 2 * count + 32:
+                heap[:] = [entry for entry in heap if entry[1] >= self._oldest]
+                heapq.heapify(heap)
+
+
+class SortedWindow:
+    """
+    Fenêtre glissante de taille fixe gardée triée (bisect) : ajout et retrait de la plus
+    ancienne valeur par recherche dichotomique, puis chaque percentile se lit directement
+    (interpolation linéaire, comme np.percentile) sans recopier ni retrier la fenêtre.
+    """
+    def __init__(self, maxlen):
+        self.maxlen = int(maxlen)
+        self._order = deque()  # Valeurs dans l'ordre d'arrivée
+        self._sorted = []      # Mêmes valeurs, triées
+
+    def __len__(self):
+        return len(self._order)
+
+    def push(self, value):
+        value = float(value)
+        if len(self._order) == self.maxlen:
+            oldest = self._order.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._order.append(value)
+        bisect.insort(self._sorted, value)
+
+    def percentile(self, q):
+        """Percentile q (0-100) des valeurs de la fenêtre, 0 si vide"""
+        values = self._sorted
+        if not values:
+            return 0.0
+        position = (len(values) - 1) * q / 100.0
+        low = int(position)
+        if low + 1 >= len(values):
+            return values[-1]
+        return values[low] + (values[low + 1] - values[low]) * (position - low)
+
+    def values(self):
+        """Valeurs dans l'ordre d'arrivée"""
+        return list(self._order)
+
+    def clear(self):
+        self._order.clear()
+        self._sorted.clear()
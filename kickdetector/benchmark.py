@@ -0,0 +1,152 @@
+import argparse
+import sys
+import time
+import numpy as np
+from audio.clock import SimulatedClock
+from audio.filesource import FileAudioSource
+from kickdetector.kickdetector import KickDetector
+
+# Budget CPU de la détection : secondes de CPU par seconde d'audio (5 % d'un cœur)
+CPU_BUDGET = 0.05
+
+# Variantes comparées : paramètres passés à KickDetector
+ENGINES = {
+    "fft": {"engine": "fft", "spectrum": "rfft"},
+    "goertzel": {"engine": "fft", "spectrum": "goertzel"},
+    "envelope": {"engine": "envelope"},
+}
+
+
+class _NullBoard:
+    def activate_kick(self):
+        pass
+
+
+class _KickRecorder:
+    """Remplace BeatCalculator : note l'heure (simulée) de détection et l'horodatage de chaque kick"""
+    def __init__(self, clock):
+        self.clock = clock
+        self.kicks = []        # Heure à laquelle le kick a été signalé (latence)
+        self.timestamps = []   # Heure de l'attaque transmise par le détecteur (précision)
+
+    def put_kick_timestamp(self, timestamp=None):
+        now = self.clock.now()
+        self.kicks.append(now)
+        self.timestamps.append(now if timestamp is None else timestamp)
+
+
+def synth_kick_track(duration=30.0, bpm=126, sample_rate=44100, seed=0):
+    """Piste synthétique : bruit + basse + kicks d'amplitude variable à des instants connus"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    audio = 0.1 * rng.standard_normal(len(t)) * (1 + 0.5 * np.sin(2 * np.pi * 0.1 * t))
+    audio += 0.2 * np.sin(2 * np.pi * 55 * t) * (np.sin(2 * np.pi * 0.25 * t) > 0)
+    onsets = np.arange(0.3, duration - 0.5, 60.0 / bpm)
+    n = int(0.15 * sample_rate)
+    sweep = np.linspace(120, 50, n)
+    envelope = np.exp(-np.arange(n) / (0.04 * sample_rate))
+    kick = np.sin(2 * np.pi * np.cumsum(sweep) / sample_rate) * envelope
+    for onset in onsets:
+        i = int(onset * sample_rate)
+        audio[i:i + n] += rng.uniform(0.3, 1.0) * kick
+    return (audio / 2).astype(np.float32), onsets
+
+
+def load_file(path):
+    """Charge un fichier entier via FileAudioSource (mono float32, rééchantillonné comme en lecture)"""
+    source = FileAudioSource(path)
+    return source.read_all(), source.sample_rate
+
+
+def run_detector(audio, sample_rate, hop_size, **params):
+    """
+    Passe l'audio dans KickDetector pas par pas ;
+    retourne (CPU en s, instants de détection, horodatages des kicks)
+    """
+    clock = SimulatedClock()
+    recorder = _KickRecorder(clock)
+    kd = KickDetector(_NullBoard(), recorder, None, sample_rate=sample_rate,
+                      hop_size=hop_size, debug=False, **params)
+    kd.clock = clock
+    kd._running = True
+    kd._filter_state = kd.zi.copy()
+
+    cpu_start = time.process_time()
+    for i in range(0, len(audio) - hop_size + 1, hop_size):
+        clock.set((i + hop_size) / sample_rate)
+        kd._process_block(audio[i:i + hop_size], i / sample_rate)
+    cpu = time.process_time() - cpu_start
+    return cpu, np.array(recorder.kicks), np.array(recorder.timestamps)
+
+
+def match_onsets(onsets, detections, tolerance=0.1):
+    """Associe chaque kick réel à la première détection dans [onset, onset + tolerance]"""
+    latencies = []
+    for onset in onsets:
+        idx = np.searchsorted(detections, onset)
+        if idx < len(detections) and detections[idx] - onset <= tolerance:
+            latencies.append(detections[idx] - onset)
+    return np.array(latencies)
+
+
+def agreement(reference, detections, tolerance=0.05):
+    """Part des détections de référence retrouvées (à tolerance près) dans l'autre série"""
+    if len(reference) == 0:
+        return 1.0
+    if len(detections) == 0:
+        return 0.0
+    idx = np.clip(np.searchsorted(detections, reference), 1, len(detections) - 1)
+    nearest = np.minimum(np.abs(detections[idx] - reference), np.abs(detections[idx - 1] - reference))
+    return float(np.mean(nearest <= tolerance))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KickDetector : coût CPU et latence par moteur et par pas")
+    parser.add_argument("--file", help="Enregistrement à utiliser (défaut : piste synthétique)")
+    parser.add_argument("--hops", type=int, nargs="+", default=[1024, 512, 256])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES),
+                        help="Moteurs comparés côte à côte sur le même audio")
+    parser.add_argument("--budget", type=float, default=CPU_BUDGET,
+                        help="Budget CPU (s de CPU par s d'audio)")
+    args = parser.parse_args()
+
+    if args.file:
+        audio, sample_rate = load_file(args.file)
+        onsets = None
+    else:
+        sample_rate = 44100
+        audio, onsets = synth_kick_track(sample_rate=sample_rate)
+    duration = len(audio) / sample_rate
+
+    print(f"Audio: {duration:.1f}s @ {sample_rate} Hz, budget {args.budget * 100:.1f}% CPU")
+    print(f"{'engine':>9} {'hop':>6} {'cpu/s audio':>12} {'kicks':>6} {'vs ' + args.engines[0]:>9}"
+          f" {'hits':>6} {'latency med':>12} {'latency p90':>12} {'stamp err':>10}")
+    within_budget = True
+    for hop in args.hops:
+        reference = None
+        for engine in args.engines:
+            cpu, detections, timestamps = run_detector(audio, sample_rate, hop, **ENGINES[engine])
+            if reference is None:
+                reference = detections
+            cpu_per_second = cpu / duration
+            within_budget &= cpu_per_second <= args.budget
+            line = (f"{engine:>9} {hop:>6} {cpu_per_second * 100:>11.2f}% {len(detections):>6}"
+                    f" {agreement(reference, detections) * 100:>8.0f}%")
+            if onsets is not None:
+                latencies = match_onsets(onsets, detections)
+                if len(latencies):
+                    line += (f" {len(latencies):>3}/{len(onsets):<2} {np.median(latencies) * 1000:>9.1f} ms"
+                             f" {np.percentile(latencies, 90) * 1000:>9.1f} ms")
+                # Écart entre l'horodatage transmis et l'attaque réelle la plus proche (vrais kicks seulement)
+                idx = np.clip(np.searchsorted(onsets, timestamps), 1, len(onsets) - 1)
+                errors = np.minimum(np.abs(onsets[idx] - timestamps), np.abs(onsets[idx - 1] - timestamps))
+                errors = errors[errors <= 0.1]
+                if len(errors):
+                    line += f" {np.median(errors) * 1000:>7.1f} ms"
+            print(line)
+    print("Within budget" if within_budget else "OVER BUDGET")
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
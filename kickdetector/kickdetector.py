@@ -2,8 +2,63 @@ import sounddevice as sd
 import numpy as np
 import threading
 import time
-from collections import deque
+import queue
 import scipy.signal
+from collections import deque
+from audio.clock import ShowClock, StreamTimeMapper
+from audio.windowstats import SlidingWindowStats
+
+class KickAnalysisPlan:
+    """
+    Constantes et buffers de travail de l'analyse par bloc, précalculés une fois :
+    - fenêtre de Hann
+    - indices de la bande kick dans le spectre (slice contiguë au lieu d'un masque)
+    - buffers préalloués (signal fenêtré, magnitudes, puissances, spectre précédent)
+    - méthode "goertzel" : base DFT des seuls bins de la bande kick (banc de Goertzel
+      évalué d'un coup, vectorisé sur les bins et les échantillons) au lieu du rfft complet
+    Ne dépend que de sample_rate, block_size, low_freq, high_freq et de la méthode.
+    """
+    def __init__(self, sample_rate, block_size, low_freq, high_freq, method="rfft"):
+        if method not in ("rfft", "goertzel"):
+            raise ValueError(f"Unknown spectrum method: {method}")
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.low_freq = low_freq
+        self.high_freq = high_freq
+        self.method = method
+
+        self.window = np.hanning(block_size)
+        freqs = np.fft.rfftfreq(block_size, 1 / sample_rate)
+        in_band = np.flatnonzero((freqs >= low_freq) & (freqs <= high_freq))
+        if len(in_band) > 0:
+            self.band = slice(int(in_band[0]), int(in_band[-1]) + 1)
+        else:
+            self.band = slice(0, 0)
+        n_bins = len(freqs)
+        n_band = self.band.stop - self.band.start
+
+        self.windowed = np.zeros(block_size)
+        self.mags = np.zeros(n_bins)
+        self.power = np.zeros(n_bins)
+        self.prev_band = np.zeros(n_band)   # Spectre de bande du bloc précédent (flux)
+        self.has_prev = False
+        self.flux_scratch = np.zeros(n_band)
+
+        if method == "goertzel":
+            # Lignes cos puis -sin des bins de la bande : X_k = sum(x[n] * exp(-2i*pi*k*n/N))
+            n = np.arange(block_size)
+            k = np.arange(self.band.start, self.band.stop)[:, None]
+            phase = 2 * np.pi * k * n / block_size
+            self.basis = np.vstack([np.cos(phase), -np.sin(phase)])
+            self.band_parts = np.zeros(2 * n_band)
+            self.band_mags = np.zeros(n_band)
+            # (-1)^n : bin de Nyquist, pour l'énergie totale exacte par Parseval
+            self.alternating = np.where(n % 2 == 0, 1.0, -1.0)
+
+    def matches(self, sample_rate, block_size, low_freq, high_freq, method):
+        return (self.sample_rate, self.block_size, self.low_freq, self.high_freq, self.method) == \
+               (sample_rate, block_size, low_freq, high_freq, method)
+
 
 class KickDetector:
     """
@@ -12,6 +67,13 @@ class KickDetector:
     - Détection d'onset basée sur le flux spectral
     - Seuil adaptatif basé sur l'écart-type
     - Filtrage passe-bas pour éliminer les hautes fréquences parasites
+    - Callback audio réduit à une mise en file, DSP dans un thread de détection
+    - Fenêtre d'analyse de block_size échantillons avancée par pas de hop_size
+      (détection plus tôt après l'attaque, même résolution fréquentielle)
+    - Moteur alternatif engine="envelope" sans FFT pour les machines peu puissantes :
+      pas décimé (moyenne de envelope_decimation échantillons, la bande kick reste loin de
+      la nouvelle fréquence de Nyquist), passe-bande et suivi d'enveloppe redressée au rythme
+      décimé, seuil adaptatif
     """
     def __init__(
         self,
@@ -31,12 +93,27 @@ class KickDetector:
         smoothing_alpha=0.4,     # Plus réactif
         warmup_ratio=0.3,        # Warmup plus rapide
         debug=True,
+        capture_hub=None,        # Capture partagée (AudioCaptureHub) au lieu d'un flux dédié
+        queue_size=32,           # Blocs en attente max entre le callback et le thread de détection
+        hop_size=None,           # Pas d'avance de la fenêtre (ex: 256) ; None = block_size (sans recouvrement)
+        engine="fft",            # "fft" (analyse spectrale) ou "envelope" (domaine temporel, sans FFT)
+        envelope_time=0.01,      # Constante de temps du suivi d'enveloppe (moteur envelope), en secondes
+        envelope_decimation=8,   # Moteur envelope : facteur de décimation avant filtrage (44100 -> 5512 Hz)
+        spectrum="rfft",         # Moteur fft : "rfft" (spectre complet) ou "goertzel" (bins de la bande seulement)
     ):
         self.mainboard = mainboard
         self.beatCalculator = beatCalculator
         self.input_device_index = input_device_index
+        self.capture_hub = capture_hub
+        # Horloge de la source (simulée en lecture hors-ligne)
+        self.clock = capture_hub.clock if capture_hub is not None else ShowClock()
         self.sample_rate = sample_rate
         self.block_size = block_size
+        self.hop_size = hop_size or block_size
+        if block_size % self.hop_size != 0:
+            raise ValueError(f"hop_size {self.hop_size} must divide block_size {block_size}")
+        # Nombre de pas par bloc : les historiques gardent la même durée qu'en blocs entiers
+        self.hops_per_block = block_size // self.hop_size
         self.low_freq = low_freq
         self.high_freq = high_freq
         self.baseline_window = baseline_window
@@ -48,22 +125,62 @@ class KickDetector:
         self.smoothing_alpha = smoothing_alpha
         self.warmup_ratio = warmup_ratio
         self.debug = debug
+        if engine not in ("fft", "envelope"):
+            raise ValueError(f"Unknown KickDetector engine: {engine}")
+        self.engine = engine
+        self.envelope_time = envelope_time
+        if engine == "envelope" and self.hop_size % envelope_decimation != 0:
+            raise ValueError(f"envelope_decimation {envelope_decimation} must divide hop_size {self.hop_size}")
+        self.envelope_decimation = envelope_decimation
+        self.spectrum = spectrum
 
         # Historiques pour baseline et onset detection
-        self._energy_history = deque(maxlen=baseline_window)
-        self._spectrum_history = deque(maxlen=3)  # Pour flux spectral
-        self._flux_history = deque(maxlen=10)     # Historique du flux
+        # Statistiques glissantes O(1) (moyenne, écart-type, max) au lieu de deque + np.array
+        r = self.hops_per_block
+        self._energy_history = SlidingWindowStats(baseline_window * r)
+        self._flux_history = SlidingWindowStats(10 * r)      # Historique du flux
+        self._raw_energy_history = SlidingWindowStats(4 * r)  # 4 derniers blocs d'énergie brute (détection de pics)
+        # Énergies brutes des fenêtres qui recouvrent encore la fenêtre courante (pas encore comparables)
+        self._raw_energy_delay = deque()
         self._last_trigger_ts = 0.0
         self._smoothed_energy = None
+        # Moteur envelope : crêtes d'enveloppe par pas (seuil adaptatif) et crête précédente
+        self._peak_history = SlidingWindowStats(baseline_window * r)
+        self._previous_peak = 0.0
         
         # Filtre passe-bas pour le signal d'entrée
         self._create_filters()
+        # Plan d'analyse (fenêtre, bande, buffers) reconstruit seulement si les paramètres changent
+        self._plan = KickAnalysisPlan(sample_rate, block_size, low_freq, high_freq, spectrum)
+        # Fenêtre glissante des échantillons filtrés (les block_size derniers sont contigus)
+        self._frame_buffer = np.zeros(4 * block_size)
+        self._frame_end = block_size
+        self._frame_filled = 0
 
         self._stream = None
+        self._consumer = None
         self._running = False
         self._thread = None
         self._lock = threading.Lock()
 
+        # File callback -> thread de détection : blocs copiés dans des slots préalloués,
+        # seul l'index du slot et l'horodatage transitent par la SimpleQueue
+        self.queue_size = queue_size
+        self._slots = np.zeros((queue_size, self.hop_size), dtype=np.float32)
+        self._next_slot = 0
+        self._queue = queue.SimpleQueue()
+        # Lecture hors-ligne : traitement direct dans le callback (déterministe)
+        self._inline = capture_hub is not None and not capture_hub.realtime
+
+        # Compteurs temps réel (voir get_stats)
+        self.input_overflows = 0      # Overflows signalés par PortAudio
+        self.dropped_blocks = 0       # Blocs perdus car la file était pleine
+        self.late_blocks = 0          # Blocs traités plus d'une période de pas après leur arrivée
+        self.processed_blocks = 0
+        self.callback_max_time = 0.0  # Durée max du callback (secondes)
+        self.callback_overruns = 0    # Callbacks ayant dépassé leur budget
+        self.block_period = self.hop_size / sample_rate  # Budget du callback = durée d'un pas
+
     def _create_filters(self):
         """Crée un filtre passe-bas pour éliminer les hautes fréquences"""
         nyquist = self.sample_rate / 2
@@ -71,6 +188,20 @@ class KickDetector:
         self.b, self.a = scipy.signal.butter(4, cutoff / nyquist, btype='low')
         self.zi = scipy.signal.lfilter_zi(self.b, self.a)
 
+        # Moteur envelope : passe-bande sur la bande kick, à la fréquence décimée
+        # (un seul lfilter : à 5,5 kHz le passe-bande d'ordre 4 reste bien conditionné)
+        envelope_rate = self.sample_rate / self.envelope_decimation
+        envelope_nyquist = envelope_rate / 2
+        self.band_b, self.band_a = scipy.signal.butter(
+            2, [self.low_freq / envelope_nyquist, self.high_freq / envelope_nyquist], btype='band'
+        )
+        self._band_zi = np.zeros(len(self.band_a) - 1)
+        # Suivi d'enveloppe : passe-bas à un pôle sur le signal redressé
+        c = 1 - np.exp(-1 / (self.envelope_time * envelope_rate))
+        self.env_b = np.array([c])
+        self.env_a = np.array([1.0, c - 1])
+        self._env_zi = np.zeros(1)
+
     def start(self):
         if self._running:
             return
@@ -80,6 +211,10 @@ class KickDetector:
 
     def stop(self):
         self._running = False
+        self._queue.put(None)  # Réveille le thread de détection bloqué sur la file
+        if self._consumer is not None:
+            self.capture_hub.unregister(self._consumer)
+            self._consumer = None
         if self._stream:
             try:
                 self._stream.close()
@@ -87,8 +222,16 @@ class KickDetector:
                 pass
 
     def update_params(self, trigger_factor=None, refractory_time=None, 
-                     min_band_energy=None, smoothing_alpha=None, onset_threshold=None):
+                     min_band_energy=None, smoothing_alpha=None, onset_threshold=None,
+                     low_freq=None, high_freq=None):
         with self._lock:
+            if low_freq is not None:
+                self.low_freq = low_freq
+            if high_freq is not None:
+                self.high_freq = high_freq
+            if not self._plan.matches(self.sample_rate, self.block_size, self.low_freq, self.high_freq, self.spectrum):
+                self._plan = KickAnalysisPlan(self.sample_rate, self.block_size, self.low_freq, self.high_freq, self.spectrum)
+                self._create_filters()  # Le passe-bande du moteur envelope suit la bande kick
             if trigger_factor is not None:
                 self.trigger_factor = trigger_factor
             if refractory_time is not None:
@@ -100,151 +243,286 @@ class KickDetector:
             if onset_threshold is not None:
                 self.onset_threshold = onset_threshold
 
-    def _spectral_flux(self, current_spectrum, previous_spectrum):
+    def _spectral_flux(self, current_spectrum, previous_spectrum, scratch=None):
         """Calcule le flux spectral pour détecter les onsets"""
         if previous_spectrum is None:
             return 0
-        diff = current_spectrum - previous_spectrum
+        diff = np.subtract(current_spectrum, previous_spectrum, out=scratch)
         # Somme seulement les augmentations (half-wave rectification)
-        flux = np.sum(np.maximum(diff, 0))
+        flux = float(np.sum(np.maximum(diff, 0, out=diff)))
         return flux
 
+    def start_audio_recording(self):
+        """Branche le callback sur la capture partagée ou ouvre un flux dédié"""
+        self._running = True
+        self._filter_state = self.zi.copy()
+        if self.capture_hub is not None:
+            # Flux partagé : un seul InputStream pour tous les analyseurs
+            self._consumer = self.capture_hub.register(
+                self._audio_callback, sample_rate=self.sample_rate, block_size=self.hop_size
+            )
+        else:
+            self._stream = sd.InputStream(
+                device=self.input_device_index,
+                channels=1,
+                samplerate=self.sample_rate,
+                blocksize=self.hop_size,
+                callback=StreamTimeMapper(self.clock, self.sample_rate).wrap(self._audio_callback)
+            )
+            self._stream.start()
+
     def _run_stream(self):
-        hann = np.hanning(self.block_size)
-        filter_state = self.zi.copy()
+        try:
+            self.start_audio_recording()
+            self._detection_loop()
+        except Exception as e:
+            print(f"KickDetector stream error: {e}")
+            self._running = False
 
-        def callback(indata, frames, tinfo, status):
-            nonlocal filter_state
-            
-            if not self._running:
-                return
-            if status and self.debug:
+    def _detection_loop(self):
+        """Thread de détection : dort sur la file remplie par le callback audio (None = arrêt)"""
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                break
+            slot, adc_time, arrival = item
+            if time.perf_counter() - arrival > self.block_period:
+                self.late_blocks += 1
+            self._process_block(self._slots[slot], adc_time)
+
+    def _audio_callback(self, indata, frames, tinfo, status):
+        """Callback temps réel : copie du bloc et mise en file, aucun traitement DSP"""
+        t0 = time.perf_counter()
+        if not self._running:
+            return
+        if status:
+            if status.input_overflow:
+                self.input_overflows += 1
+            if self.debug:
                 print("KickDetector status:", status)
+        if frames != self.hop_size:
+            return
+
+        if self._inline:
+            self._process_block(indata[:, 0].astype(np.float32), tinfo.inputBufferAdcTime)
+            return
 
-            mono = indata[:, 0].astype(np.float32)
-            if len(mono) != self.block_size:
-                return
+        if self._queue.qsize() >= self.queue_size - 1:
+            # Le thread de détection ne suit plus : on perd le bloc plutôt que de bloquer l'audio
+            self.dropped_blocks += 1
+        else:
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.queue_size
+            self._slots[slot] = indata[:, 0]
+            self._queue.put((slot, tinfo.inputBufferAdcTime, t0))
 
-            # Filtrage passe-bas
-            filtered, filter_state = scipy.signal.lfilter(
-                self.b, self.a, mono, zi=filter_state
-            )
+        elapsed = time.perf_counter() - t0
+        if elapsed > self.callback_max_time:
+            self.callback_max_time = elapsed
+        if elapsed > self.block_period:
+            self.callback_overruns += 1
 
-            # FFT avec fenêtrage
-            fft = np.fft.rfft(filtered * hann)
-            mags = np.abs(fft)
-            freqs = np.fft.rfftfreq(len(filtered), 1 / self.sample_rate)
+    def get_stats(self):
+        """Compteurs pour vérifier que le callback reste dans son budget"""
+        return {
+            'processed_blocks': self.processed_blocks,
+            'pending_blocks': self._queue.qsize(),
+            'input_overflows': self.input_overflows,
+            'dropped_blocks': self.dropped_blocks,
+            'late_blocks': self.late_blocks,
+            'callback_max_time': self.callback_max_time,
+            'callback_overruns': self.callback_overruns,
+            'callback_budget': self.block_period,
+        }
+
+    def _process_block(self, mono, adc_time):
+        """Détection sur un bloc (thread de détection, ou callback en hors-ligne)"""
+        self.processed_blocks += 1
+        if self.engine == "envelope":
+            self._process_envelope(mono, adc_time)
+            return
+
+        # Filtrage passe-bas
+        filtered, self._filter_state = scipy.signal.lfilter(
+            self.b, self.a, mono, zi=self._filter_state
+        )
+
+        # Avance la fenêtre d'analyse d'un pas (recopie de la fin en début de buffer quand il est plein)
+        buf = self._frame_buffer
+        end = self._frame_end
+        n = len(filtered)
+        if end + n > len(buf):
+            keep = self.block_size - n
+            buf[:keep] = buf[end - keep:end]
+            end = keep
+        buf[end:end + n] = filtered
+        end += n
+        self._frame_end = end
+        self._frame_filled += n
+        if self._frame_filled < self.block_size:
+            return  # Première fenêtre pas encore complète
+        frame = buf[end - self.block_size:end]
+
+        plan = self._plan
+        windowed = np.multiply(frame, plan.window, out=plan.windowed)
+        if plan.method == "goertzel":
+            # Bins de la bande seulement (2 produits scalaires par bin)
+            np.dot(plan.basis, windowed, out=plan.band_parts)
+            n_band = len(plan.band_mags)
+            band_mags = np.hypot(plan.band_parts[:n_band], plan.band_parts[n_band:], out=plan.band_mags)
+            band_energy = float(np.dot(band_mags, band_mags))
+            # Parseval sur le spectre unilatéral : (N * somme(x²) + |X_0|² + |X_N/2|²) / 2
+            dc = float(windowed.sum())
+            nyquist = float(np.dot(windowed, plan.alternating))
+            total_energy = (plan.block_size * float(np.dot(windowed, windowed)) + dc * dc + nyquist * nyquist) / 2 + 1e-9
+        else:
+            # FFT avec fenêtrage (buffers du plan : seule la sortie de la FFT est allouée)
+            fft = np.fft.rfft(windowed)
+            mags = np.abs(fft, out=plan.mags)
+            power = np.square(mags, out=plan.power)
+            band_mags = mags[plan.band]
 
             # Énergie dans la bande kick
-            band_mask = (freqs >= self.low_freq) & (freqs <= self.high_freq)
-            band_energy = float(np.sum(mags[band_mask] ** 2))
+            band_energy = float(power[plan.band].sum())
             
             # Énergie totale du signal pour normalisation
-            total_energy = float(np.sum(mags ** 2)) + 1e-9
-            normalized_energy = band_energy / total_energy
-
-            # Seuil minimal absolu
-            if band_energy < self.min_band_energy:
-                return
-
-            # Lissage exponentiel
-            if self._smoothed_energy is None:
-                self._smoothed_energy = normalized_energy
-            else:
-                a = self.smoothing_alpha
-                self._smoothed_energy = a * normalized_energy + (1 - a) * self._smoothed_energy
-
-            # Stockage pour baseline
-            self._energy_history.append(self._smoothed_energy)
+            total_energy = float(power.sum()) + 1e-9
+        normalized_energy = band_energy / total_energy
+
+        # Seuil minimal absolu
+        if band_energy < self.min_band_energy:
+            return
+
+        # Lissage exponentiel
+        if self._smoothed_energy is None:
+            self._smoothed_energy = normalized_energy
+        else:
+            # Coefficient ramené au pas pour garder la même constante de temps qu'en blocs entiers
+            a = 1 - (1 - self.smoothing_alpha) ** (1 / self.hops_per_block)
+            self._smoothed_energy = a * normalized_energy + (1 - a) * self._smoothed_energy
+
+        # Stockage pour baseline
+        self._energy_history.push(self._smoothed_energy)
+        
+        # Ajout : stocker aussi l'énergie brute pour la détection de pics
+        # (maximum des 4 blocs précédents relevé avant d'ajouter la valeur courante ; les
+        # fenêtres qui recouvrent la fenêtre courante attendent dans _raw_energy_delay)
+        r = self.hops_per_block
+        max_recent = self._raw_energy_history.max() if len(self._raw_energy_history) >= 4 * r else None
+        self._raw_energy_delay.append(normalized_energy)
+        if len(self._raw_energy_delay) >= r:
+            self._raw_energy_history.push(self._raw_energy_delay.popleft())
+
+        # Détection onset basée sur le flux spectral
+        onset_detected = False
+        flux = 0
+        if plan.has_prev:
+            flux = self._spectral_flux(band_mags, plan.prev_band, plan.flux_scratch)
+            self._flux_history.push(flux)
             
-            # Ajout : stocker aussi l'énergie brute pour la détection de pics
-            if not hasattr(self, '_raw_energy_history'):
-                self._raw_energy_history = deque(maxlen=10)
-            self._raw_energy_history.append(normalized_energy)
-
-            # Détection onset basée sur le flux spectral
-            onset_detected = False
-            flux = 0
-            if len(self._spectrum_history) > 0:
-                flux = self._spectral_flux(
-                    mags[band_mask], 
-                    self._spectrum_history[-1] if self._spectrum_history else None
-                )
-                self._flux_history.append(flux)
+            # Seuil adaptatif pour le flux basé sur son historique
+            if len(self._flux_history) >= 5 * r:
+                flux_mean = self._flux_history.mean()
+                flux_std = self._flux_history.std() + 1e-9
+                flux_threshold = flux_mean + self.onset_threshold * flux_std
                 
-                # Seuil adaptatif pour le flux basé sur son historique
-                if len(self._flux_history) >= 5:
-                    flux_array = np.array(list(self._flux_history))
-                    flux_mean = np.mean(flux_array)
-                    flux_std = np.std(flux_array) + 1e-9
-                    flux_threshold = flux_mean + self.onset_threshold * flux_std
-                    
-                    if flux > flux_threshold:
-                        onset_detected = True
-
-            # Stockage du spectre pour onset detection
-            self._spectrum_history.append(mags[band_mask].copy())
-
-            # Warmup
-            if len(self._energy_history) < int(self.baseline_window * self.warmup_ratio):
-                return
-
-            # Calcul du seuil avec écart-type (plus robuste que MAD)
-            history_arr = np.array(list(self._energy_history), dtype=np.float32)
-            mean_energy = float(np.mean(history_arr))
-            std_energy = float(np.std(history_arr)) + 1e-9
-            threshold = mean_energy + self.trigger_factor * std_energy
+                if flux > flux_threshold:
+                    onset_detected = True
 
-            if self.debug:
-                print(f"band={band_energy:8.1f} norm={normalized_energy:6.3f} "
-                      f"smooth={self._smoothed_energy:6.3f} mean={mean_energy:6.3f} "
-                      f"std={std_energy:6.3f} thr={threshold:6.3f} "
-                      f"flux={flux:6.1f} onset={onset_detected}")
+        # Stockage du spectre pour onset detection
+        plan.prev_band[:] = band_mags
+        plan.has_prev = True
 
-             # LOGIQUE DE DÉTECTION MODIFIÉE : OU au lieu de ET
-            energy_trigger = self._smoothed_energy > threshold
-            
-            # Détection alternative : pic d'énergie brute (sans lissage) - CORRIGÉE
-            raw_energy_trigger = False
-            if len(self._raw_energy_history) >= 5:
-                recent_raw = list(self._raw_energy_history)[-5:]  # 5 dernières valeurs d'énergie brute
-                max_recent = max(recent_raw[:-1])  # Maximum des 4 précédentes
-                if normalized_energy > max_recent * 1.25:  # RÉDUIT de 1.3 à 1.25 (plus sensible)
-                    raw_energy_trigger = True
-            
-            # Option 1: Déclenchement par énergie OU onset (plus permissif)
-            if self.use_onset_detection:
-                trigger_condition = energy_trigger or onset_detected or raw_energy_trigger
-            else:
-                trigger_condition = energy_trigger or raw_energy_trigger
-
-            if trigger_condition:
-                now = time.time()
-                if now - self._last_trigger_ts >= self.refractory_time:
-                    self._last_trigger_ts = now
-                    try:
-                        self.mainboard.activate_kick()
-                        self.beatCalculator.put_kick_timestamp()  # Met à jour avec le timestamp du kick
-                        if self.debug:
-                            trigger_type = []
-                            if energy_trigger: trigger_type.append("ENERGY")
-                            if onset_detected: trigger_type.append("ONSET") 
-                            if raw_energy_trigger: trigger_type.append("RAW")
-                            print(f"🥁 KICK DETECTED! ({'+'.join(trigger_type)}) raw={raw_energy_trigger}")
-                    except Exception as e:
-                        print(f"KickDetector activate_kick error: {e}")
+        # Warmup
+        if len(self._energy_history) < int(self.baseline_window * r * self.warmup_ratio):
+            return
+
+        # Calcul du seuil avec écart-type (plus robuste que MAD)
+        mean_energy = self._energy_history.mean()
+        std_energy = self._energy_history.std() + 1e-9
+        threshold = mean_energy + self.trigger_factor * std_energy
+
+        if self.debug:
+            print(f"band={band_energy:8.1f} norm={normalized_energy:6.3f} "
+                  f"smooth={self._smoothed_energy:6.3f} mean={mean_energy:6.3f} "
+                  f"std={std_energy:6.3f} thr={threshold:6.3f} "
+                  f"flux={flux:6.1f} onset={onset_detected}")
+
+         # LOGIQUE DE DÉTECTION MODIFIÉE : OU au lieu de ET
+        energy_trigger = self._smoothed_energy > threshold
+        
+        # Détection alternative : pic d'énergie brute (sans lissage) - CORRIGÉE
+        raw_energy_trigger = False
+        if max_recent is not None:
+            if normalized_energy > max_recent * 1.25:  # RÉDUIT de 1.3 à 1.25 (plus sensible)
+                raw_energy_trigger = True
+        
+        # Option 1: Déclenchement par énergie OU onset (plus permissif)
+        if self.use_onset_detection:
+            trigger_condition = energy_trigger or onset_detected or raw_energy_trigger
+        else:
+            trigger_condition = energy_trigger or raw_energy_trigger
+
+        if trigger_condition:
+            trigger_type = []
+            if energy_trigger: trigger_type.append("ENERGY")
+            if onset_detected: trigger_type.append("ONSET") 
+            if raw_energy_trigger: trigger_type.append("RAW")
+            self._trigger_kick('+'.join(trigger_type), self._onset_time(filtered, adc_time))
+
+    def _onset_time(self, samples, adc_time, level=None, sample_rate=None):
+        """
+        Heure de capture de l'attaque dans le pas courant : premier échantillon dont
+        l'amplitude atteint level (par défaut la moitié du maximum du pas)
+        """
+        magnitude = np.abs(samples)
+        if level is None:
+            level = 0.5 * magnitude.max()
+        index = int(np.argmax(magnitude >= level))
+        return adc_time + index / (sample_rate or self.sample_rate)
+
+    def _process_envelope(self, mono, adc_time):
+        """Moteur sans FFT : décimation, passe-bande, enveloppe redressée, crête comparée à un seuil adaptatif"""
+        decimation = self.envelope_decimation
+        decimated = mono.reshape(-1, decimation).mean(axis=1)
+        band, self._band_zi = scipy.signal.lfilter(self.band_b, self.band_a, decimated, zi=self._band_zi)
+        envelope, self._env_zi = scipy.signal.lfilter(
+            self.env_b, self.env_a, np.abs(band, out=band), zi=self._env_zi
+        )
+        peak = float(envelope.max())
+        previous_peak = self._previous_peak
+        self._previous_peak = peak
+
+        history = self._peak_history
+        ready = len(history) >= int(self.baseline_window * self.hops_per_block * self.warmup_ratio)
+        threshold = history.mean() + self.trigger_factor * history.std()
+        history.push(peak)
+        if not ready:
+            return
+
+        if self.debug:
+            print(f"peak={peak:8.4f} thr={threshold:8.4f}")
+
+        # Front montant au-dessus du seuil adaptatif
+        if peak > threshold and peak > previous_peak * 1.25:
+            # Datation : premier échantillon de l'enveloppe au-dessus du seuil
+            self._trigger_kick("ENVELOPE", self._onset_time(envelope, adc_time, threshold,
+                                                            self.sample_rate / decimation))
 
+    def _trigger_kick(self, trigger_label, timestamp=None):
+        """
+        Déclenche un kick (commun aux moteurs fft et envelope), avec période réfractaire.
+        timestamp : heure de capture de l'attaque (horloge de spectacle), à défaut l'heure actuelle
+        """
+        if timestamp is None:
+            timestamp = self.clock.now()
+        if timestamp - self._last_trigger_ts < self.refractory_time:
+            return
+        self._last_trigger_ts = timestamp
         try:
-            self._stream = sd.InputStream(
-                device=self.input_device_index,
-                channels=1,
-                samplerate=self.sample_rate,
-                blocksize=self.block_size,
-                callback=callback
-            )
-            self._stream.start()
-            while self._running:
-                time.sleep(0.1)
+            self.mainboard.activate_kick()
+            self.beatCalculator.put_kick_timestamp(timestamp)  # Heure de l'onset, pas de la détection
+            if self.debug:
+                print(f"🥁 KICK DETECTED! ({trigger_label})")
         except Exception as e:
-            print(f"KickDetector stream error: {e}")
-            self._running = False
\ No newline at end of file
+            print(f"KickDetector activate_kick error: {e}")
@@ -1,9 +1,9 @@
-import time
 from artnet_sender.artnet_sender import ArtNetSender
 from mainboard.mainboard import MainBoard
+from mainboard.framescheduler import FrameScheduler
 from views.main_view import MainView
 from kickdetector.kickdetector import KickDetector
-from audio.output import AudioPassthrough
+from audio.capture import AudioCaptureHub
 from audio.beatcalculator import BeatCalculator  
 from audio.energydetector import EnergyDetector
 
@@ -11,8 +11,20 @@ def app_logic(input_device_index, output_device_index):
     print("App running...")
     artnet = ArtNetSender("192.168.18.28", 0, 6454)
     
+    # Capture audio partagée : un seul flux pour tous les analyseurs (+ monitoring si output)
     if input_device_index is not None:
-        beatCalculator = BeatCalculator(mainboard, input_device_index)
+        capture = AudioCaptureHub(
+            input_device_index=input_device_index,
+            sample_rate=44100,
+            block_size=256,
+            output_device_index=output_device_index,
+            monitor_gain=1.0
+        )
+    else:
+        capture = None
+    
+    if input_device_index is not None:
+        beatCalculator = BeatCalculator(mainboard, input_device_index, capture_hub=capture)
         beatCalculator.start()  # Démarrer le thread BeatCalculator
         print("BeatCalculator thread started...")
     else:
@@ -20,24 +32,15 @@ def app_logic(input_device_index, output_device_index):
         print("Aucun périphérique input sélectionné. Pas de BeatCalculator.")
 
     if input_device_index is not None:
-        energyDetector = EnergyDetector(mainboard, input_device_index)
+        energyDetector = EnergyDetector(mainboard, input_device_index, capture_hub=capture)
         energyDetector.start()
         print("EnergyDetector thread started...")
     else:
         energyDetector = None
         print("Aucun périphérique input sélectionné. Pas d'EnergyDetector.")
         
-    # Audio monitoring (input -> output)
+    # Audio monitoring (input -> output) : assuré par le flux duplex de la capture partagée
     if input_device_index is not None and output_device_index is not None:
-        monitor = AudioPassthrough(
-            input_device_index=input_device_index,
-            output_device_index=output_device_index,
-            samplerate=44100,
-            blocksize=512,
-            channels=1,
-            gain=1.0
-        )
-        monitor.start()
         print("Monitoring audio input -> output...")
     else:
         print("Pas de monitor (input ou output manquant).")
@@ -53,16 +56,26 @@ def app_logic(input_device_index, output_device_index):
             onset_threshold=0.15,    # Plus sensible
             smoothing_alpha=0.4,     # Plus réactif
             use_onset_detection=True, # Active la détection d'onset
-            debug=False   
+            hop_size=256,            # Fenêtre de 1024 avancée tous les 256 échantillons (~6 ms)
+            debug=False,
+            capture_hub=capture
         )
         kd.start()
     else:
         print("Aucun périphérique input sélectionné. Pas de détection kick.")
 
-    while True:
+    # Ouvre le flux partagé (les analyseurs s'y branchent en démarrant)
+    if capture is not None:
+        capture.start()
+
+    # Rendu + envoi Art-Net à cadence fixe (~44 images/s, le débit d'un univers DMX) :
+    # seuls les canaux modifiés sont réécrits, la trame part sur changement ou en keepalive
+    def render_frame():
         mainboard.update_board()
-        artnet.send_fixtures(mainboard.board)
-        time.sleep(0.002)  # 2 ms (réduction légère charge CPU)
+        artnet.send_channels(mainboard.take_changed_channels())
+
+    scheduler = FrameScheduler(fps=44)
+    scheduler.run(render_frame)
 
 if __name__ == "__main__":
     mainboard = MainBoard(p_theme="random", p_style="random")
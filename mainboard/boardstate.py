@@ -0,0 +1,168 @@
+from collections.abc import Mapping, Sequence
+import copy
+import numpy as np
+
+
+class BoardState:
+    """
+    État de toutes les fixtures en tableaux NumPy, une ligne par fixture (structure of arrays) :
+    le MainBoard calcule fondus, changements de couleur et décroissance des kicks de tout le board
+    en quelques opérations vectorisées au lieu d'une boucle sur des dicts.
+    Les couleurs sont des indices dans color_names, les valeurs RGB des tableaux (fixtures x 3).
+    """
+    # Tableaux de l'état (copiés dans les snapshots) ; noms et canaux DMX sont fixes et partagés
+    ARRAYS = (
+        "dimmer", "sequence_color", "sequence_next_color", "sequence_intensity", "sequence_color_start_time",
+        "sequence_color_duration", "sequence_fade_duration", "sequence_beat_index", "sequence_rgb",
+        "sequence_next_event", "sequence_fade_phase",
+        "kick_respond", "kick_color", "kick_activated", "kick_start_time", "kick_duration", "kick_rgb",
+        "repos_activated", "repos_rgb",
+    )
+
+    def __init__(self, fixtures, color_names):
+        """fixtures : liste de dicts {"name", "kick_respond", "dimmer", "red", "green", "blue"} (canaux DMX)"""
+        n = len(fixtures)
+        self.color_names = list(color_names)
+        # Partie fixe : noms et canaux DMX ("NA" si la fixture n'a pas le canal)
+        self.names = [fixture["name"] for fixture in fixtures]
+        self.dimmer_ids = [fixture["dimmer"] for fixture in fixtures]
+        self.rgb_ids = [(fixture["red"], fixture["green"], fixture["blue"]) for fixture in fixtures]
+        self.dimmer = np.full(n, 255, dtype=np.int64)
+
+        # Séquence
+        self.sequence_color = np.zeros(n, dtype=np.int64)       # couleur actuelle
+        self.sequence_next_color = np.zeros(n, dtype=np.int64)  # couleur vers laquelle on fond
+        self.sequence_intensity = np.ones(n, dtype=np.float64)
+        self.sequence_color_start_time = np.zeros(n, dtype=np.float64)
+        self.sequence_color_duration = np.ones(n, dtype=np.float64)
+        self.sequence_fade_duration = np.full(n, 0.5, dtype=np.float64)
+        self.sequence_beat_index = np.full(n, np.nan)           # NaN tant que la fixture n'a pas suivi un beat
+        self.sequence_rgb = np.full((n, 3), 255, dtype=np.int64)
+        # Prochain événement de chaque fixture, calculé quand la couleur ou les durées changent :
+        # heure du début du fondu (sans horloge de beat), phase du beat où commence le fondu (inf : pas de fondu)
+        self.sequence_next_event = np.zeros(n, dtype=np.float64)
+        self.sequence_fade_phase = np.full(n, np.inf)
+
+        # Kick
+        self.kick_respond = np.array([bool(fixture["kick_respond"]) for fixture in fixtures], dtype=bool)
+        self.kick_color = np.zeros(n, dtype=np.int64)
+        self.kick_activated = np.zeros(n, dtype=bool)
+        self.kick_start_time = np.full(n, np.nan)               # NaN avant le premier kick
+        self.kick_duration = np.full(n, 0.2, dtype=np.float64)
+        self.kick_rgb = np.zeros((n, 3), dtype=np.int64)
+
+        # Repos
+        self.repos_activated = np.zeros(n, dtype=bool)
+        self.repos_rgb = np.full((n, 3), 10, dtype=np.int64)
+
+        self.time = 0.0   # Heure de l'image (snapshots)
+        self.frame = 0    # Numéro de l'image (snapshots)
+
+    def __len__(self):
+        return len(self.names)
+
+    def copy(self):
+        """Copie indépendante des tableaux (les listes fixes sont partagées)"""
+        other = copy.copy(self)
+        for name in self.ARRAYS:
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    def set_writeable(self, writeable):
+        """Verrouille (ou déverrouille) les tableaux : un snapshot publié est en lecture seule"""
+        for name in self.ARRAYS:
+            getattr(self, name).flags.writeable = writeable
+
+
+def _value(array_name, cast):
+    return lambda state, i: cast(getattr(state, array_name)[i])
+
+
+def _color_name(array_name):
+    return lambda state, i: state.color_names[getattr(state, array_name)[i]]
+
+
+def _channel(array_name, column):
+    return lambda state, i: {"id": state.rgb_ids[i][column], "value": int(getattr(state, array_name)[i, column])}
+
+
+def _optional_float(array_name):
+    def read(state, i):
+        value = getattr(state, array_name)[i]
+        return None if np.isnan(value) else float(value)
+    return read
+
+
+def _optional_int(array_name):
+    def read(state, i):
+        value = getattr(state, array_name)[i]
+        return None if np.isnan(value) else int(value)
+    return read
+
+
+# Clés des anciens dicts de fixture -> lecture dans le BoardState
+_FIXTURE_FIELDS = {
+    "name": lambda state, i: state.names[i],
+    "current_type": lambda state, i: "sequence",
+    "dimmer": lambda state, i: {"id": state.dimmer_ids[i], "value": int(state.dimmer[i])},
+    "sequence_red": _channel("sequence_rgb", 0),
+    "sequence_green": _channel("sequence_rgb", 1),
+    "sequence_blue": _channel("sequence_rgb", 2),
+    "sequence_current_color": _color_name("sequence_color"),
+    "sequence_intensity": _value("sequence_intensity", float),
+    "sequence_color_start_time": _value("sequence_color_start_time", float),
+    "sequence_color_duration": _value("sequence_color_duration", float),
+    "sequence_fade_duration": _value("sequence_fade_duration", float),
+    "sequence_beat_index": _optional_int("sequence_beat_index"),
+    "sequence_next_color": _color_name("sequence_next_color"),
+    "kick_respond": _value("kick_respond", bool),
+    "kick_current_color": _color_name("kick_color"),
+    "kick_activated": _value("kick_activated", bool),
+    "kick_start_time": _optional_float("kick_start_time"),
+    "kick_duration": _value("kick_duration", float),
+    "kick_red": _channel("kick_rgb", 0),
+    "kick_green": _channel("kick_rgb", 1),
+    "kick_blue": _channel("kick_rgb", 2),
+    "repos_activated": _value("repos_activated", bool),
+    "repos_red": _channel("repos_rgb", 0),
+    "repos_green": _channel("repos_rgb", 1),
+    "repos_blue": _channel("repos_rgb", 2),
+}
+
+
+class FixtureView(Mapping):
+    """
+    Vue en lecture seule d'une fixture du BoardState avec les clés des anciens dicts
+    (fixture["sequence_red"]["value"], ...) pour l'interface et l'envoi Art-Net.
+    Chaque lecture renvoie la valeur courante ; les dicts de canal sont des copies.
+    """
+    __slots__ = ("_state", "_index")
+
+    def __init__(self, state, index):
+        self._state = state
+        self._index = index
+
+    def __getitem__(self, key):
+        return _FIXTURE_FIELDS[key](self._state, self._index)
+
+    def __iter__(self):
+        return iter(_FIXTURE_FIELDS)
+
+    def __len__(self):
+        return len(_FIXTURE_FIELDS)
+
+    def __repr__(self):
+        return f"FixtureView({dict(self)!r})"
+
+
+class BoardView(Sequence):
+    """Liste en lecture seule des FixtureView du board (mainboard.board) ; state : le BoardState lu"""
+    def __init__(self, state):
+        self.state = state
+        self._fixtures = [FixtureView(state, index) for index in range(len(state))]
+
+    def __getitem__(self, index):
+        return self._fixtures[index]
+
+    def __len__(self):
+        return len(self._fixtures)
@@ -0,0 +1,73 @@
+import time
+from audio.clock import ShowClock
+from audio.windowstats import SlidingWindowStats
+
+
+class FrameScheduler:
+    """
+    Cadence fixe pour la boucle rendu + sortie DMX (~44 images/s, ce qu'un univers DMX transporte) :
+    - échéances sur l'horloge de spectacle (perf_counter), espacées de 1/fps sans cumul de dérive
+    - attente précise : sleep jusqu'à spin_time avant l'échéance, puis courte attente active
+    - en retard de plus d'une image, les images manquées sont sautées (pas de rafale de rattrapage)
+    - statistiques : retard au réveil (jitter), durée des images, dépassements et images sautées
+    """
+    def __init__(self, fps=44.0, clock=None, spin_time=0.001, stats_window=440):
+        self.clock = clock if clock is not None else ShowClock()
+        self.interval = 1.0 / fps
+        self.spin_time = spin_time
+        self._deadline = None      # Échéance de la prochaine image
+        self._frame_start = None   # Début de l'image en cours
+        self.frames = 0            # Images rendues
+        self.skipped = 0           # Images sautées (retard de plus d'une image)
+        self.overruns = 0          # Images dont le rendu a dépassé l'intervalle
+        self.jitter = SlidingWindowStats(stats_window)      # Retard du réveil sur l'échéance (s)
+        self.frame_times = SlidingWindowStats(stats_window) # Durée de rendu des images (s)
+
+    def wait(self):
+        """Attend l'échéance de la prochaine image ; retourne l'heure de cette échéance"""
+        now = self.clock.now()
+        if self._frame_start is not None:
+            frame_time = now - self._frame_start
+            self.frame_times.push(frame_time)
+            if frame_time > self.interval:
+                self.overruns += 1
+        if self._deadline is None:
+            self._deadline = now
+
+        if now >= self._deadline + self.interval:
+            # En retard d'au moins une image : on saute celles qui sont passées
+            missed = int((now - self._deadline) / self.interval)
+            self.skipped += missed
+            self._deadline += missed * self.interval
+        else:
+            remaining = self._deadline - now - self.spin_time
+            if remaining > 0:
+                time.sleep(remaining)
+            while self.clock.now() < self._deadline:
+                pass  # Dernière milliseconde : la résolution de sleep() ne suffit pas
+
+        deadline = self._deadline
+        self._frame_start = self.clock.now()
+        self.jitter.push(self._frame_start - deadline)
+        self.frames += 1
+        self._deadline += self.interval
+        return deadline
+
+    def run(self, render, stop_event=None):
+        """Appelle render() à chaque image jusqu'à stop_event (indéfiniment sans stop_event)"""
+        while stop_event is None or not stop_event.is_set():
+            self.wait()
+            render()
+
+    def stats(self):
+        """Statistiques de cadence (temps en millisecondes)"""
+        return {
+            "fps": 1.0 / self.interval,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "overruns": self.overruns,
+            "jitter_mean_ms": self.jitter.mean() * 1000,
+            "jitter_max_ms": self.jitter.max() * 1000,
+            "frame_time_mean_ms": self.frame_times.mean() * 1000,
+            "frame_time_max_ms": self.frame_times.max() * 1000,
+        }
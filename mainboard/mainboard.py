@@ -1,22 +1,31 @@
 import json
-from time import time
 import random
+from collections import deque
+import numpy as np
+from audio.clock import ShowClock
+from audio.beatclock import BeatClock
+from audio.levels import VERY_LOW, LOW, MEDIUM, HIGH, level_name
+from audio.intensity import IntensityEnvelope
+from mainboard.boardstate import BoardState, BoardView
+from mainboard.palette import Palette, compile_themes
 
 class MainBoard:
-    def __init__(self, p_theme="random", p_style="random"):
-        self.board = [] #création du tableau vide
-        self.last_update_time = time()  # Initialisation du temps de la dernière mise à jour
+    def __init__(self, p_theme="random", p_style="random", clock=None):
+        self.clock = clock if clock is not None else ShowClock() #horloge (simulée en lecture hors-ligne)
+        self.beat_clock = BeatClock() #horloge de beat (PLL), recalée par le BeatCalculator
+        self.intensity_envelope = IntensityEnvelope() #intensité continue 0-1, cible fixée par l'EnergyDetector
+        self.min_sequence_intensity = 0.1 #intensité des séquences quand l'enveloppe est à 0
+        self.last_update_time = self.clock.now()  # Initialisation du temps de la dernière mise à jour
         self.available_fixtures = {} #initialisation du dictionnaire de fixtures vide
         self.available_colors = {} #initialisation du dictionnaire de couleurs vide
         self.available_themes = {} #initialisation du dictionnaire de thèmes vide
-        self.sequence_colors = {} #initialisation de la séquence de couleurs vide
         
         self.transition_beats = 5
         self.energy_levels = {
-            'bass': "faible",
-            'mid': "faible",
-            'high': "faible",
-            'timestamp': time(),
+            'bass': LOW,
+            'mid': LOW,
+            'high': LOW,
+            'timestamp': self.clock.now(),
             'intensity': 0,
         }
         
@@ -30,42 +39,119 @@ class MainBoard:
         with open('themes/themes.json', 'r') as f:
             self.available_themes = json.load(f)
             print(self.available_themes)
-         # Initialiser sequence_colors selon le current_theme
-         
-        self.change_theme(p_theme, p_style) #thème par défaut
-        self.sequence_colors = self.available_themes[self.current_theme]["sequence"]
-        self.kick_colors = self.available_themes[self.current_theme]["kick"]
-
-        #populate the board with fixtures and their channels
-        for fixture_name, fixture in self.available_fixtures.items(): #parcours du fichier JSON
-            self.board.append({
-                                "name": fixture_name,
-                                "current_type": "sequence", #type de couleur actuelle (sequence, kick)
-                                "dimmer": {"id": self.get_channel(fixture_name, "dimmer"),"value": 255 }, #canal dimmer
-                                "sequence_red": {"id": self.get_channel(fixture_name, "red"), "value": 255},
-                                "sequence_green": {"id": self.get_channel(fixture_name, "green"), "value": 255},
-                                "sequence_blue": {"id": self.get_channel(fixture_name, "blue"), "value": 255},
-                                "sequence_current_color": self.sequence_colors[0], # première couleur du thème
-                                "sequence_intensity": 1, #intensité actuelle dans la séquence (0-100%)
-                                "sequence_color_start_time": self.last_update_time, #temps de début de la couleur actuelle
-                                "sequence_color_duration": 1, #durée par défaut en milisecondes
-                                "sequence_fade_duration": 0.5, #durée de fondu par défaut en milisecondes
-                                "sequence_next_color": self.sequence_colors[1] if len(self.sequence_colors) > 1 else self.sequence_colors[0],
-                                "kick_respond": fixture["kick_respond"], #indique si le kick est activé pour cette fixture
-                                "kick_current_color": self.kick_colors[0], # première couleur du thème
-                                "kick_activated": False, #indique si le kick est activé
-                                "kick_duration": 0.2, #durée du kick en milisecondes
-                                "kick_red": {"id": self.get_channel(fixture_name, "red"), "value": 0},
-                                "kick_green": {"id": self.get_channel(fixture_name, "green"), "value": 0},
-                                "kick_blue": {"id": self.get_channel(fixture_name, "blue"), "value": 0},
-                                "repos_activated": False, #indique si le mode repos est activé
-                                "repos_red": {"id": self.get_channel(fixture_name, "red"), "value": 10},
-                                "repos_green": {"id": self.get_channel(fixture_name, "green"), "value": 10},
-                                "repos_blue": {"id": self.get_channel(fixture_name, "blue"), "value": 10},
-                              })
+
+        # Palette (N, 3) uint8 et thèmes en indices de palette : une couleur inconnue est refusée ici
+        self.palette = Palette(self.available_colors)
+        self.themes = compile_themes(self.available_themes, self.palette)
+
+        #populate the board with fixtures and their channels (état en tableaux, une ligne par fixture)
+        self.state = BoardState([
+            {
+                "name": fixture_name,
+                "kick_respond": fixture["kick_respond"], #indique si le kick est activé pour cette fixture
+                "dimmer": self.get_channel(fixture_name, "dimmer"),
+                "red": self.get_channel(fixture_name, "red"),
+                "green": self.get_channel(fixture_name, "green"),
+                "blue": self.get_channel(fixture_name, "blue"),
+            }
+            for fixture_name, fixture in self.available_fixtures.items() #parcours du fichier JSON
+        ], self.palette.names)
+        self.state.sequence_color_start_time[:] = self.last_update_time
+        # Suivi des événements : update_board ne traite que les fixtures dont un événement est échu
+        # (début de fondu, fin de couleur) ou en cours de transition (fondu, kick)
+        self._next_sequence_event = float("-inf")  # Plus proche prochain événement (sans horloge de beat)
+        self._min_fade_phase = 0.0                  # Plus petite phase de début de fondu (horloge de beat)
+        self._synced_beat_index = None              # Beat sur lequel sont toutes les fixtures, s'il y en a un
+        self._applied_intensity = 1.0               # Intensité déjà appliquée aux RGB des séquences
+        self._kicks_active = False
+        self._touched = np.ones(len(self.state), dtype=bool)  # Fixtures dont la sortie a pu changer depuis la dernière publication
+        self._state_changed = True                            # Autre changement de l'état (débuts, durées, beats)
+        self.schedule_sequence_events()
+        # Sortie : canaux DMX (dimmer, r, g, b) de chaque fixture, 0 si absent ; valeurs de la dernière image
+        # publiée et canaux modifiés depuis la dernière lecture par la sortie (take_changed_channels)
+        self._output_channels = np.array([
+            [dimmer if dimmer != "NA" else 0, *rgb] for dimmer, rgb in zip(self.state.dimmer_ids, self.state.rgb_ids)
+        ], dtype=np.int64).reshape(-1, 4)
+        self._output_values = np.full((len(self.state), 4), -1, dtype=np.int64)
+        self._changed_channels = {}
+        # L'état n'est modifié que par le thread de rendu : les autres threads postent des commandes
+        # (heure, méthode, arguments) appliquées en début d'image (deque : ajout/retrait atomiques, sans verrou)
+        self._commands = deque()
+        # Snapshots : chaque image publiée est une copie neuve de l'état, en lecture seule, jamais réutilisée ;
+        # un lecteur (Art-Net, interface) qui garde une référence garde une image entière
+        self._published = self._new_snapshot()
+        self.apply_theme(p_theme, p_style) #thème par défaut
+        self.publish(self.last_update_time)
+
         for fixture in self.board:
             print(f"Loaded fixture: {fixture['name']} at DMX addr dim:{fixture['dimmer']['id']}, red:{fixture['sequence_red']['id']}, green:{fixture['sequence_green']['id']}, blue:{fixture['sequence_blue']['id']}")
-        self.change_theme(p_theme, p_style) #applique le thème initial
+        self.apply_theme(p_theme, p_style) #applique le thème initial
+        self.publish(self.last_update_time)
+
+    @property
+    def board(self):
+        # Vue en lecture seule (dicts de fixture) de la dernière image publiée, pour l'interface et l'Art-Net
+        return self._published[1]
+
+    def snapshot(self):
+        # BoardState (tableaux en lecture seule) de la dernière image publiée
+        return self._published[0]
+
+    def _new_snapshot(self):
+        snapshot = self.state.copy()
+        snapshot.set_writeable(False)
+        return snapshot, BoardView(snapshot)
+
+    def publish(self, p_current_time):
+        # Fin d'image : copie de l'état dans un nouveau snapshot, publié par une seule affectation
+        touched = np.flatnonzero(self._touched)
+        if len(touched) == 0 and not self._state_changed:
+            return # Rien n'a changé : le snapshot publié reste celui de la dernière modification
+        self._touched[:] = False
+        self._state_changed = False
+        self.state.time = p_current_time
+        self.state.frame += 1
+        self._published = self._new_snapshot()
+        self.collect_changed_channels(touched)
+
+    def output_values(self, p_index):
+        # Valeurs DMX (dimmer, r, g, b) des fixtures p_index : couleur du kick, sinon du repos, sinon de la séquence
+        state = self.state
+        rgb = np.where(state.kick_activated[p_index, None], state.kick_rgb[p_index],
+                       np.where(state.repos_activated[p_index, None], state.repos_rgb[p_index], state.sequence_rgb[p_index]))
+        return np.clip(np.column_stack((state.dimmer[p_index], rgb)), 0, 255)
+
+    def collect_changed_channels(self, p_index):
+        # Canaux des fixtures p_index dont la sortie a changé depuis la dernière image publiée
+        values = self.output_values(p_index)
+        changed = (values != self._output_values[p_index]).any(axis=1)
+        if not changed.any():
+            return
+        index = p_index[changed]
+        self._output_values[index] = values[changed]
+        channels = self._output_channels[index].ravel()
+        levels = values[changed].ravel()
+        valid = channels > 0
+        self._changed_channels.update(zip(channels[valid].tolist(), levels[valid].tolist()))
+
+    def take_changed_channels(self):
+        # Canaux DMX modifiés (canal -> valeur) depuis le dernier appel ; un seul consommateur (la sortie Art-Net)
+        changed = self._changed_channels
+        self._changed_channels = {}
+        return changed
+
+    def post(self, p_handler, *p_args):
+        # Commande appliquée par le thread de rendu au début de la prochaine image : p_handler(heure, *p_args)
+        self._commands.append((self.clock.now(), p_handler, p_args))
+
+    def apply_commands(self):
+        commands = self._commands
+        while commands:
+            timestamp, handler, args = commands.popleft()
+            try:
+                handler(timestamp, *args)
+            except Exception as e:
+                print(f"MainBoard command error ({handler.__name__}): {e}")
 
 
     def get_channel(self, p_fixture_name, p_channel_name):
@@ -76,7 +162,7 @@ class MainBoard:
 
     def assign_starting_color_to_fixtures(self, p_style="random", p_theme="default"):
         # assigne une couleur de départ selon le style (random, same, alternate, gradient left-right, gradient right-left, sides to center, center to sides)
-        if p_theme not in self.available_themes:
+        if p_theme not in self.themes:
             print(f"Theme {p_theme} not found. No changes made.")
             return
         if p_style not in ["random", "same", "alternate", "gradient left-right", "gradient right-left", "sides to center", "center to sides"]:
@@ -86,330 +172,313 @@ class MainBoard:
             p_style = random.choice(["same", "alternate", "gradient left-right", "gradient right-left", "sides to center", "center to sides"])
             print(f"Randomly selected style: {p_style}")
             
-        self.sequence_colors = self.available_themes[p_theme]["sequence"]
-        self.kick_colors = self.available_themes[p_theme]["kick"]
+        self.theme = self.themes[p_theme]
         
-        num_colors = len(self.sequence_colors)
-        num_fixtures = len(self.board)
+        num_colors = len(self.theme.sequence)
+        num_fixtures = len(self.state)
         
         
         if num_colors == 0 or num_fixtures == 0:
             print("No colors or fixtures available. No changes made.")
             return
+        # Position de la couleur de départ de chaque fixture dans la séquence du thème
         if p_style == "same": #toutes les fixtures ont la même couleur de départ
-            starting_color = self.sequence_colors[0]
-            for fixture in self.board:
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[1] if num_colors > 1 else self.sequence_colors[0]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
+            positions = [0] * num_fixtures
         elif p_style == "alternate": #les fixtures alternent les couleurs de départ
-            for i, fixture in enumerate(self.board):
-                starting_color = self.sequence_colors[i % num_colors]
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[(i + 1) % num_colors]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
+            positions = [i % num_colors for i in range(num_fixtures)]
         elif p_style == "gradient left-right": #gradient de gauche à droite
-            for i, fixture in enumerate(self.board):
-                color_index = int((i / (num_fixtures - 1)) * (num_colors - 1)) if num_fixtures > 1 else 0
-                starting_color = self.sequence_colors[color_index]
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[(color_index + 1) % num_colors]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
+            positions = [int((i / (num_fixtures - 1)) * (num_colors - 1)) if num_fixtures > 1 else 0 for i in range(num_fixtures)]
         elif p_style == "gradient right-left": #gradient de droite à gauche
-            for i, fixture in enumerate(self.board):
-                color_index = int(((num_fixtures - 1 - i) / (num_fixtures - 1)) * (num_colors - 1)) if num_fixtures > 1 else 0
-                starting_color = self.sequence_colors[color_index]
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[(color_index + 1) % num_colors]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-        elif p_style == "sides to center": #gradient des côtés vers le centre
-            center_index = (num_fixtures - 1) / 2
-            for i, fixture in enumerate(self.board):
-                distance_to_center = abs(i - center_index)
-                max_distance = center_index if center_index != 0 else 1
-                color_index = int(((max_distance - distance_to_center) / max_distance) * (num_colors - 1))
-                starting_color = self.sequence_colors[color_index]
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[(color_index + 1) % num_colors]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-        elif p_style == "center to sides": #gradient du centre vers les côtés
+            positions = [int(((num_fixtures - 1 - i) / (num_fixtures - 1)) * (num_colors - 1)) if num_fixtures > 1 else 0 for i in range(num_fixtures)]
+        else: #gradient des côtés vers le centre, ou du centre vers les côtés
             center_index = (num_fixtures - 1) / 2
-            for i, fixture in enumerate(self.board):
-                distance_to_center = abs(i - center_index)
-                max_distance = center_index if center_index != 0 else 1
-                color_index = int((distance_to_center / max_distance) * (num_colors - 1))
-                starting_color = self.sequence_colors[color_index]
-                fixture["sequence_current_color"] = starting_color
-                fixture["sequence_next_color"] = self.sequence_colors[(color_index + 1) % num_colors]
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * fixture["sequence_intensity"])
+            max_distance = center_index if center_index != 0 else 1
+            distances = [abs(i - center_index) for i in range(num_fixtures)]
+            if p_style == "sides to center":
+                positions = [int(((max_distance - distance) / max_distance) * (num_colors - 1)) for distance in distances]
+            else:
+                positions = [int((distance / max_distance) * (num_colors - 1)) for distance in distances]
+
+        positions = np.array(positions)
+        state = self.state
+        state.sequence_color[:] = self.theme.sequence[positions]
+        state.sequence_next_color[:] = self.theme.sequence[(positions + 1) % num_colors]
+        state.sequence_rgb[:] = self.sequence_rgb(state.sequence_color, state.sequence_intensity)
+        self._touched[:] = True
 
         #kick sera tjrs la première couleur du thème
-        for fixture in self.board:
-            fixture["kick_current_color"] = self.kick_colors[0]
-            fixture["kick_red"]["value"] = self.get_color_r(fixture["kick_current_color"])
-            fixture["kick_green"]["value"] = self.get_color_g(fixture["kick_current_color"])
-            fixture["kick_blue"]["value"] = self.get_color_b(fixture["kick_current_color"])
+        state.kick_color[:] = self.theme.kick[0]
+        state.kick_rgb[:] = self.palette.rgb[state.kick_color]
 
 
     def change_theme(self, p_theme="random", p_style="random"):
+        self.post(self._change_theme, p_theme, p_style)
+
+    def _change_theme(self, p_time, p_theme, p_style):
+        self.apply_theme(p_theme, p_style)
+
+    def apply_theme(self, p_theme="random", p_style="random"):
+        # Thread de rendu uniquement (les autres threads passent par change_theme)
         if p_theme == "random":
-            p_theme = random.choice(list(self.available_themes.keys()))
-        if p_theme not in self.available_themes:
+            p_theme = random.choice(list(self.themes.keys()))
+        if p_theme not in self.themes:
             print(f"Theme {p_theme} not found. Keeping current theme {self.current_theme}.")
             return
         self.current_theme = p_theme
         self.assign_starting_color_to_fixtures(p_style=p_style, p_theme=p_theme)
-        print(f"Changing to theme: {self.current_theme} with sequence colors: {self.sequence_colors} and kick colors: {self.kick_colors}")
+        sequence_colors = [self.palette.names[color] for color in self.theme.sequence]
+        kick_colors = [self.palette.names[color] for color in self.theme.kick]
+        print(f"Changing to theme: {self.current_theme} with sequence colors: {sequence_colors} and kick colors: {kick_colors}")
 
     
-    def get_color_r(self, p_color_name):
-        return self.available_colors[p_color_name]["red"] 
-    def get_color_g(self, p_color_name):
-        return self.available_colors[p_color_name]["green"]
-    def get_color_b(self, p_color_name):
-        return self.available_colors[p_color_name]["blue"]
-
-    def get_next_color_in_theme_by_type(self, p_theme, p_type, p_current_color):
-        sequence = self.available_themes[p_theme][p_type]
-        idx = sequence.index(p_current_color)
-        next_idx = (idx + 1) % len(sequence)
-        return sequence[next_idx]
-    
-    def update_new_color_sequence(self, p_fixture, p_new_color, p_current_time):
-        intensity = p_fixture["sequence_intensity"]
-        p_fixture["sequence_current_color"] = p_new_color
-        p_fixture["sequence_red"]["value"] = self.get_color_r(p_new_color) * intensity
-        p_fixture["sequence_green"]["value"] = self.get_color_g(p_new_color) * intensity
-        p_fixture["sequence_blue"]["value"] = self.get_color_b(p_new_color) * intensity
-        p_fixture["sequence_color_start_time"] = p_current_time
-
-    def apply_intensity_modulation(self, p_fixture):
-        intensity = p_fixture["sequence_intensity"]
-        p_fixture["sequence_red"]["value"] = int(p_fixture["sequence_red"]["value"]) #* intensity)
-        p_fixture["sequence_green"]["value"] = int(p_fixture["sequence_green"]["value"]) #* intensity)
-        p_fixture["sequence_blue"]["value"] = int(p_fixture["sequence_blue"]["value"]) #* intensity)
-
-    def update_sequence_color_to_next(self, p_fixture, p_current_color, p_new_color, p_percent):
-        # Appliquer l'intensité IMMÉDIATEMENT lors de la transition
-        intensity = p_fixture["sequence_intensity"]
-        
-        # Calculer les valeurs RGB avec intensité déjà appliquée
-        current_r = int(self.get_color_r(p_current_color) * intensity)
-        current_g = int(self.get_color_g(p_current_color) * intensity)
-        current_b = int(self.get_color_b(p_current_color) * intensity)
-        
-        new_r = int(self.get_color_r(p_new_color) * intensity)
-        new_g = int(self.get_color_g(p_new_color) * intensity)
-        new_b = int(self.get_color_b(p_new_color) * intensity)
-        
-        # Interpolation entre les couleurs déjà modulées par l'intensité
-        p_fixture["sequence_red"]["value"] = int(current_r + ((new_r - current_r) * p_percent))
-        p_fixture["sequence_green"]["value"] = int(current_g + ((new_g - current_g) * p_percent))
-        p_fixture["sequence_blue"]["value"] = int(current_b + ((new_b - current_b) * p_percent))
+    def sequence_rgb(self, p_colors, p_intensity):
+        # Valeurs RGB (entières) des couleurs p_colors modulées par l'intensité (scalaire ou par fixture)
+        return (self.palette.rgb[p_colors] * np.reshape(p_intensity, (-1, 1))).astype(np.int64)
 
-    def update_kick_color_to_next(self, p_fixture, p_current_color, p_seq_r, p_seq_g, p_seq_b, p_percent):
-        p_fixture["kick_red"]["value"] = int(self.get_color_r(p_current_color)  + (p_seq_r - self.get_color_r(p_current_color)) * p_percent)
-        p_fixture["kick_green"]["value"] = int(self.get_color_g(p_current_color)  + (p_seq_g - self.get_color_g(p_current_color)) * p_percent)
-        p_fixture["kick_blue"]["value"] = int(self.get_color_b(p_current_color)  + (p_seq_b - self.get_color_b(p_current_color)) * p_percent)
+    def get_sequence_intensity(self, p_current_time):
+        # Intensité des séquences à cet instant, lue sur l'enveloppe continue
+        envelope = self.intensity_envelope.value(p_current_time)
+        return round(self.min_sequence_intensity + (1 - self.min_sequence_intensity) * envelope, 3)
+
+    def set_sequence_intensity(self, p_intensity):
+        # Si l'intensité a changé, mettre à jour immédiatement les valeurs RGB de la couleur actuelle
+        # (même intensité pour toutes les fixtures : une comparaison suffit). L'enveloppe bouge presque
+        # à chaque image : seules les fixtures dont le RGB entier change sont marquées pour la sortie,
+        # l'intensité seule (sans effet sur le DMX) part avec la prochaine publication
+        if p_intensity == self._applied_intensity:
+            return
+        self._applied_intensity = p_intensity
+        state = self.state
+        state.sequence_intensity[:] = p_intensity
+        rgb = self.sequence_rgb(state.sequence_color, p_intensity)
+        changed = (rgb != state.sequence_rgb).any(axis=1)
+        state.sequence_rgb[changed] = rgb[changed]
+        self._touched |= changed
+
+    def schedule_sequence_events(self, p_index=slice(None)):
+        # Prochains événements des fixtures p_index (masque ou indices), à refaire quand le début
+        # de la couleur ou les durées changent : début du fondu en temps et en phase de beat
+        state = self.state
+        color_duration = state.sequence_color_duration[p_index]
+        fade_duration = state.sequence_fade_duration[p_index]
+        fade_start = color_duration * ((color_duration - fade_duration) / color_duration)
+        # Marge : l'heure échue est recalculée exactement dans update_sequence_on_time
+        state.sequence_next_event[p_index] = state.sequence_color_start_time[p_index] + np.minimum(fade_start, color_duration) - 1e-6
+        fade_part = np.minimum(fade_duration / color_duration, 1)
+        state.sequence_fade_phase[p_index] = np.where(fade_part > 0, 1 - fade_part, np.inf)
+        self._state_changed = True
+        if len(state):
+            self._next_sequence_event = state.sequence_next_event.min()
+            self._min_fade_phase = state.sequence_fade_phase.min()
+
+    def advance_sequence_colors(self, p_mask, p_start_time):
+        # Fixtures de p_mask (masque ou indices) : passage à la couleur suivante, qui commence à p_start_time
+        state = self.state
+        state.sequence_color[p_mask] = state.sequence_next_color[p_mask]
+        state.sequence_next_color[p_mask] = self.theme.next_sequence_colors(state.sequence_next_color[p_mask])
+        state.sequence_color_start_time[p_mask] = p_start_time
+        state.sequence_rgb[p_mask] = self.sequence_rgb(state.sequence_color[p_mask], state.sequence_intensity[p_mask])
+        self._touched[p_mask] = True
+        self.schedule_sequence_events(p_mask)
+
+    def update_sequence_color_to_next(self, p_mask, p_percent):
+        # Interpolation entre les couleurs actuelle et suivante, déjà modulées par l'intensité
+        state = self.state
+        intensity = state.sequence_intensity[p_mask]
+        current = self.sequence_rgb(state.sequence_color[p_mask], intensity)
+        new = self.sequence_rgb(state.sequence_next_color[p_mask], intensity)
+        state.sequence_rgb[p_mask] = (current + (new - current) * p_percent[:, None]).astype(np.int64)
+        self._touched[p_mask] = True
 
     def activate_kick(self):
-        current_time = time()
-        for fixture in self.board:
-            if fixture["kick_respond"]:
-                fixture["kick_activated"] = True
-                fixture["kick_start_time"] = current_time
-                fixture["kick_current_color"] = self.get_next_color_in_theme_by_type(self.current_theme, "kick", fixture["kick_current_color"])
-                fixture["kick_red"]["value"] = self.get_color_r(fixture["kick_current_color"])
-                fixture["kick_green"]["value"] = self.get_color_g(fixture["kick_current_color"])
-                fixture["kick_blue"]["value"] = self.get_color_b(fixture["kick_current_color"])
+        self.post(self._activate_kick)
+
+    def _activate_kick(self, current_time):
+        state = self.state
+        respond = state.kick_respond
+        state.kick_activated[respond] = True
+        state.kick_start_time[respond] = current_time
+        state.kick_color[respond] = self.theme.next_kick_colors(state.kick_color[respond])
+        state.kick_rgb[respond] = self.palette.rgb[state.kick_color[respond]]
+        self._touched[respond] = True
+        self._kicks_active = self._kicks_active or bool(respond.any())
 
     # Met à jour la durée des séquences et des fondus en fonction du BPM
     # la duration dure 2 beats, le fade 1 beat  
     def update_sequence_duration_and_fade_from_bpm(self, p_bpm, p_last_beat_timestamp=None):
+        self.post(self._update_sequence_duration_and_fade_from_bpm, p_bpm, p_last_beat_timestamp)
+
+    def _update_sequence_duration_and_fade_from_bpm(self, p_current_time, p_bpm, p_last_beat_timestamp):
         #print(f"Updating sequence durations from BPM: {p_bpm}")
         if p_bpm <= 0:
             return
         beat_duration = 60.0 / p_bpm
-        for fixture in self.board:
-            fixture["sequence_color_duration"] = beat_duration
-            fixture["sequence_fade_duration"] = beat_duration / 2
-        self.sync_sequence_to_beat_start(p_bpm, p_last_beat_timestamp) # Optionnel: synchroniser immédiatement les séquences au début du beat
-
-    def sync_sequence_to_beat_start(self, p_bpm, p_last_beat_timestamp=None):
-        current_time = time()
-        # Si on a un timestamp de beat, calculer le prochain beat prédit
-        if p_last_beat_timestamp and p_bpm > 0:
-            beat_interval = 60.0 / p_bpm
-
-            # Calculer combien de beats se sont écoulés depuis le dernier beat détecté
-            time_since_last_beat = current_time - p_last_beat_timestamp
-            beats_elapsed = time_since_last_beat / beat_interval
-            
-            # Calculer le temps jusqu'au prochain beat
-            time_to_next_beat = beat_interval - (time_since_last_beat % beat_interval)
-            next_beat_time = current_time + time_to_next_beat
-            
-            #print(f"Beat sync: {beats_elapsed:.2f} beats elapsed, next beat in {time_to_next_beat:.2f}s")
-            
-            # Nombre de beats pour la transition graduelle
-            self.transition_beats = 3  # Glisser sur 3 beats
-            
-            # Synchroniser toutes les fixtures sur le prochain beat
-        for fixture in self.board:
-            color_duration = fixture["sequence_color_duration"]
-            elapsed = current_time - fixture["sequence_color_start_time"]
-            
-            # Calculer quand cette couleur va se terminer naturellement
-            natural_end_time = fixture["sequence_color_start_time"] + color_duration
-            
-            # Calculer l'écart avec le prochain beat idéal
-            time_diff = natural_end_time - next_beat_time
-            
-            if elapsed < color_duration:
-                # Ajustement graduel sur plusieurs beats
-                # Réduire l'écart d'un tiers à chaque cycle
-                adjustment_factor = 1.0 / self.transition_beats
-                time_adjustment = time_diff * adjustment_factor
-                
-                # Appliquer l'ajustement en modifiant le start_time
-                new_start_time = fixture["sequence_color_start_time"] - time_adjustment
-                fixture["sequence_color_start_time"] = new_start_time
-                
-                progress_percent = elapsed / color_duration
-                #print(f"Beat sync {fixture['name']}: progress {progress_percent:.1%}, gradual sync (adj: {time_adjustment:.2f}s)")
-            else:
-                # Si la couleur est déjà finie, programmer le changement sur le prochain beat
-                # mais avec un léger ajustement graduel
-                adjustment_factor = 1.0 / self.transition_beats
-                time_adjustment = time_diff * adjustment_factor
-                
-                adjusted_start_time = next_beat_time - time_adjustment
-                fixture["sequence_color_start_time"] = adjusted_start_time
-                fixture["sequence_current_color"] = fixture["sequence_next_color"]
-                fixture["sequence_next_color"] = self.get_next_color_in_theme_by_type(
-                    self.current_theme, "sequence", fixture["sequence_next_color"]
-                )
-                self.update_new_color_sequence(fixture, fixture["sequence_current_color"], adjusted_start_time)
-                #print(f"Beat sync {fixture['name']}: scheduled color change with gradual sync (adj: {time_adjustment:.2f}s)")
-        
+        self.state.sequence_color_duration[:] = beat_duration
+        self.state.sequence_fade_duration[:] = beat_duration / 2
+        self.schedule_sequence_events()
+        if self.beat_clock.locked:
+            return # Les changements de couleur suivent déjà les beats prédits (update_board)
+        self.sync_sequence_to_beat_start(p_current_time, p_bpm, p_last_beat_timestamp) # Optionnel: synchroniser immédiatement les séquences au début du beat
+
+    def sync_sequence_to_beat_start(self, current_time, p_bpm, p_last_beat_timestamp=None):
+        # Sans timestamp de beat, pas de référence de phase : rien à synchroniser
+        if not p_last_beat_timestamp or p_bpm <= 0:
+            return
+        beat_interval = 60.0 / p_bpm
+
+        # Calculer le temps jusqu'au prochain beat prédit
+        time_since_last_beat = current_time - p_last_beat_timestamp
+        time_to_next_beat = beat_interval - (time_since_last_beat % beat_interval)
+        next_beat_time = current_time + time_to_next_beat
+
+        # Nombre de beats pour la transition graduelle
+        self.transition_beats = 3  # Glisser sur 3 beats
+
+        # Synchroniser toutes les fixtures sur le prochain beat
+        state = self.state
+        start_time = state.sequence_color_start_time
+        color_duration = state.sequence_color_duration
+        elapsed = current_time - start_time
+        # Écart entre la fin naturelle de la couleur et le prochain beat idéal, réduit d'un tiers à chaque cycle
+        time_diff = (start_time + color_duration) - next_beat_time
+        time_adjustment = time_diff * (1.0 / self.transition_beats)
+
+        # Couleur en cours : ajustement graduel du start_time
+        running = elapsed < color_duration
+        start_time[running] = start_time[running] - time_adjustment[running]
+        self.schedule_sequence_events(running)
+        # Couleur déjà finie : changement programmé sur le prochain beat, avec le même ajustement graduel
+        finished = ~running
+        if finished.any():
+            self.advance_sequence_colors(finished, next_beat_time - time_adjustment[finished])
+
+    def update_sequence_on_beat(self, p_beat_position):
+        # Changement de couleur exactement sur le beat prédit par l'horloge de beat,
+        # fondu vers la couleur suivante sur la fin du beat
+        beat_index, phase = p_beat_position
+        if beat_index == self._synced_beat_index and phase < self._min_fade_phase:
+            return # Toutes les fixtures sur ce beat, aucune dans son fondu
+        state = self.state
+        unlocked = np.isnan(state.sequence_beat_index)
+        if unlocked.any():
+            state.sequence_beat_index[unlocked] = beat_index # Verrouillage : la couleur actuelle tient jusqu'au prochain beat
+            self._state_changed = True
+        advance = ~unlocked & (state.sequence_beat_index < beat_index)
+        if advance.any():
+            state.sequence_beat_index[advance] = beat_index
+            self.advance_sequence_colors(advance, self.beat_clock.beat_time(beat_index))
+        # Fondu : même proportion du beat que fade_duration / color_duration
+        fading = np.flatnonzero(~unlocked & ~advance & (phase >= state.sequence_fade_phase))
+        if len(fading):
+            fade_part = np.minimum(state.sequence_fade_duration[fading] / state.sequence_color_duration[fading], 1)
+            percent = np.minimum((phase - (1 - fade_part)) / fade_part, 1)
+            self.update_sequence_color_to_next(fading, percent)
+        self._synced_beat_index = beat_index if (state.sequence_beat_index == beat_index).all() else None
+
+    def update_sequence_on_time(self, p_current_time):
+        # Sans horloge de beat verrouillée : changement de couleur après color_duration, fondu sur fade_duration
+        if p_current_time < self._next_sequence_event:
+            return # Aucune fixture n'a atteint son fondu
+        state = self.state
+        due = np.flatnonzero(state.sequence_next_event <= p_current_time) # En fondu, ou fondu/fin de couleur échu
+        elapsed = p_current_time - state.sequence_color_start_time[due]
+        color_duration = state.sequence_color_duration[due]
+        fade_duration = state.sequence_fade_duration[due]
+        begin_fade_percent = (color_duration - fade_duration) / color_duration
+        fade_start = color_duration * begin_fade_percent
+        fade_end = fade_start + fade_duration
+        # Passer à la couleur suivante si la durée de la couleur actuelle est écoulée
+        advance = elapsed >= color_duration
+        # Fondu si on est dans la fenêtre de fondu
+        fading = ~advance & (fade_start <= elapsed) & (elapsed < fade_end)
+        if advance.any():
+            self.advance_sequence_colors(due[advance], p_current_time)
+        if fading.any():
+            percent = np.minimum((elapsed[fading] - fade_start[fading]) / fade_duration[fading], 1)
+            self.update_sequence_color_to_next(due[fading], percent)
+
+    def update_kicks(self, p_current_time):
+        # Décroissance des kicks actifs : interpolation de la couleur du kick vers la couleur de la séquence
+        if not self._kicks_active:
+            return
+        state = self.state
+        active = np.flatnonzero(state.kick_activated)
+        kick_elapsed = p_current_time - state.kick_start_time[active]
+        finished = kick_elapsed >= state.kick_duration[active]
+        state.kick_activated[active[finished]] = False
+        self._touched[active] = True
+        self._kicks_active = not finished.all()
+        decaying = active[~finished]
+        if len(decaying):
+            kick_rgb = self.palette.rgb[state.kick_color[decaying]]
+            percent = (kick_elapsed[~finished] / state.kick_duration[decaying])[:, None]
+            state.kick_rgb[decaying] = (kick_rgb + (state.sequence_rgb[decaying] - kick_rgb) * percent).astype(np.int64)
 
     def update_board(self):
-        current_time = time()
-        # Parcours de chaque fixture pour mettre à jour sa couleur et son état
-        for fixture in self.board:
-            elapsed = current_time - fixture["sequence_color_start_time"]
-            color_duration = fixture["sequence_color_duration"] 
-            fade_duration = fixture["sequence_fade_duration"]
-            begin_fade_percent = (color_duration - fade_duration) / color_duration
-            fade_start = color_duration * begin_fade_percent
-            fade_end = fade_start + fade_duration
-            # Met à jour la couleur de chaque fixture en fonction du temps écoulé
-            # Vérifie si la durée de la couleur actuelle est écoulée
-            if elapsed >= color_duration: 
-                # Passer à la couleur suivante dans la séquence
-                fixture["sequence_current_color"] = fixture["sequence_next_color"]
-                fixture["sequence_next_color"] = self.get_next_color_in_theme_by_type(self.current_theme, "sequence", fixture["sequence_next_color"])
-                self.update_new_color_sequence(fixture, fixture["sequence_current_color"], current_time)
-            # Vérifie si la durée de la couleur actuelle est à moitié écoulée
-            elif fade_start <= elapsed < fade_end:
-                percent = min((elapsed - fade_start) / fade_duration, 1)
-                self.update_sequence_color_to_next(fixture, fixture["sequence_current_color"], fixture["sequence_next_color"], percent)
-            else:
-                pass
-            self.apply_intensity_modulation(fixture)
-        for fixture in self.board:
-            if fixture["kick_activated"]:
-                kick_elapsed = current_time - fixture["kick_start_time"]
-                if kick_elapsed >= fixture["kick_duration"]:
-                    fixture["kick_activated"] = False
-                else:
-                    # Appliquer l'interpolation vers la couleur de la sequence active
-                    self.update_kick_color_to_next(fixture, fixture["kick_current_color"], fixture["sequence_red"]["value"], fixture["sequence_green"]["value"], fixture["sequence_blue"]["value"], kick_elapsed / fixture["kick_duration"])
+        current_time = self.clock.now()
+        # Modifications demandées par les autres threads depuis la dernière image
+        self.apply_commands()
+        # Position dans le beat, lue une fois par image (None tant que l'horloge n'est pas verrouillée)
+        beat_position = self.beat_clock.position(current_time)
+        # Intensité échantillonnée à chaque image (les fondus en cours l'appliquent ensuite)
+        self.set_sequence_intensity(self.get_sequence_intensity(current_time))
+        # Toutes les fixtures d'un coup (tableaux du BoardState)
+        if beat_position is not None:
+            self.update_sequence_on_beat(beat_position)
+        else:
+            self.update_sequence_on_time(current_time)
+        self.update_kicks(current_time)
         self.last_update_time = current_time
+        self.publish(current_time)
         
         
     def update_energy_levels_detailed(self, energy_levels):
-        """Met à jour les données du mainboard avec analyse détaillée"""
-        
-        # Convertir les niveaux en scores numériques
-        level_scores = {
-            'très_faible': 1,
-            'faible': 2,
-            'moyenne': 3,
-            'haute': 4,
-            'très_haute': 5
-        }
+        """Met à jour les données du mainboard avec analyse détaillée (appliqué à la prochaine image)"""
+        self.post(self._update_energy_levels_detailed, dict(energy_levels))
+
+    def _update_energy_levels_detailed(self, p_current_time, energy_levels):
         
+        # Les niveaux sont des codes entiers (VERY_LOW=1 à VERY_HIGH=5) : ce sont directement les scores
         # Calculer le score global pondéré
         total_score = (
-            level_scores[energy_levels['bass']] * 3 +           # Bass très important
-            level_scores[energy_levels['sub_bass']] * 2 +       # Sub-bass important  
-            level_scores[energy_levels['mid']] * 2 +            # Mid important
-            level_scores[energy_levels['low_mid']] * 1.5 +      # Low-mid modéré
-            level_scores[energy_levels['high']] * 1 +           # High moins important
-            level_scores[energy_levels['presence']] * 0.5       # Presence subtil
+            energy_levels['bass'] * 3 +           # Bass très important
+            energy_levels['sub_bass'] * 2 +       # Sub-bass important  
+            energy_levels['mid'] * 2 +            # Mid important
+            energy_levels['low_mid'] * 1.5 +      # Low-mid modéré
+            energy_levels['high'] * 1 +           # High moins important
+            energy_levels['presence'] * 0.5       # Presence subtil
         ) / 10  # Normaliser sur 10
         
         # Utiliser l'intensité globale pour détecter refrain/couplet
-        global_intensity_score = level_scores[energy_levels['global_intensity']]
+        global_intensity_score = energy_levels['global_intensity']
         
-        print(f"Global intensity: {energy_levels['global_intensity']} (score: {global_intensity_score})")
+        print(f"Global intensity: {level_name(global_intensity_score)} (score: {global_intensity_score})")
         
-        # Ajuster l'intensité (plage plus large pour plus de contraste)
-        if global_intensity_score == 1:  # Très faible
-            for fixture in self.board:
-                if fixture["repos_activated"] == False:
-                    fixture["repos_activated"] = True
-                    self.change_theme(p_theme="random", p_style="random")
-        else:
-            for fixture in self.board:
-                if fixture["repos_activated"] == True:
-                    fixture["repos_activated"] = False
-        if global_intensity_score == 2:  # Très faible/faible
-            intensity = 0.1 + (total_score / 5.0) * 0.4  # 0.1 à 0.5
-        elif global_intensity_score == 3:  # Moyenne
-            intensity = 0.4 + (total_score / 5.0) * 0.4  # 0.4 à 0.8
-        else:  # Haute/très haute (refrain)
-            intensity = 0.6 + (total_score / 5.0) * 0.4  # 0.6 à 1.0
+        # Mode repos sur silence ; l'intensité, elle, suit l'enveloppe continue à chaque image (update_board)
+        if global_intensity_score == VERY_LOW:  # Très faible
+            if not self.state.repos_activated.all():
+                self.state.repos_activated[:] = True
+                self._touched[:] = True
+                self.apply_theme(p_theme="random", p_style="random")
+        elif self.state.repos_activated.any():
+            self.state.repos_activated[:] = False
+            self._touched[:] = True
         
         # Détecter les changements d'ambiance importants
-        previous_global = getattr(self, 'previous_global_intensity', 'moyenne')
+        previous_global = getattr(self, 'previous_global_intensity', MEDIUM)
         
         # Transition couplet -> refrain
-        if (previous_global in ['très_faible', 'faible'] and 
-            energy_levels['global_intensity'] in ['haute', 'très_haute']):
+        if (previous_global <= LOW and 
+            global_intensity_score >= HIGH):
             print("🎵 REFRAIN DÉTECTÉ - Changement de thème")
-            self.change_theme(p_theme="random", p_style="random")
+            self.apply_theme(p_theme="random", p_style="random")
             
         # Transition refrain -> couplet
-        elif (previous_global in ['haute', 'très_haute'] and 
-            energy_levels['global_intensity'] in ['très_faible', 'faible']):
+        elif (previous_global >= HIGH and 
+            global_intensity_score <= LOW):
             print("🎵 COUPLET DÉTECTÉ - Mode calme")
-            #self.change_theme(p_theme="random", p_style="random")
+            #self.apply_theme(p_theme="random", p_style="random")
         
-        # Appliquer aux fixtures
-        for fixture in self.board:
-            old_intensity = fixture["sequence_intensity"]
-            fixture["sequence_intensity"] = intensity
-             # Si l'intensité a changé, mettre à jour immédiatement les valeurs RGB actuelles
-            if old_intensity != intensity:
-                # Recalculer les valeurs avec la nouvelle intensité
-                fixture["sequence_red"]["value"] = int(self.get_color_r(fixture["sequence_current_color"]) * intensity)
-                fixture["sequence_green"]["value"] = int(self.get_color_g(fixture["sequence_current_color"]) * intensity)
-                fixture["sequence_blue"]["value"] = int(self.get_color_b(fixture["sequence_current_color"]) * intensity)
-            
         # Stocker pour la prochaine analyse
         self.previous_global_intensity = energy_levels['global_intensity']
         
@@ -420,6 +489,6 @@ class MainBoard:
         self.detailed_energy_levels.update({
             **energy_levels,
             'total_score': total_score,
-            'intensity': intensity,
-            'timestamp': time()
+            'intensity': self.get_sequence_intensity(p_current_time),
+            'timestamp': p_current_time
         })
\ No newline at end of file
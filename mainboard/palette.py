@@ -0,0 +1,90 @@
+import json
+import numpy as np
+
+
+class Palette:
+    """
+    themes/colors.json compilé au chargement : tableau (N, 3) uint8 des couleurs,
+    les fixtures et les thèmes ne manipulent ensuite que des indices dans ce tableau.
+    """
+    def __init__(self, colors):
+        """colors : dict nom -> {"red", "green", "blue"} (format de themes/colors.json)"""
+        self.names = list(colors)
+        self.ids = {name: index for index, name in enumerate(self.names)}
+        rgb = []
+        for name, color in colors.items():
+            try:
+                values = [color["red"], color["green"], color["blue"]]
+            except (KeyError, TypeError):
+                raise ValueError(f"Color {name} must define red, green and blue")
+            if not all(isinstance(value, int) and 0 <= value <= 255 for value in values):
+                raise ValueError(f"Color {name} has values outside 0-255: {values}")
+            rgb.append(values)
+        self.rgb = np.array(rgb, dtype=np.uint8).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def index(self, name):
+        if name not in self.ids:
+            raise ValueError(f"Unknown color: {name}")
+        return self.ids[name]
+
+    def indices(self, names):
+        return np.array([self.index(name) for name in names], dtype=np.int64)
+
+
+class CompiledTheme:
+    """
+    Thème de themes/themes.json en indices de palette : listes sequence et kick, et pour chacune
+    une table "couleur suivante" indexée par couleur (-1 pour une couleur absente de la liste).
+    """
+    def __init__(self, name, theme, palette):
+        self.name = name
+        self.sequence = self._compile(name, theme, "sequence", palette)
+        self.kick = self._compile(name, theme, "kick", palette)
+        self.next_sequence = self._next_table(self.sequence, len(palette))
+        self.next_kick = self._next_table(self.kick, len(palette))
+
+    @staticmethod
+    def _compile(name, theme, kind, palette):
+        colors = theme.get(kind) if isinstance(theme, dict) else None
+        if not colors:
+            raise ValueError(f"Theme {name} has no {kind} colors")
+        try:
+            return palette.indices(colors)
+        except ValueError as e:
+            raise ValueError(f"Theme {name} ({kind}): {e}")
+
+    @staticmethod
+    def _next_table(colors, n_colors):
+        # Couleur suivant la première occurrence de chaque couleur de la liste (bouclage en fin de liste)
+        table = np.full(n_colors, -1, dtype=np.int64)
+        for position in reversed(range(len(colors))):
+            table[colors[position]] = colors[(position + 1) % len(colors)]
+        return table
+
+    @staticmethod
+    def _advance(table, colors, kind):
+        next_colors = table[colors]
+        if (next_colors < 0).any():
+            raise ValueError(f"Color index {colors[np.argmax(next_colors < 0)]} is not in the theme {kind} colors")
+        return next_colors
+
+    def next_sequence_colors(self, colors):
+        """Couleurs de séquence suivantes (tableau d'indices)"""
+        return self._advance(self.next_sequence, colors, "sequence")
+
+    def next_kick_colors(self, colors):
+        """Couleurs de kick suivantes (tableau d'indices)"""
+        return self._advance(self.next_kick, colors, "kick")
+
+
+def compile_themes(themes, palette):
+    """themes : dict nom -> {"sequence": [...], "kick": [...]} ; lève ValueError sur une couleur inconnue"""
+    return {name: CompiledTheme(name, theme, palette) for name, theme in themes.items()}